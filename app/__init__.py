@@ -1,5 +1,11 @@
 # This file makes the app directory a Python package
 
-from .__main__ import main
-
 __all__ = ['main']
+
+def __getattr__(name):
+    # The window's entry point imports tkinter; load it only when asked for,
+    # so the command line tools (app.cli) start without it
+    if name == 'main':
+        from .__main__ import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,20 +1,50 @@
-import tkinter as tk
+import argparse
 import sys
+from . import cli
 
-def main():
+def parse_args(argv=None):
+    """Parse command line options"""
+    from .backends import BACKENDS
+
+    parser = argparse.ArgumentParser(prog='scribble-thoughts')
+    parser.add_argument('--backend', default='json', choices=sorted(BACKENDS),
+                        help="Storage backend to use")
+    parser.add_argument('--compact', action='store_true',
+                        help="Keep items in compact columnar stores to save memory")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="Report import time, time-to-first-paint and time-to-interactive")
+    parser.add_argument('--instrument', action='store_true',
+                        help="Time handlers and storage calls and probe UI lag (F12 shows the numbers)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main entry point for the application"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in cli.COMMANDS:
+        # Command line use; no window, so tkinter is never imported
+        return cli.main(argv)
+
+    from .startup import StartupProfile
+
+    args = parse_args(argv)
+    profile = StartupProfile() if args.startup_profile else None
     try:
-        from .storage import Storage
+        import tkinter as tk
+        from .backends import create_storage
         from .ui.main_window import MainWindow
-        
+        from .metrics import Metrics
+        if profile:
+            profile.mark('imports')
+
         # Initialize storage
-        storage = Storage()
-        
+        storage = create_storage(args.backend, compact=args.compact)
+
         # Create and run the main window
         root = tk.Tk()
-        app = MainWindow(root, storage)
+        metrics = Metrics() if args.instrument else None
+        app = MainWindow(root, storage, profile=profile, metrics=metrics)
         app.run()
-        
+
     except ImportError as e:
         print(f"Error: {e}")
         print("Please make sure all dependencies are installed.")
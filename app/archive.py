@@ -0,0 +1,217 @@
+import datetime
+import hashlib
+import json
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from . import durable
+from .models import TodoItem
+from .search import parse_query, tokenize
+
+ARCHIVE_VERSION = 1
+
+# Completed items older than this many days are archived; the
+# ``archive_after_days`` setting overrides it and 0 turns archiving off
+ARCHIVE_AFTER_DAYS = 30
+
+# Items per segment file. A segment is compressed as a whole, so this bounds
+# both the work of adding to a chapter's last segment and the memory of
+# reading one back.
+SEGMENT_ITEMS = 5000
+
+# Search box filter that searches the archive instead of the live chapters
+ARCHIVE_FILTER = 'in:archive'
+
+def archive_cutoff(days: int, now: Optional[datetime.datetime] = None) -> Optional[str]:
+    """Timestamp before which completed items are cold; None if archiving is off"""
+    if days <= 0:
+        return None
+    now = now or datetime.datetime.now()
+    return (now - datetime.timedelta(days=days)).isoformat()
+
+def split_cold(items: Iterable, cutoff: str, limit: int = SEGMENT_ITEMS) -> Tuple[List, List[TodoItem]]:
+    """Split a chapter into the items to keep and up to ``limit`` completed
+    ones created before ``cutoff``.
+
+    Timestamps compare as strings, which orders ISO and legacy ``%Y-%m-%d
+    %H:%M`` values by date. Items without a timestamp are kept.
+    """
+    keep, cold = [], []
+    for item in items:
+        if (item.completed and item.created_at and item.created_at < cutoff
+                and len(cold) < limit):
+            cold.append(TodoItem(item.text, True, item.created_at, item.id))
+        else:
+            keep.append(item)
+    return keep, cold
+
+def archive_query(query: str) -> Optional[str]:
+    """The rest of a search box query if it asks for the archive, otherwise None"""
+    words = query.split()
+    if not any(word.lower() == ARCHIVE_FILTER for word in words):
+        return None
+    return ' '.join(word for word in words if word.lower() != ARCHIVE_FILTER)
+
+class Archive:
+    """Cold storage for completed items, per chapter, in zlib-compressed segments.
+
+    ``directory/index.json`` lists each chapter's segment files and their
+    item counts; a segment holds up to ``SEGMENT_ITEMS`` items as JSON lines
+    and is compressed as a whole. Segments are written to a temp file,
+    fsynced and renamed into place, and only then entered in the index
+    (written the same way), so a crash leaves either the old or the new
+    segment list, and items are on disk once ``add`` returns.
+
+    Nothing is read until the archive is browsed or searched: the live book
+    never loads it. Calls may come from the save writer thread and the Tk
+    thread at once; a lock serialises them.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, Any]] = None
+
+    # Index
+    def _load_index(self) -> Dict[str, Any]:
+        if self._index is None:
+            path = self.directory / 'index.json'
+            index: Dict[str, Any] = {'version': ARCHIVE_VERSION, 'chapters': {}}
+            if path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if data.get('version') == ARCHIVE_VERSION:
+                        index = data
+                except (json.JSONDecodeError, IOError) as e:
+                    print(f"Error loading archive index: {e}")
+            self._index = index
+        return self._index
+
+    def _save_index(self) -> None:
+        durable.write_json(self.directory / 'index.json', self._index, generations=0,
+                           checksum=False, indent=1)
+
+    def _segment_name(self, chapter: str, number: int) -> str:
+        digest = hashlib.sha1(chapter.encode('utf-8')).hexdigest()[:16]
+        return f'{digest}-{number:06d}.z'
+
+    # Segments
+    def _write_segment(self, name: str, items: Sequence[Dict[str, Any]]) -> None:
+        data = ''.join(json.dumps(item, ensure_ascii=False, separators=(',', ':')) + '\n'
+                       for item in items)
+        compressed = zlib.compress(data.encode('utf-8'), 6)
+        durable.write_file(self.directory / name, lambda f: f.write(compressed))
+
+    def _read_segment(self, name: str) -> List[Dict[str, Any]]:
+        with open(self.directory / name, 'rb') as f:
+            data = zlib.decompress(f.read()).decode('utf-8')
+        return [json.loads(line) for line in data.splitlines() if line]
+
+    # Writing
+    def add(self, chapter: str, items: Sequence[Dict[str, Any]]) -> int:
+        """Append item dicts to a chapter's segments; returns how many were added.
+
+        Items with an ID already in the chapter's last write are skipped, so
+        repeating an archiving step that crashed before the live state was
+        saved does not store them twice.
+        """
+        if not items:
+            return 0
+        with self._lock:
+            index = self._load_index()
+            entry = index['chapters'].setdefault(chapter, {'segments': [], 'next': 1, 'last_ids': []})
+            seen = set(entry['last_ids'])
+            fresh = [item for item in items if item.get('id') not in seen]
+            if not fresh:
+                return 0
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                segments = entry['segments']
+                pending = fresh
+                replaced = None
+                if segments and segments[-1][1] < SEGMENT_ITEMS:
+                    # Top up the last segment rather than leave a small one behind
+                    replaced = segments.pop()
+                    pending = self._read_segment(replaced[0]) + fresh
+                for start in range(0, len(pending), SEGMENT_ITEMS):
+                    chunk = pending[start:start + SEGMENT_ITEMS]
+                    name = self._segment_name(chapter, entry['next'])
+                    entry['next'] += 1
+                    self._write_segment(name, chunk)
+                    segments.append([name, len(chunk)])
+                entry['last_ids'] = [item['id'] for item in items if item.get('id') is not None]
+                self._save_index()
+            except IOError:
+                # Read the index from disk again; it still lists what is there
+                self._index = None
+                raise
+            if replaced is not None:
+                try:
+                    (self.directory / replaced[0]).unlink()
+                except OSError as e:
+                    print(f"Error removing archive segment {replaced[0]}: {e}")
+            return len(fresh)
+
+    # Reading
+    def chapters(self) -> List[str]:
+        with self._lock:
+            return list(self._load_index()['chapters'])
+
+    def count(self, chapter: Optional[str] = None) -> int:
+        """Archived items in ``chapter``, or in the whole archive"""
+        with self._lock:
+            chapters = self._load_index()['chapters']
+            names = [chapter] if chapter is not None else list(chapters)
+            return sum(count for name in names if name in chapters
+                       for _, count in chapters[name]['segments'])
+
+    def items(self, chapter: str) -> Iterator[TodoItem]:
+        """Archived items of a chapter, oldest first, one segment in memory at a time"""
+        for record in self._records(chapter):
+            yield TodoItem.from_dict(record)
+
+    def _records(self, chapter: str) -> Iterator[Dict[str, Any]]:
+        with self._lock:
+            entry = self._load_index()['chapters'].get(chapter)
+            names = [name for name, _ in entry['segments']] if entry else []
+        for name in names:
+            with self._lock:
+                try:
+                    records = self._read_segment(name)
+                except FileNotFoundError:
+                    # Merged into a newer segment since the list was taken
+                    continue
+                except (zlib.error, ValueError, IOError) as e:
+                    print(f"Error reading archive segment {name}: {e}")
+                    continue
+            yield from records
+
+    def search(self, query: str, limit: int = 500) -> List[Tuple[str, TodoItem]]:
+        """Archived items matching a search box query, as (chapter, item).
+
+        Same syntax as the live search (prefix terms, ``chapter:``); there is
+        no index, so the segments are decompressed and scanned.
+        """
+        terms, chapter, completed = parse_query(query)
+        if completed is False:
+            # Only completed items are archived
+            return []
+        chapters = [chapter] if chapter is not None else self.chapters()
+        results: List[Tuple[str, TodoItem]] = []
+        for name in chapters:
+            for record in self._records(name):
+                if terms:
+                    text = record.get('text', '').lower()
+                    # A prefix of a word is a substring; only tokenize likely matches
+                    if not all(term in text for term in terms):
+                        continue
+                    tokens = tokenize(text)
+                    if not all(any(token.startswith(term) for token in tokens) for term in terms):
+                        continue
+                results.append((name, TodoItem.from_dict(record)))
+                if len(results) >= limit:
+                    return results
+        return results
@@ -0,0 +1,25 @@
+from pathlib import Path
+from typing import Dict, Optional
+
+from .storage import Storage
+
+# Storage backends selectable with --backend. Modules are imported lazily so
+# the default JSON backend does not pay for the others.
+BACKENDS: Dict[str, str] = {
+    'json': 'app.storage:Storage',
+    'journal': 'app.journal:JournalStorage',
+    'sqlite': 'app.sqlite_storage:SQLiteStorage',
+    'sharded': 'app.sharded:ShardedStorage',
+    'binary': 'app.binary_storage:BinaryStorage',
+}
+
+def create_storage(name: str = 'json', data_dir: Optional[Path] = None,
+                   compact: bool = False) -> Storage:
+    """Instantiate the storage backend registered under ``name``"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name} (choose from {', '.join(BACKENDS)})")
+
+    import importlib
+    module_name, class_name = BACKENDS[name].split(':')
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(data_dir=data_dir, compact=compact)
@@ -0,0 +1,287 @@
+import json
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from . import json_stream
+from . import durable
+from .models import AppState
+from .storage import SYNC_KEYS, FileStamp, Storage, atomic_write_json
+from .store import ChapterStore
+
+MAGIC = b'STBK'
+# 2 added item IDs to the chapter blocks, 3 CRC32 checksums; older files still load
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct('<4sHHI')     # magic, version, flags (unused), meta length
+_TABLE_ENTRY = struct.Struct('<QQI')   # chapter offset, size in bytes, item count
+_TABLE_ENTRY_V3 = struct.Struct('<QQII')   # ... plus the CRC32 of the chapter block
+_CRC = struct.Struct('<I')
+
+# (offset, size, count, CRC32 or None for files before version 3)
+TableEntry = Tuple[int, int, int, Optional[int]]
+
+class BinaryStorage(Storage):
+    """Single binary file with a chapter offset table.
+
+    ``todo_data.bin`` starts with a header (magic, format version), the
+    chapter list, current chapter and settings as length-prefixed UTF-8 JSON,
+    and a table giving each chapter's name, offset, size and item count.
+    Chapter blocks follow in the ``ChapterStore`` column layout: text lengths
+    plus one UTF-8 buffer, completion flags packed eight to a byte,
+    created_at as int64 microseconds and int64 item IDs. Any one chapter can therefore be read
+    with a single seek; ``load_progressive()`` reads the current chapter
+    first.
+
+    Saves are durable the same way as the JSON backend's: the file is
+    fsynced before it is renamed into place and the versions it replaces
+    are kept as ``todo_data.bin.1``, ``.2``. The header and table carry a
+    CRC32, and so does each chapter block, checked whenever it is read; a
+    damaged file is reported and the newest intact kept version is loaded
+    instead.
+
+    If no binary file exists yet, ``todo_data.json`` from the JSON backend is
+    converted on first load.
+    """
+
+    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_data.bin",
+                 data_dir: Optional[Path] = None, compact: bool = False):
+        super().__init__(app_name, file_name, data_dir, compact=compact)
+
+    def load_progressive(self) -> Iterator[AppState]:
+        """Yield the state once the current chapter is read, then after each other chapter"""
+        if not self._data_path.exists():
+            legacy_path = self._data_path.with_name('todo_data.json')
+            if any(path.exists() for path in durable.generation_paths(self._data_path)[1:]):
+                # A crash between keeping the old version and the rename
+                state = self._recover(self._get_default_state(), ready=False)
+            elif legacy_path.exists():
+                state = self._migrate(legacy_path)
+            else:
+                state = self._get_default_state()
+            self._load_inbox(state)
+            yield self._pack_todos(state)
+            return
+
+        state = self._get_default_state()
+        stamp = self._stamp()
+        sync: Dict[str, Any] = {}
+        ready = False
+        try:
+            with open(self._data_path, 'rb') as f:
+                meta, table = read_header(f)
+                sync = {key: meta.pop(key) for key in SYNC_KEYS if key in meta}
+                state.update(meta)
+                state['todos'] = {}
+                current = state.get('current_chapter')
+                # Current chapter first, the rest in file order
+                order = sorted(table, key=lambda name: name != current)
+                for chapter in order:
+                    state['todos'][chapter] = self._read_chapter(f, *table[chapter])
+                    if ready or chapter == current or current not in table:
+                        ready = True
+                        yield state
+            # Chapters come back in file order whichever was read first
+            todos = state['todos']
+            for name in table:
+                todos[name] = todos.pop(name)
+        except (ValueError, IOError) as e:
+            print(f"Error loading data: {e}")
+            self._damaged = True
+            state = self._recover(state, ready)
+            sync = {}
+        self._remember_disk(stamp, sync, state.get('todos', {}))
+        self._load_inbox(state)
+        yield self._pack_todos(state)
+
+    def saved_current_chapter(self) -> str:
+        """The current chapter from the header; no chapter is read"""
+        try:
+            with open(self._data_path, 'rb') as f:
+                meta, _ = read_header(f)
+            return meta.get('current_chapter') or 'General'
+        except (ValueError, IOError):
+            return self._get_default_state()['current_chapter']
+
+    def load_chapter(self, chapter: str):
+        """Read a single chapter's items; raises KeyError if it is not in the file"""
+        with open(self._data_path, 'rb') as f:
+            _, table = read_header(f)
+            return self._read_chapter(f, *table[chapter])
+
+    def _read_chapter(self, f: BinaryIO, offset: int, size: int, count: int, crc: Optional[int]):
+        store = read_block(f, offset, size, count, crc)
+        return store if self.compact else store.to_items()
+
+    def _read_version(self, path: Path) -> AppState:
+        """Read and verify a kept version of the binary file"""
+        data = read_binary(path)
+        todos = data.pop('todos')
+        state = self._deserialize_state(data)
+        state['todos'] = todos if self.compact else {
+            chapter: store.to_items() for chapter, store in todos.items()
+        }
+        return state
+
+    def _write(self, state: AppState, sync: Dict[str, Any]) -> None:
+        # A damaged file is not worth keeping; the kept versions stay as they are
+        write_binary(self._data_path, state, sync, 0 if self._damaged else durable.GENERATIONS)
+        self._damaged = False
+    
+    def _read_disk(self, select: Callable[[Dict[str, int]], Set[str]]
+                   ) -> Tuple[FileStamp, int, Dict[str, int], Dict[str, Any]]:
+        """Sync keys from the header; only the selected chapters are read"""
+        stamp = self._stamp()
+        with open(self._data_path, 'rb') as f:
+            meta, table = read_header(f)
+            saved = meta.get('chapter_versions')
+            if not isinstance(saved, dict):
+                saved = {}
+            versions = {name: saved.get(name, 0) for name in table}
+            chapters = {name: self._read_chapter(f, *table[name]) for name in select(versions)}
+        return stamp, int(meta.get('generation') or 0), versions, chapters
+
+    def _migrate(self, legacy_path: Path) -> AppState:
+        """Convert a JSON backend data file"""
+        source = Storage(app_name=self.app_name, file_name=legacy_path.name,
+                         data_dir=legacy_path.parent, compact=self.compact)
+        state = source.load()
+        self.save(state)
+        return state
+
+def read_header(f: BinaryIO) -> Tuple[Dict[str, Any], Dict[str, TableEntry]]:
+    """Read the header of an open binary file.
+
+    Returns the meta dict (everything but todos) and the offset table as
+    ``{chapter: (offset, size, count, crc)}`` in file order. Raises
+    ValueError for files that are not in this format or are damaged.
+    """
+    try:
+        magic, version, _, meta_size = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("not a binary todo file")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"binary format version {version} is newer than supported ({FORMAT_VERSION})")
+        entry_format = _TABLE_ENTRY_V3 if version >= 3 else _TABLE_ENTRY
+        # Everything after the fixed header up to the end of the table is
+        # covered by the header checksum
+        raw = f.read(meta_size)
+        crc = zlib.crc32(raw)
+        meta = json.loads(raw.decode('utf-8'))
+        if not isinstance(meta, dict):
+            raise ValueError("damaged header")
+        raw = f.read(4)
+        crc = zlib.crc32(raw, crc)
+        (chapter_count,) = struct.unpack('<I', raw)
+        table: Dict[str, TableEntry] = {}
+        for _ in range(chapter_count):
+            raw = f.read(4)
+            (name_size,) = struct.unpack('<I', raw)
+            name = f.read(name_size)
+            entry = f.read(entry_format.size)
+            crc = zlib.crc32(entry, zlib.crc32(name, zlib.crc32(raw, crc)))
+            fields = entry_format.unpack(entry)
+            table[name.decode('utf-8')] = fields if version >= 3 else fields + (None,)
+        if version >= 3:
+            (expected,) = _CRC.unpack(f.read(_CRC.size))
+            if crc != expected:
+                raise durable.ChecksumError("header checksum mismatch")
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"truncated header: {e}") from e
+    return meta, table
+
+def read_block(f: BinaryIO, offset: int, size: int, count: int, crc: Optional[int]) -> ChapterStore:
+    """Read and check one chapter block of an open binary file"""
+    f.seek(offset)
+    block = f.read(size)
+    if crc is not None and zlib.crc32(block) != crc:
+        raise durable.ChecksumError("chapter checksum mismatch")
+    store = ChapterStore.from_bytes(block)
+    if len(store) != count:
+        raise ValueError("chapter item count does not match the offset table")
+    return store
+
+def write_binary(path: Path, state: AppState, extra_meta: Optional[Dict[str, Any]] = None,
+                 generations: int = 0) -> None:
+    """Durably write ``state`` to ``path`` (see durable.write_file).
+
+    The offset table is written with zeros first and filled in once every
+    chapter block is written and its position and checksum are known.
+    ``extra_meta`` is stored in the header alongside the state's own keys.
+    With ``generations`` the replaced files are kept as ``path.1`` and on.
+    """
+    todos = state.get('todos', {})
+    meta = {key: value for key, value in state.items() if key != 'todos'}
+    meta.update(extra_meta or {})
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    names = [name.encode('utf-8') for name in todos]
+
+    def write(f: BinaryIO) -> None:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta_bytes)))
+        f.write(meta_bytes)
+        f.write(struct.pack('<I', len(names)))
+        table_start = f.tell()
+        for name in names:
+            f.write(struct.pack('<I', len(name)))
+            f.write(name)
+            f.write(_TABLE_ENTRY_V3.pack(0, 0, 0, 0))
+        f.write(_CRC.pack(0))
+
+        entries: List[bytes] = []
+        for items in todos.values():
+            block = (items if isinstance(items, ChapterStore) else ChapterStore(items)).to_bytes()
+            entries.append(_TABLE_ENTRY_V3.pack(f.tell(), len(block), len(items), zlib.crc32(block)))
+            f.write(block)
+
+        crc = zlib.crc32(struct.pack('<I', len(names)), zlib.crc32(meta_bytes))
+        f.seek(table_start)
+        for name, entry in zip(names, entries):
+            f.seek(4 + len(name), os.SEEK_CUR)
+            f.write(entry)
+            crc = zlib.crc32(entry, zlib.crc32(name, zlib.crc32(struct.pack('<I', len(name)), crc)))
+        f.write(_CRC.pack(crc))
+
+    durable.write_file(path, write, generations)
+
+def read_binary(path: Path) -> AppState:
+    """Read and verify a whole binary file into a state with ChapterStores; errors are raised"""
+    with open(path, 'rb') as f:
+        meta, table = read_header(f)
+        state = dict(meta)
+        state['todos'] = {chapter: read_block(f, *entry) for chapter, entry in table.items()}
+    return state
+
+def json_to_binary(json_path: Path, binary_path: Path) -> int:
+    """Convert a JSON data file to the binary format; returns the item count"""
+    json_path = Path(json_path)
+    storage = Storage(file_name=json_path.name, data_dir=json_path.parent, compact=True)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        state = storage._deserialize_state(json_stream.load(f))
+    write_binary(Path(binary_path), state)
+    return sum(len(items) for items in state['todos'].values())
+
+def binary_to_json(binary_path: Path, json_path: Path) -> int:
+    """Convert a binary data file to the JSON format; returns the item count"""
+    json_path = Path(json_path)
+    state = read_binary(Path(binary_path))
+    storage = Storage(file_name=json_path.name, data_dir=json_path.parent)
+    atomic_write_json(json_path, storage._serialize_state(state), indent=2)
+    return sum(len(items) for items in state['todos'].values())
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m app.binary_storage',
+                                     description="Convert between the JSON and binary data files")
+    parser.add_argument('direction', choices=['to-binary', 'to-json'])
+    parser.add_argument('source', type=Path)
+    parser.add_argument('target', type=Path)
+    args = parser.parse_args()
+    convert = json_to_binary if args.direction == 'to-binary' else binary_to_json
+    try:
+        count = convert(args.source, args.target)
+    except (ValueError, IOError) as e:
+        print(f"Error converting {args.source}: {e}")
+        raise SystemExit(1)
+    print(f"Converted {count} items from {args.source} to {args.target}")
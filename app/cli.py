@@ -0,0 +1,223 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .backends import BACKENDS, create_storage
+from .models import TodoItem
+from .storage import Storage
+
+# Command line access to the book for scripts and shells. Commands work on
+# the storage backend directly and never import tkinter, sv_ttk or keyboard;
+# modules only some commands need (search, stats, transfer) are imported by
+# those commands. ``add`` does not load the book at all: each backend
+# appends in the cheapest way its layout allows (see Storage.append_items).
+
+COMMANDS = ('add', 'list', 'done', 'search', 'export')
+
+class _HelpFormatter(argparse.HelpFormatter):
+    """argparse's formatter, sized without importing shutil.
+
+    argparse makes a formatter for every add_argument() call, and the stock
+    one imports shutil (and with it bz2 and lzma) for the terminal width,
+    a few ms on every run even though help is rarely printed.
+    """
+
+    def __init__(self, prog: str, indent_increment: int = 2, max_help_position: int = 24,
+                 width: Optional[int] = None):
+        if width is None:
+            try:
+                width = int(os.environ.get('COLUMNS', '')) - 2
+            except ValueError:
+                try:
+                    width = os.get_terminal_size(sys.__stdout__.fileno()).columns - 2
+                except (AttributeError, ValueError, OSError):
+                    width = 78
+        super().__init__(prog, indent_increment, max_help_position, width)
+
+class _ArgumentParser(argparse.ArgumentParser):
+    """An ArgumentParser using _HelpFormatter; subcommand parsers are made
+    with the class of their parent, so they use it too"""
+
+    def __init__(self, *args, formatter_class=_HelpFormatter, **kwargs):
+        super().__init__(*args, formatter_class=formatter_class, **kwargs)
+
+def _mark(completed: bool) -> str:
+    return '[x]' if completed else '[ ]'
+
+def _texts(args: argparse.Namespace) -> Iterable[str]:
+    """Item texts from the command line; ``-`` reads one per line from stdin"""
+    for text in args.text:
+        if text == '-':
+            for line in sys.stdin:
+                line = line.rstrip('\r\n')
+                if line.strip():
+                    yield line
+        elif text.strip():
+            yield text
+
+def cmd_add(storage: Storage, args: argparse.Namespace) -> None:
+    import datetime
+
+    chapter = args.chapter or storage.saved_current_chapter()
+    created_at = datetime.datetime.now().isoformat()
+    items = [TodoItem(text, args.done, created_at) for text in _texts(args)]
+    if not items:
+        raise ValueError("Nothing to add")
+    storage.append_items(chapter, items)
+    if not args.quiet:
+        print(f"Added {len(items)} item{'s' if len(items) != 1 else ''} to {chapter}")
+
+def cmd_list(storage: Storage, args: argparse.Namespace) -> None:
+    state = storage.load()
+    todos = state.get('todos', {})
+    if args.all:
+        chapters = [chapter for chapter in state.get('chapters', []) if chapter in todos]
+    else:
+        chapters = [args.chapter or state.get('current_chapter', 'General')]
+    out = sys.stdout
+    for chapter in chapters:
+        if chapter not in todos:
+            raise ValueError(f"No chapter named {chapter!r}")
+        if args.all:
+            out.write(f"{chapter}\n")
+        for number, item in enumerate(todos[chapter], 1):
+            if args.status is None or item.completed == args.status:
+                out.write(f"{number:>5}  {_mark(item.completed)} {item.text}\n")
+
+def cmd_done(storage: Storage, args: argparse.Namespace) -> None:
+    from .stats import BookStats
+
+    state = storage.load()
+    chapter = args.chapter or state.get('current_chapter', 'General')
+    items = state.get('todos', {}).get(chapter)
+    if items is None:
+        raise ValueError(f"No chapter named {chapter!r}")
+    completed = not args.undo
+    stats = BookStats.attach(state)
+    changed: List[int] = []
+    for number in args.numbers:
+        if not 1 <= number <= len(items):
+            raise ValueError(f"{chapter} has no item {number} (it has {len(items)})")
+        item = items[number - 1]
+        if item.completed != completed:
+            item.completed = completed
+            stats.toggled(chapter, completed)
+            changed.append(item.id)
+    if changed:
+        if storage.incremental:
+            for item_id in changed:
+                storage.toggle_item(state, chapter, item_id, completed)
+            if storage.wants_snapshot():
+                storage.save(state)
+        else:
+            if storage.external_sync:
+                storage.mark_changed(chapter)
+            storage.save(state)
+    if not args.quiet:
+        print(f"Marked {len(changed)} item{'s' if len(changed) != 1 else ''} in {chapter} as "
+              f"{'done' if completed else 'open'}")
+
+def cmd_search(storage: Storage, args: argparse.Namespace) -> None:
+    from .archive import Archive, archive_query
+
+    query = ' '.join(args.query)
+    rest = archive_query(query)
+    if rest is not None:
+        archive = Archive(storage.data_path.with_name('todo_archive'))
+        for chapter, item in archive.search(rest, limit=args.limit):
+            print(f"{chapter} (archive)  {_mark(item.completed)} {item.text}")
+        return
+
+    from .search import SearchIndex
+
+    state = storage.load()
+    todos = state.get('todos', {})
+    # The window's persisted index, if there is one; it is not written back
+    index = SearchIndex.load_or_build(state, storage.data_path.with_suffix('.index'))
+    results, _ = index.search(query, limit=args.limit)
+    for chapter, position in results:
+        item = todos[chapter][position]
+        print(f"{chapter}:{position + 1}  {_mark(item.completed)} {item.text}")
+
+def cmd_export(storage: Storage, args: argparse.Namespace) -> None:
+    from . import transfer
+
+    state = storage.load()
+    chapter = args.chapter or state.get('current_chapter', 'General')
+    if chapter not in state.get('todos', {}):
+        raise ValueError(f"No chapter named {chapter!r}")
+    count = transfer.write_items(args.file, state['todos'][chapter], args.format, chapter)
+    if not args.quiet:
+        print(f"Exported {count} items from {chapter} to {args.file}")
+
+def build_parser() -> argparse.ArgumentParser:
+    # Shared options are accepted after the command as well as before it
+    common = _ArgumentParser(add_help=False)
+    common.add_argument('--backend', default='json', choices=sorted(BACKENDS),
+                        help="Storage backend to use")
+    common.add_argument('--compact', action='store_true',
+                        help="Keep items in compact columnar stores")
+    common.add_argument('--data-dir', type=Path,
+                        help="Directory of the data files (default: the app's own)")
+    common.add_argument('-q', '--quiet', action='store_true', help="Print nothing on success")
+
+    parser = _ArgumentParser(prog='scribble-thoughts',
+                             description="Work with the todo book from the command line. "
+                                         "Without a command the window opens.")
+    commands = parser.add_subparsers(dest='command', required=True, metavar='COMMAND')
+
+    add = commands.add_parser('add', parents=[common], help="Add items to a chapter")
+    add.add_argument('text', nargs='+', help="Item text; - reads one item per line from stdin")
+    add.add_argument('--chapter', help="Chapter to add to, created if needed (default: the current one)")
+    add.add_argument('--done', action='store_true', help="Add the items as done")
+    add.set_defaults(run=cmd_add)
+
+    list_ = commands.add_parser('list', parents=[common], help="List a chapter's items, numbered")
+    list_.add_argument('--chapter', help="Chapter to list (default: the current one)")
+    list_.add_argument('--all', action='store_true', help="List every chapter")
+    status = list_.add_mutually_exclusive_group()
+    status.add_argument('--open', dest='status', action='store_const', const=False,
+                        help="Only items not done")
+    status.add_argument('--done', dest='status', action='store_const', const=True,
+                        help="Only items done")
+    list_.set_defaults(run=cmd_list, status=None)
+
+    done = commands.add_parser('done', parents=[common], help="Mark items done by their list number")
+    done.add_argument('numbers', nargs='+', type=int, metavar='NUMBER')
+    done.add_argument('--chapter', help="Chapter of the items (default: the current one)")
+    done.add_argument('--undo', action='store_true', help="Mark the items as not done instead")
+    done.set_defaults(run=cmd_done)
+
+    search = commands.add_parser('search', parents=[common],
+                                 help="Search every chapter (same syntax as the search box)")
+    search.add_argument('query', nargs='+')
+    search.add_argument('--limit', type=int, default=100)
+    search.set_defaults(run=cmd_search)
+
+    export = commands.add_parser('export', parents=[common], help="Write a chapter to a file")
+    export.add_argument('file', type=Path)
+    export.add_argument('--chapter', help="Chapter to export (default: the current one)")
+    export.add_argument('--format', choices=('txt', 'md', 'csv', 'jsonl'),
+                        help="File format (default: from the file suffix)")
+    export.set_defaults(run=cmd_export)
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """``scribble-thoughts COMMAND ...``"""
+    args = build_parser().parse_args(argv)
+    storage = create_storage(args.backend, args.data_dir, compact=args.compact)
+    try:
+        args.run(storage, args)
+    except BrokenPipeError:
+        # Output piped into head and the like
+        sys.stderr.close()
+    except (ValueError, IOError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        raise SystemExit(1)
+    finally:
+        storage.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+import hashlib
+import json
+import sys
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+class ClipEntry:
+    """One captured clipboard text"""
+
+    __slots__ = ('text', 'digest', 'captured_at', 'segment')
+
+    def __init__(self, text: str, digest: bytes, captured_at: float, segment: int):
+        self.text = text
+        self.digest = digest
+        self.captured_at = captured_at
+        self.segment = segment
+
+    @property
+    def size(self) -> int:
+        return len(self.text)
+
+def digest_text(text: str) -> bytes:
+    return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+class ClipboardHistory:
+    """Bounded, deduplicated history of clipboard captures, oldest first.
+
+    Entries are keyed by a hash of their text, so a repeated copy is found in
+    O(1) and moved to the newest position instead of being stored twice. The
+    ordered dict works as a ring buffer: once ``max_entries``, ``max_chars``
+    or ``max_age`` is exceeded the oldest entries are dropped.
+
+    Captures are appended to JSON-lines segment files in ``directory``
+    (``seg-000001.jsonl``, ...) that roll over every ``segment_entries``
+    records. A segment is deleted once none of its records is live any more,
+    and when dead records outnumber live ones the live entries are rewritten
+    into fresh segments, so disk use stays proportional to the buffer.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = 5000,
+                 max_chars: int = 8 * 1024 * 1024, max_age: float = 30 * 24 * 3600,
+                 segment_entries: int = 1000):
+        self.directory = Path(directory) if directory is not None else None
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.max_age = max_age
+        self.segment_entries = segment_entries
+        self._entries: 'OrderedDict[bytes, ClipEntry]' = OrderedDict()
+        self._chars = 0
+        # segment id -> number of live entries whose record is in it
+        self._live: Dict[int, int] = {}
+        self._records = 0          # records in all segment files
+        self._segment = 1          # segment currently appended to
+        self._segment_records = 0
+        self._file = None
+        self._loading = False
+
+    # Reading
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[ClipEntry]:
+        return iter(list(self._entries.values()))
+
+    def entries(self) -> List[ClipEntry]:
+        return list(self._entries.values())
+
+    def get(self, digest: bytes) -> Optional[ClipEntry]:
+        """The entry with ``digest``, or None if it was evicted or cleared"""
+        return self._entries.get(digest)
+
+    @property
+    def chars(self) -> int:
+        return self._chars
+
+    # Capturing
+    def add(self, text: str, captured_at: Optional[float] = None) -> Optional[ClipEntry]:
+        """Record a capture; returns None if nothing changed"""
+        if not text or not text.strip() or len(text) > self.max_chars:
+            return None
+        digest = digest_text(text)
+        existing = self._entries.get(digest)
+        if existing is not None and next(reversed(self._entries)) == digest:
+            # Same as the newest entry, e.g. the watcher seeing our own copy
+            return None
+
+        captured_at = time.time() if captured_at is None else captured_at
+        if existing is not None:
+            self._remove(digest)
+        entry = self._insert(text, digest, captured_at, self._append_record(text, captured_at))
+        self._evict(captured_at)
+        self._maybe_compact()
+        return entry
+
+    def clear(self) -> None:
+        """Drop every entry and delete the segment files"""
+        self.close()
+        self._entries.clear()
+        self._chars = 0
+        for segment in list(self._live):
+            self._delete_segment(segment)
+        self._live.clear()
+        self._records = 0
+        self._segment_records = 0
+
+    def _insert(self, text: str, digest: bytes, captured_at: float, segment: int) -> ClipEntry:
+        entry = ClipEntry(text, digest, captured_at, segment)
+        self._entries[digest] = entry
+        self._chars += entry.size
+        self._live[segment] = self._live.get(segment, 0) + 1
+        return entry
+
+    def _remove(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest)
+        self._chars -= entry.size
+        self._release(entry.segment)
+
+    def _evict(self, now: float) -> None:
+        """Drop the oldest entries until every limit holds"""
+        cutoff = now - self.max_age
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if (len(self._entries) <= self.max_entries and self._chars <= self.max_chars
+                    and oldest.captured_at >= cutoff):
+                break
+            self._remove(oldest.digest)
+
+    # Persistence
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f'seg-{segment:06d}.jsonl'
+
+    def load(self) -> 'ClipboardHistory':
+        """Replay the segment files in order"""
+        if self.directory is None or not self.directory.exists():
+            return self
+        segments = sorted(int(path.stem[4:]) for path in self.directory.glob('seg-*.jsonl'))
+        # Dead segments are removed after the replay, not while reading
+        self._loading = True
+        for segment in segments:
+            records = 0
+            good_size = 0
+            path = self._segment_path(segment)
+            try:
+                with open(path, 'rb') as f:
+                    for line in f:
+                        try:
+                            if not line.endswith(b'\n'):
+                                raise ValueError("incomplete record")
+                            record = json.loads(line)
+                        except ValueError:
+                            # Torn write; the rest of the segment is unusable
+                            break
+                        good_size += len(line)
+                        records += 1
+                        text = record.get('text', '')
+                        digest = digest_text(text)
+                        if digest in self._entries:
+                            self._remove(digest)
+                        self._live.setdefault(segment, 0)
+                        self._insert(text, digest, float(record.get('t', 0)), segment)
+                if good_size < path.stat().st_size:
+                    # Cut the torn tail so new records start on a clean line
+                    with open(path, 'r+b') as f:
+                        f.truncate(good_size)
+            except IOError as e:
+                print(f"Error loading clipboard history: {e}")
+            self._live.setdefault(segment, 0)
+            self._records += records
+            self._segment, self._segment_records = segment, records
+        self._loading = False
+        if self._segment_records >= self.segment_entries:
+            self._segment += 1
+            self._segment_records = 0
+        self._evict(time.time())
+        for segment, live in list(self._live.items()):
+            if live == 0 and segment != self._segment:
+                self._delete_segment(segment)
+        return self
+
+    def _append_record(self, text: str, captured_at: float) -> int:
+        """Write one capture to the current segment; returns its segment id"""
+        if self._segment_records >= self.segment_entries:
+            self.close()
+            self._segment += 1
+            self._segment_records = 0
+        segment = self._segment
+        self._segment_records += 1
+        self._records += 1
+        if self.directory is None:
+            return segment
+        line = json.dumps({'t': round(captured_at, 3), 'text': text}, ensure_ascii=False) + '\n'
+        try:
+            if self._file is None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._file = open(self._segment_path(segment), 'a', encoding='utf-8')
+            self._file.write(line)
+            self._file.flush()
+        except IOError as e:
+            print(f"Error saving clipboard history: {e}")
+        return segment
+
+    def _release(self, segment: int) -> None:
+        """An entry stored in ``segment`` left the buffer"""
+        self._live[segment] -= 1
+        if self._live[segment] == 0 and segment != self._segment and not self._loading:
+            self._delete_segment(segment)
+
+    def _delete_segment(self, segment: int) -> None:
+        self._live.pop(segment, None)
+        if self.directory is None:
+            return
+        path = self._segment_path(segment)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._records -= sum(1 for _ in f)
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing clipboard segment: {e}")
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the live entries once most records on disk are dead"""
+        if self._records <= 2 * len(self._entries) + self.segment_entries:
+            return
+        entries = self.entries()
+        old_segments = list(self._live)
+        self.close()
+        self._live = {}
+        self._chars = 0
+        self._entries.clear()
+        self._records = 0
+        self._segment = max(old_segments, default=self._segment) + 1
+        self._segment_records = 0
+        for entry in entries:
+            self._insert(entry.text, entry.digest, entry.captured_at,
+                         self._append_record(entry.text, entry.captured_at))
+        self.close()
+        for segment in old_segments:
+            if segment not in self._live:
+                self._delete_segment(segment)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+def _clipboard_sequence_source() -> Optional[Callable[[], int]]:
+    """A function returning a counter that changes with the clipboard, if the
+    platform has one; lets the watcher skip reading unchanged contents"""
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetClipboardSequenceNumber
+        except (ImportError, AttributeError, OSError):
+            return None
+    return None
+
+class ClipboardWatcher:
+    """Detects clipboard changes through the Tk root.
+
+    Tk has no clipboard-changed event, so the watcher checks on an ``after``
+    timer whose interval backs off from ``min_interval`` to ``max_interval``
+    while nothing changes and snaps back on a change or ``poke()``. On
+    Windows the clipboard sequence number is compared first, so an idle
+    check does not even read the clipboard. ``cpu_time``/``polls`` record
+    what the checks cost.
+    """
+
+    def __init__(self, root, on_change: Callable[[str], None],
+                 min_interval: int = 250, max_interval: int = 2000):
+        self.root = root
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.polls = 0
+        self.changes = 0
+        self.cpu_time = 0.0
+        self._job = None
+        self._last_text: Optional[str] = None
+        self._last_sequence: Optional[int] = None
+        self._sequence = _clipboard_sequence_source()
+
+    @property
+    def running(self) -> bool:
+        return self._job is not None
+
+    def start(self) -> None:
+        """Start watching; whatever is on the clipboard now is not captured"""
+        if self._job is not None:
+            return
+        self._last_sequence = self._sequence() if self._sequence else None
+        self._last_text = self._read()
+        self.interval = self.min_interval
+        self._job = self.root.after(self.interval, self._poll)
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def poke(self) -> None:
+        """Check soon, e.g. when the window regains focus"""
+        if self._job is not None and self.interval > self.min_interval:
+            self.root.after_cancel(self._job)
+            self.interval = self.min_interval
+            self._job = self.root.after(self.interval, self._poll)
+
+    def _read(self) -> Optional[str]:
+        try:
+            return self.root.clipboard_get()
+        except Exception:
+            # Empty clipboard or non-text contents
+            return None
+
+    def _poll(self) -> None:
+        start = time.process_time()
+        changed = self._check()
+        self.polls += 1
+        if changed:
+            self.changes += 1
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * 2)
+        self.cpu_time += time.process_time() - start
+        self._job = self.root.after(self.interval, self._poll)
+
+    def _check(self) -> bool:
+        if self._sequence is not None:
+            sequence = self._sequence()
+            if sequence == self._last_sequence:
+                return False
+            self._last_sequence = sequence
+        text = self._read()
+        if text is None or text == self._last_text:
+            return False
+        self._last_text = text
+        self.on_change(text)
+        return True
@@ -0,0 +1,257 @@
+"""Crash-safe writes of the JSON data file.
+
+A save is written to a temp file, fsynced and renamed over the data file, so
+the file on disk is always either the old or the new version, never a mix.
+The first line of the file carries a CRC32 of everything after it; a file
+damaged on disk anyway (a torn sector after power loss, a bad copy) is
+caught on load instead of being read as a shorter book. The versions the
+last saves replaced are kept as ``<name>.1``, ``<name>.2``, ... so there is
+something valid to fall back to.
+
+The header is an ordinary JSON member, so the file stays valid JSON and
+files written before checksums existed load as they are.
+"""
+import io
+import json
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+# Top-level key of the checksum header; not part of the AppState
+CHECKSUM_KEY = 'checksum'
+
+# Previous versions of the data file kept next to it
+GENERATIONS = 2
+
+# How long appended writes wait for others to share their fsync, in seconds
+SYNC_WINDOW = 0.1
+
+_HEADER = '{"checksum": "crc32:%08x",'
+HEADER_SIZE = len(_HEADER % 0)
+_HEADER_PREFIX = _HEADER.split('%')[0].encode('ascii')
+
+class ChecksumError(ValueError):
+    """The data file does not match the checksum in its header"""
+
+def fsync_dir(path: Path) -> None:
+    """Make a rename in ``path``'s directory durable; a no-op where directories cannot be opened"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def generation_paths(path: Path, generations: int = GENERATIONS) -> List[Path]:
+    """The data file and its kept previous versions, newest first"""
+    return [path] + [path.with_name(f'{path.name}.{n}') for n in range(1, generations + 1)]
+
+def _parse_header(head: bytes) -> Optional[int]:
+    """The checksum in a file's first bytes, or None if it has no header"""
+    if len(head) != HEADER_SIZE or not head.startswith(_HEADER_PREFIX) or not head.endswith(b'",'):
+        return None
+    try:
+        return int(head[len(_HEADER_PREFIX):-2], 16)
+    except ValueError:
+        return None
+
+class _CrcStream(io.RawIOBase):
+    """Raw stream over a binary file that keeps a CRC32 of what passes through.
+
+    ``skip`` bytes written first are dropped (the opening brace the header
+    stands in for) and ``prefix`` is read back before the file's contents.
+    """
+
+    def __init__(self, f: BinaryIO, skip: int = 0, prefix: bytes = b''):
+        self.f = f
+        self.crc = 0
+        self._skip = skip
+        self._prefix = prefix
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        size = len(b)
+        data = memoryview(b)[self._skip:]
+        self._skip = max(0, self._skip - size)
+        self.crc = zlib.crc32(data, self.crc)
+        self.f.write(data)
+        return size
+
+    def readinto(self, b) -> int:
+        if self._prefix:
+            size = min(len(b), len(self._prefix))
+            b[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        size = self.f.readinto(b)
+        self.crc = zlib.crc32(memoryview(b)[:size], self.crc)
+        return size
+
+def _dump(f: BinaryIO, data: Any, skip: int = 0, **dump_kwargs) -> int:
+    """Stream ``data`` as UTF-8 JSON into ``f``; returns the CRC32 of what was written"""
+    stream = _CrcStream(f, skip)
+    text = io.TextIOWrapper(io.BufferedWriter(stream), encoding='utf-8')
+    json.dump(data, text, ensure_ascii=False, **dump_kwargs)
+    text.flush()
+    text.detach().detach()
+    return stream.crc
+
+def write_file(path: Path, write: Callable[[BinaryIO], None], generations: int = 0) -> None:
+    """Write a temp file with ``write``, fsync it and rename it over ``path``.
+
+    With ``generations`` the file being replaced is kept as ``path.1`` and
+    older ones shift up, dropping the oldest.
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    if generations and path.exists():
+        _rotate(path, generations)
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+def _rotate(path: Path, generations: int) -> None:
+    paths = generation_paths(path, generations)
+    for older, newer in zip(reversed(paths[1:]), reversed(paths[:-1])):
+        if newer != path and newer.exists():
+            os.replace(newer, older)
+    try:
+        # A second link keeps the data file in place until the new one
+        # replaces it, so there is no moment without one
+        if paths[1].exists():
+            paths[1].unlink()
+        os.link(path, paths[1])
+    except OSError:
+        # No hard links on this file system; rename instead. A crash right
+        # after this leaves only the kept version, which load falls back to.
+        os.replace(path, paths[1])
+
+def write_json(path: Path, data: Dict[str, Any], generations: int = GENERATIONS,
+               checksum: bool = True, **dump_kwargs) -> None:
+    """Durably write a JSON file, by default with a checksum header"""
+    def write(f: BinaryIO) -> None:
+        if not checksum:
+            _dump(f, data, **dump_kwargs)
+            return
+        # The header takes the place of the opening brace; its checksum is
+        # filled in once the rest is written
+        f.write((_HEADER % 0).encode('ascii'))
+        crc = _dump(f, data, skip=1, **dump_kwargs)
+        f.seek(0)
+        f.write((_HEADER % crc).encode('ascii'))
+    write_file(path, write, generations)
+
+class VerifyingReader:
+    """Text reader over a data file that checks its checksum header.
+
+    Reads like a text file, for the streaming decoder, and hashes the bytes
+    as they go by. ``verify()`` reads whatever the decoder left unread and
+    raises ChecksumError on a mismatch. Files without a header are not
+    checked.
+    """
+
+    def __init__(self, f: BinaryIO):
+        head = f.read(HEADER_SIZE)
+        self.expected = _parse_header(head)
+        # Without a header everything read so far is content
+        self._stream = _CrcStream(f, prefix=b'{' if self.expected is not None else head)
+        self._text = io.TextIOWrapper(io.BufferedReader(self._stream), encoding='utf-8')
+
+    def read(self, size: int = -1) -> str:
+        return self._text.read(size)
+
+    def fileno(self) -> int:
+        # Lets the decoder size its reads to the file
+        return self._stream.f.fileno()
+
+    def verify(self) -> None:
+        """Hash the rest of the file and compare; raises ChecksumError"""
+        if self.expected is None:
+            return
+        stream = self._stream
+        while True:
+            chunk = stream.f.read(64 * 1024)
+            if not chunk:
+                break
+            stream.crc = zlib.crc32(chunk, stream.crc)
+        if stream.crc != self.expected:
+            raise ChecksumError(f"checksum mismatch (expected {self.expected:08x}, got {stream.crc:08x})")
+
+def load_json(path: Path) -> Dict[str, Any]:
+    """Read and verify a whole data file; raises ValueError or IOError"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    expected = _parse_header(data[:HEADER_SIZE])
+    if expected is not None:
+        rest = data[HEADER_SIZE:]
+        if zlib.crc32(rest) != expected:
+            raise ChecksumError(f"checksum mismatch in {path.name}")
+        data = b'{' + rest
+    loaded = json.loads(data.decode('utf-8'))
+    if not isinstance(loaded, dict):
+        raise ValueError(f"{path.name} does not hold a JSON object")
+    return loaded
+
+class GroupCommit:
+    """Shares one fsync between the appends of a short window.
+
+    ``written(f)`` after a flushed write schedules an fsync of ``f`` in
+    ``window`` seconds unless one is already pending; every write until
+    then rides on it. A crash of the process loses nothing (the data is in
+    the OS already), and a power loss at most the last window's writes.
+    Call ``sync()`` before closing a file.
+    """
+
+    def __init__(self, window: float = SYNC_WINDOW):
+        self.window = window
+        self.writes = 0
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._pending: Dict[int, BinaryIO] = {}
+        self._timer: Optional[threading.Timer] = None
+
+    def written(self, f: BinaryIO) -> None:
+        with self._lock:
+            self.writes += 1
+            self._pending[id(f)] = f
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def sync(self) -> None:
+        """Fsync every file written since the last sync, now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            files, self._pending = list(self._pending.values()), {}
+            for f in files:
+                try:
+                    os.fsync(f.fileno())
+                    self.syncs += 1
+                except (OSError, ValueError) as e:
+                    print(f"Error syncing {getattr(f, 'name', 'file')}: {e}")
+
+    def discard(self) -> None:
+        """Forget pending writes that no longer need to be durable"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending = {}
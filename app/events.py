@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from .models import AppState, TodoItem
+from .stats import BookStats
+from .store import ItemIndex
+
+# Change events. Each describes one change and carries just enough to apply
+# it without re-reading the chapter; subscribers get them in the order the
+# changes happened. Only ChapterReplaced asks for a re-read.
+
+@dataclass(frozen=True)
+class ItemAdded:
+    chapter: str
+    index: int
+    item: TodoItem
+
+@dataclass(frozen=True)
+class ItemRemoved:
+    chapter: str
+    index: int
+    item_id: int
+    completed: bool
+
+@dataclass(frozen=True)
+class ItemToggled:
+    chapter: str
+    index: int
+    item_id: int
+    completed: bool
+
+@dataclass(frozen=True)
+class ChapterCleared:
+    chapter: str
+
+@dataclass(frozen=True)
+class ChapterReplaced:
+    """The chapter's items changed wholesale (undo of a clear, an import, a
+    merge from another window); read it again"""
+    chapter: str
+
+@dataclass(frozen=True)
+class ChapterAdded:
+    chapter: str
+
+@dataclass(frozen=True)
+class ChapterDeleted:
+    chapter: str
+
+@dataclass(frozen=True)
+class ChapterSwitched:
+    previous: str
+    chapter: str
+
+@dataclass(frozen=True)
+class SettingChanged:
+    key: str
+    value: Any
+
+Event = Union[ItemAdded, ItemRemoved, ItemToggled, ChapterCleared, ChapterReplaced,
+              ChapterAdded, ChapterDeleted, ChapterSwitched, SettingChanged]
+Subscriber = Callable[[List[Event]], None]
+
+class BookModel:
+    """``AppState`` with change notification.
+
+    Changes to the book go through the methods below. They update ``state``
+    in place (the same dict storage and the save writer use) and record an
+    event. Events reach subscribers in batches: the first event after a
+    delivery calls ``schedule(self.flush)``, so with the window's render
+    scheduler every subscriber gets one list of events per tick. Without
+    ``schedule``, call ``flush()`` to deliver.
+
+    Chapters changed in place elsewhere (imports, merges) are reported with
+    ``chapter_changed()``. ``stats`` counts the items per chapter and is
+    updated with each change, before its event is delivered.
+    """
+
+    def __init__(self, state: AppState, new_items: Callable[[], Any],
+                 schedule: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.state = state
+        self.new_items = new_items
+        self._schedule = schedule
+        self._subscribers: List[Subscriber] = []
+        self._pending: List[Event] = []
+        self._index = ItemIndex()
+        self.stats = BookStats.attach(state)
+
+    @property
+    def current_chapter(self) -> str:
+        return self.state.get('current_chapter', 'General')
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Call ``subscriber`` with each batch of events, after earlier subscribers"""
+        self._subscribers.append(subscriber)
+
+    def find(self, chapter: str, item_id: int) -> Optional[int]:
+        """Position of the item with ``item_id`` in ``chapter``, or None; O(1)"""
+        return self._index.find(self.state.get('todos', {}), chapter, item_id)
+
+    # Items
+    def add_item(self, chapter: str, item: TodoItem) -> int:
+        """Append ``item`` to ``chapter`` (created if missing); returns its position"""
+        todos = self.state.setdefault('todos', {})
+        if chapter not in todos:
+            todos[chapter] = self.new_items()
+        items = todos[chapter]
+        items.append(item)
+        index = len(items) - 1
+        self._index.appended(chapter, item.id, index)
+        self.stats.added(chapter, item.completed)
+        self._emit(ItemAdded(chapter, index, item))
+        return index
+
+    def remove_last(self, chapter: str) -> int:
+        """Remove the last item of ``chapter``; returns the position it had"""
+        items = self.state['todos'][chapter]
+        item = items.pop()
+        self._index.popped(chapter, item.id)
+        self.stats.removed(chapter, item.completed)
+        self._emit(ItemRemoved(chapter, len(items), item.id, item.completed))
+        return len(items)
+
+    def toggle_item(self, chapter: str, index: int) -> bool:
+        """Flip the completion of one item; returns the new value"""
+        item = self.state['todos'][chapter][index]
+        item.completed = not item.completed
+        self.stats.toggled(chapter, item.completed)
+        self._emit(ItemToggled(chapter, index, item.id, item.completed))
+        return item.completed
+
+    # Chapters
+    def clear_chapter(self, chapter: str) -> None:
+        self.state['todos'][chapter] = self.new_items()
+        self._index.forget(chapter)
+        self.stats.cleared(chapter)
+        self._emit(ChapterCleared(chapter))
+
+    def replace_chapter(self, chapter: str, items: Any) -> None:
+        """Swap in a whole item container, e.g. one kept for undo"""
+        self.state['todos'][chapter] = items
+        self._index.forget(chapter)
+        self.stats.recount(chapter, items)
+        self._emit(ChapterReplaced(chapter))
+
+    def chapter_changed(self, chapter: str) -> None:
+        """Report a chapter whose items were changed outside the model"""
+        self._index.forget(chapter)
+        todos = self.state.get('todos', {})
+        if chapter in todos:
+            self.stats.recount(chapter, todos[chapter])
+            self._emit(ChapterReplaced(chapter))
+        else:
+            self.stats.deleted(chapter)
+            self._emit(ChapterDeleted(chapter))
+
+    def add_chapter(self, chapter: str) -> None:
+        if chapter not in self.state['chapters']:
+            self.state['chapters'].append(chapter)
+        self.state['todos'][chapter] = self.new_items()
+        self._index.forget(chapter)
+        self.stats.cleared(chapter)
+        self._emit(ChapterAdded(chapter))
+
+    def delete_chapter(self, chapter: str) -> None:
+        """Remove a chapter; if it was the current one, switch to the first left"""
+        if chapter in self.state['chapters']:
+            self.state['chapters'].remove(chapter)
+        self.state['todos'].pop(chapter, None)
+        self._index.forget(chapter)
+        self.stats.deleted(chapter)
+        self._emit(ChapterDeleted(chapter))
+        if chapter == self.current_chapter and self.state['chapters']:
+            self.switch_chapter(self.state['chapters'][0])
+
+    def switch_chapter(self, chapter: str) -> None:
+        previous = self.current_chapter
+        if chapter == previous:
+            return
+        self.state['current_chapter'] = chapter
+        self._emit(ChapterSwitched(previous, chapter))
+
+    # Settings
+    def update_settings(self, values: Dict[str, Any]) -> List[str]:
+        """Store ``values`` in the settings; returns the keys that changed"""
+        settings = self.state.setdefault('settings', {})
+        changed = []
+        for key, value in values.items():
+            if settings.get(key) != value:
+                settings[key] = value
+                changed.append(key)
+                self._emit(SettingChanged(key, value))
+        return changed
+
+    # Delivery
+    def _emit(self, event: Event) -> None:
+        self._pending.append(event)
+        if len(self._pending) == 1 and self._schedule is not None:
+            self._schedule(self.flush)
+
+    def flush(self) -> None:
+        """Deliver pending events now, e.g. before reading a derived view"""
+        # Subscribers may change the model; their events go out in this flush
+        while self._pending:
+            batch, self._pending = self._pending, []
+            for subscriber in list(self._subscribers):
+                subscriber(batch)
+
+def chapter_of(event: Event) -> Optional[str]:
+    """The chapter an event is about, None for settings"""
+    return getattr(event, 'chapter', None)
+
+def last_settings(batch: Iterable[Event]) -> Dict[str, Any]:
+    """Final value of each setting changed in ``batch``"""
+    return {event.key: event.value for event in batch if isinstance(event, SettingChanged)}
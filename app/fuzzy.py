@@ -0,0 +1,204 @@
+import heapq
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Characters after which a match counts as the start of a word
+_BOUNDARY = set(' \t_-/\\.:,;()[]{}"\'')
+
+SCORE_MATCH = 16
+BONUS_CONSECUTIVE = 12
+BONUS_BOUNDARY = 10
+BONUS_FIRST_CHAR = 8
+PENALTY_GAP = 2
+MAX_GAP_PENALTY = 12
+
+def fuzzy_score(query: str, text: str) -> Optional[int]:
+    """fzf-style score of ``query`` as a subsequence of ``text``, or None.
+
+    Both arguments are expected in lowercase. Matches are found greedily from
+    the left; consecutive characters and characters at word starts score
+    higher, gaps cost a little.
+    """
+    # A contiguous match is always at least as good as a scattered one
+    start = text.find(query)
+    if start >= 0:
+        score = SCORE_MATCH * len(query) + BONUS_CONSECUTIVE * (len(query) - 1)
+        if start == 0:
+            score += BONUS_FIRST_CHAR + BONUS_BOUNDARY
+        elif text[start - 1] in _BOUNDARY:
+            score += BONUS_BOUNDARY
+        return score
+
+    score = 0
+    prev = -1
+    for char in query:
+        pos = text.find(char, prev + 1)
+        if pos < 0:
+            return None
+        score += SCORE_MATCH
+        if pos == prev + 1 and prev >= 0:
+            score += BONUS_CONSECUTIVE
+        elif prev >= 0:
+            score -= min(MAX_GAP_PENALTY, PENALTY_GAP * (pos - prev - 1))
+        if pos == 0:
+            score += BONUS_FIRST_CHAR + BONUS_BOUNDARY
+        elif text[pos - 1] in _BOUNDARY:
+            score += BONUS_BOUNDARY
+        prev = pos
+    return score
+
+def is_subsequence(query: str, text: str) -> bool:
+    pos = -1
+    for char in query:
+        pos = text.find(char, pos + 1)
+        if pos < 0:
+            return False
+    return True
+
+class _MatchStream:
+    """Lazily materialized list of entry ids matching one query.
+
+    A stream pulls candidates from the stream of the query's longest cached
+    prefix, so each keystroke only filters what the previous one already
+    matched, and only as far as the budget allows. ``matched`` holds the
+    matches among the entries that existed when the stream was created,
+    newest first; entries added later are checked as they come and kept in
+    ``fresh``. The best matches seen so far are kept in a bounded heap, so
+    each search only scores the matches found since the last one.
+    """
+
+    __slots__ = ('query', 'parent', 'base', 'matched', 'cursor', 'exhausted', 'fresh',
+                 'heap', 'heap_limit', 'scored', 'fresh_scored')
+
+    def __init__(self, query: str, parent: Optional['_MatchStream'], base: int, texts: List[str]):
+        self.query = query
+        self.parent = parent
+        self.base = base       # entries before this id are matched from the parent
+        self.matched: List[int] = []
+        self.cursor = 0        # next parent position (root: next id counted from base) to examine
+        self.exhausted = False
+        self.fresh: List[int] = []
+        self.heap: List[Tuple[int, int]] = []
+        self.heap_limit = 0
+        self.scored = 0
+        self.fresh_scored = 0
+        if parent is not None:
+            # Entries the parent saw added after it was created come first
+            self.matched = [entry for entry in reversed(parent.fresh)
+                            if is_subsequence(query, texts[entry])]
+
+    def added(self, texts: List[str], start: int) -> None:
+        """Check entries from ``start`` on, just added to the matcher"""
+        query = self.query
+        self.fresh.extend(entry for entry in range(start, len(texts))
+                          if is_subsequence(query, texts[entry]))
+
+    def fill(self, matcher: 'FuzzyMatcher', wanted: int, budget: int) -> int:
+        """Extend ``matched`` to ``wanted`` ids, examining at most ``budget``
+        candidates. Returns the unused budget."""
+        texts = matcher.texts
+        while len(self.matched) < wanted and not self.exhausted and budget > 0:
+            if self.parent is None:
+                # Root stream: every entry, newest first; nothing to check
+                count = min(self.base - self.cursor, wanted - len(self.matched), budget)
+                top = self.base - 1 - self.cursor
+                self.matched.extend(range(top, top - count, -1))
+                self.cursor += count
+                budget -= count
+                self.exhausted = self.cursor >= self.base
+                continue
+
+            parent = self.parent
+            if self.cursor >= len(parent.matched):
+                if parent.exhausted:
+                    self.exhausted = True
+                    break
+                budget = parent.fill(matcher, self.cursor + wanted - len(self.matched), budget)
+                if self.cursor >= len(parent.matched):
+                    if parent.exhausted:
+                        self.exhausted = True
+                    break
+
+            end = len(parent.matched)
+            query = self.query
+            while self.cursor < end and len(self.matched) < wanted and budget > 0:
+                entry = parent.matched[self.cursor]
+                self.cursor += 1
+                budget -= 1
+                if is_subsequence(query, texts[entry]):
+                    self.matched.append(entry)
+        return budget
+
+    def rank(self, texts: List[str], limit: int) -> List[Tuple[int, int]]:
+        """Best ``limit`` (score, id) pairs among the matches found so far"""
+        if self.heap_limit != limit:
+            self.heap, self.heap_limit, self.scored, self.fresh_scored = [], limit, 0, 0
+        heap, query = self.heap, self.query
+        for entries, done in ((self.matched, self.scored), (self.fresh, self.fresh_scored)):
+            for entry in entries[done:]:
+                # Newer entries (higher ids) win ties
+                key = (fuzzy_score(query, texts[entry]), entry)
+                if len(heap) < limit:
+                    heapq.heappush(heap, key)
+                elif key > heap[0]:
+                    heapq.heapreplace(heap, key)
+        self.scored, self.fresh_scored = len(self.matched), len(self.fresh)
+        return sorted(heap, reverse=True)
+
+class FuzzyMatcher:
+    """Incremental fuzzy matcher over a list of entries, newest first.
+
+    ``search`` scores every entry matching the query and returns the best
+    ``limit``. Per-query match streams are cached, so typing one more
+    character narrows the previous matches instead of rescanning every
+    entry, and the work per keystroke is capped by ``budget`` candidate
+    checks. ``search`` reports whether it finished so callers can continue
+    refining in idle time. Entries are stored oldest first, so adding one
+    is an append, and the cached streams check it rather than being dropped.
+    """
+
+    CACHE_SIZE = 64
+
+    def __init__(self, entries: Iterable[str] = ()):
+        self.entries: List[str] = []
+        self.texts: List[str] = []
+        self._streams: Dict[str, _MatchStream] = {}
+        self.extend(entries)
+
+    def extend(self, entries: Iterable[str]) -> None:
+        """Add entries, oldest first; they rank ahead of the existing ones on ties"""
+        start = len(self.entries)
+        for entry in entries:
+            self.entries.append(entry)
+            self.texts.append(entry.lower())
+        if len(self.entries) > start:
+            for stream in self._streams.values():
+                stream.added(self.texts, start)
+
+    def _stream(self, query: str) -> _MatchStream:
+        stream = self._streams.get(query)
+        if stream is not None:
+            return stream
+        parent = self._stream(query[:-1]) if query else None
+        stream = _MatchStream(query, parent, len(self.texts), self.texts)
+        if len(self._streams) >= self.CACHE_SIZE:
+            # Drop the oldest cached query that is not an ancestor of this one
+            for cached in self._streams:
+                if not query.startswith(cached):
+                    del self._streams[cached]
+                    break
+        self._streams[query] = stream
+        return stream
+
+    def search(self, query: str, limit: int = 20,
+               budget: int = 8000) -> Tuple[List[Tuple[int, str]], bool]:
+        """Return ``([(score, entry), ...], complete)`` for ``query``"""
+        query = query.lower()
+        if not query:
+            # Everything matches equally; the newest entries win
+            return [(0, entry) for entry in reversed(self.entries[-limit:])], True
+        stream = self._stream(query)
+        stream.fill(self, sys.maxsize, budget)
+        entries = self.entries
+        results = [(score, entries[entry]) for score, entry in stream.rank(self.texts, limit)]
+        return results, stream.exhausted
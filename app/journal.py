@@ -0,0 +1,323 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from . import durable, json_stream
+from .models import AppState, TodoItem
+from .storage import Storage
+from .store import ItemIndex
+
+class JournalStorage(Storage):
+    """Snapshot plus append-only change log.
+
+    Every mutation is written as one small JSON line to ``<data>.journal``
+    instead of rewriting the whole data file. Loading reads the snapshot and
+    replays the records newer than it. Once the journal grows past
+    ``compact_threshold`` bytes, ``wants_snapshot()`` asks the caller to
+    save the current state; that save is the new snapshot and the journal
+    starts over. The hooks never save by themselves: on the writer thread
+    the state they are passed holds only what their change needs.
+
+    Each record carries a sequence number and the snapshot stores the last
+    one it contains, so a crash between writing the snapshot and resetting
+    the journal never replays a change twice.
+
+    Appends are flushed to the OS at once but fsynced in groups: every
+    record written within ``sync_window`` seconds shares one fsync.
+    """
+
+    incremental = True
+    progressive_load = False
+    external_sync = False
+
+    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_data.json",
+                 data_dir: Optional[Path] = None, compact_threshold: int = 1024 * 1024,
+                 compact: bool = False, sync_window: float = durable.SYNC_WINDOW):
+        super().__init__(app_name, file_name, data_dir, compact=compact)
+        self.compact_threshold = compact_threshold
+        self._commit = durable.GroupCommit(sync_window)
+        self._journal_path = self._data_path.with_suffix('.journal')
+        self._journal = None
+        self._journal_size = 0
+        self._seq = 0
+        # Set once the journal passes compact_threshold or an append failed;
+        # cleared by the next save
+        self._snapshot_wanted = False
+
+    def load(self) -> AppState:
+        """Load the snapshot and replay newer journal records"""
+        state = super().load()
+        snapshot_seq = int(state.pop('journal_seq', 0) or 0)
+        self._seq = snapshot_seq
+        self._journal_size = 0
+
+        if self._journal_path.exists():
+            state = self._replay(state, snapshot_seq)
+        if self._ids_assigned:
+            # Toggles and removals are journaled by item ID, so the IDs just
+            # made up for items saved without them must reach the disk first
+            self._ids_assigned = False
+            self.save(state)
+        return state
+
+    def _replay(self, state: AppState, snapshot_seq: int) -> AppState:
+        """Apply the journal records newer than the snapshot to ``state``"""
+
+        good_size = 0
+        positions = ItemIndex()
+        try:
+            with open(self._journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash; everything after it is unusable
+                        break
+                    good_size += len(line)
+                    seq = record.get('seq', 0)
+                    if seq > snapshot_seq:
+                        self._apply(state, record, positions)
+                        self._seq = max(self._seq, seq)
+
+            if good_size < self._journal_path.stat().st_size:
+                with open(self._journal_path, 'r+b') as f:
+                    f.truncate(good_size)
+        except IOError as e:
+            print(f"Error replaying journal: {e}")
+
+        self._journal_size = good_size
+        # Replayed adds/clears may have put plain lists back
+        return self._pack_todos(state)
+
+    def save(self, state: AppState) -> None:
+        """Write a full snapshot and start a fresh journal"""
+        # The sequence number goes first so append_items() finds it without reading the rest
+        data = {'journal_seq': self._seq}
+        data.update(self._serialize_state(state))
+        try:
+            durable.write_json(self._data_path, data, 0 if self._damaged else durable.GENERATIONS,
+                               separators=(',', ':'))
+        except IOError as e:
+            print(f"Error saving data: {e}")
+            return
+        self._damaged = False
+        self._snapshot_wanted = False
+        self._reset_journal()
+
+    def close(self) -> None:
+        """Sync and close the journal file handle"""
+        if self._journal is not None:
+            self._commit.sync()
+            self._journal.close()
+            self._journal = None
+
+    def append_items(self, chapter: str, items: List[TodoItem]) -> None:
+        """Journal the items without loading the book.
+
+        Only the start of the snapshot and the end of the journal are read,
+        for the last sequence number. An ``add_chapter`` record goes first;
+        replay ignores it if the chapter exists. The journal is not compacted
+        here, the next save does that.
+        """
+        seq = self._last_seq()
+        records = [{'op': 'add_chapter', 'chapter': chapter}]
+        records += [{'op': 'add', 'chapter': chapter, 'item': item.to_dict()} for item in items]
+        lines = []
+        for record in records:
+            seq += 1
+            record['seq'] = seq
+            lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.close()
+        with open(self._journal_path, 'ab') as f:
+            f.write(''.join(lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._seq = seq
+
+    def _last_seq(self) -> int:
+        """Sequence number of the last record on disk; a torn last line is cut off"""
+        seq = 0
+        try:
+            with open(self._data_path, 'rb') as raw:
+                # Snapshots store it first; older ones at the end, which means reading them through
+                for key, _, value in json_stream.iter_object(durable.VerifyingReader(raw), nested=()):
+                    if key == 'journal_seq':
+                        seq = int(value or 0)
+                        break
+        except (ValueError, IOError):
+            pass
+        try:
+            with open(self._journal_path, 'r+b') as f:
+                end = start = f.seek(0, os.SEEK_END)
+                tail = b''
+                # Back up until the last complete line is known to start in the tail
+                while start > 0 and tail.count(b'\n') < 2:
+                    start = max(0, start - 64 * 1024)
+                    f.seek(start)
+                    tail = f.read(end - start)
+                good = tail.rfind(b'\n') + 1
+                if start + good < end:
+                    # Torn write from a crash; replay would stop before anything after it
+                    f.truncate(start + good)
+                lines = tail[:good].splitlines()
+                if lines:
+                    seq = max(seq, int(json.loads(lines[-1]).get('seq', 0)))
+        except FileNotFoundError:
+            pass
+        except (ValueError, AttributeError) as e:
+            print(f"Error reading journal: {e}")
+        return seq
+
+    def saved_current_chapter(self) -> str:
+        chapter = super().saved_current_chapter()
+        # Switching chapters is journaled as a settings record
+        try:
+            with open(self._journal_path, 'rb') as f:
+                for line in f:
+                    if b'"settings"' not in line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if record.get('op') == 'settings':
+                        chapter = record.get('current_chapter', chapter)
+        except IOError:
+            pass
+        return chapter
+
+    # Incremental hooks
+    def add_item(self, state: AppState, chapter: str, item: TodoItem) -> None:
+        self._append({'op': 'add', 'chapter': chapter, 'item': item.to_dict()})
+
+    def toggle_item(self, state: AppState, chapter: str, item_id: int, completed: bool) -> None:
+        # Record the resulting value rather than a flip so replay is idempotent
+        self._append({'op': 'toggle', 'chapter': chapter, 'id': item_id,
+                             'completed': completed})
+
+    def clear_chapter(self, state: AppState, chapter: str) -> None:
+        self._append({'op': 'clear', 'chapter': chapter})
+
+    def remove_item(self, state: AppState, chapter: str, item_id: int) -> None:
+        self._append({'op': 'remove', 'chapter': chapter, 'id': item_id})
+    
+    def remove_items(self, state: AppState, chapter: str, item_ids: Sequence[int]) -> None:
+        self._append({'op': 'remove_items', 'chapter': chapter, 'ids': list(item_ids)})
+
+    def replace_chapter(self, state: AppState, chapter: str) -> None:
+        self._append({'op': 'replace', 'chapter': chapter,
+                             'items': [item.to_dict() for item in state['todos'][chapter]]})
+    
+    def add_chapter(self, state: AppState, chapter: str) -> None:
+        self._append({'op': 'add_chapter', 'chapter': chapter})
+
+    def delete_chapter(self, state: AppState, chapter: str) -> None:
+        self._append({'op': 'delete_chapter', 'chapter': chapter})
+
+    def update_settings(self, state: AppState) -> None:
+        self._append({'op': 'settings',
+                             'current_chapter': state.get('current_chapter', 'General'),
+                             'settings': dict(state.get('settings', {}))})
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append one record; ask for a snapshot once the journal got too large"""
+        self._seq += 1
+        record['seq'] = self._seq
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            if self._journal is None:
+                self._journal = open(self._journal_path, 'ab')
+            self._journal.write(line)
+            self._journal.flush()
+            self._commit.written(self._journal)
+            self._journal_size += len(line)
+        except IOError as e:
+            print(f"Error writing journal: {e}")
+            # A snapshot taken after the change keeps it
+            self._snapshot_wanted = True
+            return
+        if self._journal_size >= self.compact_threshold:
+            self._snapshot_wanted = True
+
+    def wants_snapshot(self) -> bool:
+        return self._snapshot_wanted
+
+    def _reset_journal(self) -> None:
+        """Truncate the journal after a successful snapshot"""
+        # The snapshot holds every record; they need not reach the disk
+        self._commit.discard()
+        self.close()
+        try:
+            with open(self._journal_path, 'wb'):
+                pass
+        except IOError as e:
+            print(f"Error resetting journal: {e}")
+        self._journal_size = 0
+
+    @staticmethod
+    def _apply(state: AppState, record: Dict[str, Any], positions: ItemIndex) -> None:
+        """Apply a single journal record to the state.
+
+        Toggles and removals name their item by ID; ``positions`` finds it
+        and is kept up to date across the replay. Records written before IDs
+        existed carry the position instead.
+        """
+        op = record.get('op')
+        chapter = record.get('chapter')
+        todos = state.setdefault('todos', {})
+        chapters = state.setdefault('chapters', [])
+
+        if op == 'add':
+            items = todos.setdefault(chapter, [])
+            item = TodoItem.from_dict(record.get('item', {}))
+            items.append(item)
+            positions.appended(chapter, item.id, len(items) - 1)
+        elif op == 'toggle':
+            items = todos.get(chapter, [])
+            index = JournalStorage._position(todos, record, positions)
+            if index is not None:
+                items[index].completed = bool(record.get('completed'))
+        elif op == 'remove':
+            items = todos.get(chapter, [])
+            index = JournalStorage._position(todos, record, positions)
+            if index is None:
+                return
+            if index == len(items) - 1:
+                positions.popped(chapter, items.pop().id)
+            else:
+                del items[index]
+                positions.forget(chapter)
+        elif op == 'remove_items':
+            ids = set(record.get('ids', ()))
+            if chapter in todos:
+                todos[chapter] = [item for item in todos[chapter] if item.id not in ids]
+            positions.forget(chapter)
+        elif op == 'clear':
+            if chapter in todos:
+                todos[chapter] = []
+            positions.forget(chapter)
+        elif op == 'replace':
+            todos[chapter] = [TodoItem.from_dict(item) for item in record.get('items', [])]
+            positions.forget(chapter)
+        elif op == 'add_chapter':
+            if chapter not in chapters:
+                chapters.append(chapter)
+            todos.setdefault(chapter, [])
+        elif op == 'delete_chapter':
+            if chapter in chapters:
+                chapters.remove(chapter)
+            todos.pop(chapter, None)
+            positions.forget(chapter)
+        elif op == 'settings':
+            state['current_chapter'] = record.get('current_chapter', state.get('current_chapter'))
+            state['settings'] = record.get('settings', state.get('settings', {}))
+
+    @staticmethod
+    def _position(todos: Dict[str, Any], record: Dict[str, Any], positions: ItemIndex) -> Optional[int]:
+        """Position of the item a toggle or remove record names, None if it is gone"""
+        chapter = record.get('chapter')
+        if 'id' in record:
+            return positions.find(todos, chapter, record['id'])
+        index = record.get('index', -1)
+        return index if 0 <= index < len(todos.get(chapter, [])) else None
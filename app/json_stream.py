@@ -0,0 +1,149 @@
+"""Incremental decoding of the top-level JSON object of a state file.
+
+``iter_object`` reads the file in chunks and yields one top-level entry at a
+time. Entries listed in ``nested`` (``todos``) are opened one level further
+and yielded per member, so a chapter is decoded and handed over on its own
+and only one chapter's text is ever held in memory next to the decoded
+objects.
+"""
+import json
+import os
+import re
+from typing import Any, Collection, Iterator, Optional, TextIO, Tuple
+
+# Large enough that a typical chapter decodes without refills; a failed
+# decode of a cut-off value has to start over, so small chunks cost time
+CHUNK_SIZE = 1024 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+_NUMBER_END = re.compile(r'[\s,\]}]')
+
+class _Reader:
+    """Character buffer over a text file with JSON-aware helpers"""
+
+    def __init__(self, fp: TextIO, chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        # Size of the largest value decoded so far; values in a state file
+        # (chapters) tend to be alike, so read that much ahead before decoding
+        self.hint = 0
+
+    def _fill(self, at_least: int) -> bool:
+        """Read more text; returns False at end of file"""
+        if self.eof:
+            return False
+        if self.pos:
+            # Drop consumed text so the buffer only holds what is pending
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.fp.read(max(self.chunk_size, at_least))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at end of file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(0):
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value, reading as much as it needs"""
+        self.peek()
+        if len(self.buf) - self.pos < self.hint:
+            self._fill(self.hint)
+        if self.buf[self.pos:self.pos + 1] in ('-', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9'):
+            # A number may continue in the next chunk; read up to its end
+            while not _NUMBER_END.search(self.buf, self.pos) and self._fill(0):
+                pass
+        want = max(self.chunk_size, self.hint)
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Probably cut off at the end of the buffer; read more,
+                # doubling each time so huge values do not go quadratic
+                if not self._fill(want):
+                    raise
+                want *= 2
+                continue
+            self.hint = max(self.hint, end - self.pos)
+            self.pos = end
+            return value
+
+    def key(self) -> str:
+        key = self.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", self.buf, self.pos)
+        self.expect(':')
+        return key
+
+    def members(self) -> Iterator[str]:
+        """Iterate the keys of the object starting here; the caller must
+        consume each member's value before asking for the next key"""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            yield self.key()
+            separator = self.peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buf, self.pos - 1)
+
+NESTED = object()
+
+def iter_object(fp: TextIO, nested: Collection[str] = ('todos',),
+                chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, Optional[str], Any]]:
+    """Yield ``(key, None, value)`` for each top-level entry of the object
+    in ``fp``. For keys in ``nested`` whose value is an object,
+    ``(key, NESTED, None)`` is yielded first, then ``(key, member, value)``
+    for each of its members."""
+    try:
+        # Text never has more characters than the file has bytes; reading a
+        # small file must not allocate a full chunk
+        chunk_size = max(1, min(chunk_size, os.fstat(fp.fileno()).st_size + 1))
+    except (AttributeError, OSError, ValueError):
+        pass
+    reader = _Reader(fp, chunk_size)
+    for key in reader.members():
+        if key in nested and reader.peek() == '{':
+            yield key, NESTED, None
+            for member in reader.members():
+                yield key, member, reader.value()
+        else:
+            yield key, None, reader.value()
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buf, reader.pos)
+
+def load(fp: TextIO, nested: Collection[str] = ('todos',)) -> dict:
+    """Equivalent of ``json.load`` for a top-level object, decoding nested
+    members one at a time"""
+    data: dict = {}
+    for key, member, value in iter_object(fp, nested):
+        if member is NESTED:
+            data[key] = {}
+        elif member is not None:
+            data[key][member] = value
+        else:
+            data[key] = value
+    return data
@@ -0,0 +1,73 @@
+import os
+import time
+from pathlib import Path
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(fd: int) -> bool:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock(fd: int) -> None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+class LockTimeout(IOError):
+    """Another process held the lock for longer than the timeout"""
+
+class FileLock:
+    """Advisory exclusive lock on a sidecar file, across processes.
+
+    Every process that saves the same data file takes this lock around its
+    read-merge-write, so two saves never interleave. The lock file itself
+    stays in place; it carries no data. Not reentrant, and meant to be used
+    from one thread at a time (``Storage`` serializes its saves).
+    """
+
+    def __init__(self, path: Path, timeout: float = 10.0, poll: float = 0.02):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll = poll
+        self._fd = None
+
+    def acquire(self) -> None:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"Timed out waiting for {self.path.name}")
+            time.sleep(self.poll)
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            try:
+                _unlock(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
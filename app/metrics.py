@@ -0,0 +1,189 @@
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+# Latency buckets grow by a factor of two from 1 µs; bucket i holds samples
+# below 2**i microseconds, the last one everything from about 1 hour up
+_BUCKETS = 32
+
+class Histogram:
+    """Log2-bucketed latency histogram; recording a sample is O(1)"""
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        bucket = int(seconds * 1e6).bit_length()
+        self.counts[bucket if bucket < _BUCKETS else _BUCKETS - 1] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples, in seconds"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.mean * 1000, 3),
+            'min_ms': round(self.min * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.5) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            # Upper bound in µs -> samples, for the non-empty buckets only
+            'buckets_us': {str(1 << bucket): count for bucket, count in enumerate(self.counts) if count},
+        }
+
+class Metrics:
+    """In-memory timers and counters, enabled with ``--instrument``.
+
+    Nothing is measured unless a ``Metrics`` object exists: ``instrument()``
+    replaces methods on one instance with timed wrappers, so the classes
+    themselves and uninstrumented runs are untouched. Samples may come from
+    the writer thread as well as the Tk thread.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.timers: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.timers.get(name)
+            if histogram is None:
+                histogram = self.timers[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wrap ``func`` so each call is recorded under ``name``.
+
+        Generator functions are timed over all of their steps and recorded
+        once they are exhausted, so a progressive load counts as one load.
+        """
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                elapsed = 0.0
+                iterator = func(*args, **kwargs)
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        value = next(iterator)
+                    except StopIteration:
+                        self.record(name, elapsed + time.perf_counter() - start)
+                        return
+                    elapsed += time.perf_counter() - start
+                    yield value
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - start)
+        return wrapper
+
+    def instrument(self, obj: Any, methods: Iterable[str], prefix: str) -> None:
+        """Time the named methods of ``obj`` as ``<prefix>.<method>``"""
+        for method in methods:
+            setattr(obj, method, self.timed(f'{prefix}.{method}', getattr(obj, method)))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timers.clear()
+            self.counters.clear()
+            self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'started': self.started,
+                'duration_s': round(time.time() - self.started, 3),
+                'timers': {name: histogram.to_dict() for name, histogram in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+            }
+
+    def report(self) -> str:
+        """Plain-text table of every timer and counter"""
+        data = self.snapshot()
+        lines = [f"{'timer':28} {'count':>7} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+        for name, timer in data['timers'].items():
+            lines.append(f"{name:28} {timer['count']:7} {timer['mean_ms']:9.2f} "
+                         f"{timer['p95_ms']:9.2f} {timer['max_ms']:9.2f}")
+        for name, value in data['counters'].items():
+            lines.append(f"{name:28} {value:7}")
+        return '\n'.join(lines)
+
+    def dump(self, path: Path) -> None:
+        """Write a snapshot to ``path`` as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+class LagProbe:
+    """Measures Tk event-loop lag.
+
+    An ``after`` timer is scheduled every ``interval`` ms; how late it fires
+    is the time the loop was busy with something else, i.e. how long input
+    would have waited. Samples go to the ``tk.lag`` timer.
+    """
+
+    def __init__(self, root, metrics: Metrics, interval: int = 100):
+        self.root = root
+        self.metrics = metrics
+        self.interval = interval
+        self._job: Optional[str] = None
+        self._due = 0.0
+
+    def start(self) -> None:
+        if self._job is None:
+            self._schedule()
+
+    def stop(self) -> None:
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    def _schedule(self) -> None:
+        self._due = time.perf_counter() + self.interval / 1000
+        self._job = self.root.after(self.interval, self._fire)
+
+    def _fire(self) -> None:
+        self.metrics.record('tk.lag', max(0.0, time.perf_counter() - self._due))
+        self._schedule()
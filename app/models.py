@@ -1,5 +1,11 @@
-from dataclasses import dataclass, asdict
-from typing import Dict, List, TypedDict, Optional
+import random
+from typing import Any, Dict, List, TypedDict, Optional
+
+_ids = random.Random()
+
+def new_item_id() -> int:
+    """A fresh item ID: 53 random bits, so it survives any JSON reader unchanged"""
+    return _ids.getrandbits(53) or 1
 
 class Settings(TypedDict, total=False):
     """Application settings structure"""
@@ -7,16 +13,41 @@ class Settings(TypedDict, total=False):
     hotkey_enabled: bool
     mode: str  # 'todo' or 'clipboard'
 
-@dataclass
 class TodoItem:
-    """Represents a single todo item"""
+    """Represents a single todo item.
+
+    Written out rather than a dataclass: ``dataclasses`` and the
+    ``inspect`` it pulls in were most of the command line's import time.
+    """
+    __slots__ = ('text', 'completed', 'created_at', 'id')
     text: str
     completed: bool
     created_at: str  # ISO-like timestamp
+    id: int  # stable across saves and loads, unique within the book
+
+    def __init__(self, text: str, completed: bool, created_at: str, id: int = 0):
+        self.text = text
+        self.completed = completed
+        self.created_at = created_at
+        # New items, and items from files written before IDs existed
+        self.id = id or new_item_id()
+
+    __hash__ = None  # mutable, compared by value
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.text, self.completed, self.created_at, self.id) ==
+                (other.text, other.completed, other.created_at, other.id))
+
+    def __repr__(self) -> str:
+        return (f"TodoItem(text={self.text!r}, completed={self.completed!r}, "
+                f"created_at={self.created_at!r}, id={self.id!r})")
 
     def to_dict(self) -> dict:
         """Convert to dictionary for serialization"""
-        return asdict(self)
+        return {'text': self.text, 'completed': self.completed,
+                'created_at': self.created_at, 'id': self.id}
 
     @classmethod
     def from_dict(cls, data: dict) -> 'TodoItem':
@@ -24,7 +55,8 @@ class TodoItem:
         return cls(
             text=data.get('text', ''),
             completed=bool(data.get('completed', False)),
-            created_at=data.get('created_at', '')
+            created_at=data.get('created_at', ''),
+            id=data.get('id', 0)
         )
 
 class AppState(TypedDict, total=False):
@@ -33,3 +65,4 @@ class AppState(TypedDict, total=False):
     current_chapter: str
     todos: Dict[str, List[TodoItem]]
     settings: Settings
+    stats: Dict[str, Dict[str, Any]]  # per-chapter counters, see stats.BookStats
@@ -0,0 +1,373 @@
+import bisect
+import hashlib
+import heapq
+import json
+import re
+import shlex
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .events import (ChapterCleared, ChapterDeleted, ChapterReplaced, Event, ItemAdded,
+                     ItemRemoved, chapter_of)
+from .models import AppState, TodoItem
+from .store import item_ids
+
+_TOKEN_RE = re.compile(r'\w+')
+
+INDEX_VERSION = 3
+
+# Prefixes matching more tokens than this, in more items than
+# RARE_PREFIX_ITEMS or more tokens than MAX_PREFIX_TOKENS, are checked
+# against the item text instead of merging their postings. Many rare tokens
+# (the digits of ``#4999`` match 4999, 49990...) are still merged: their
+# postings are short.
+BROAD_PREFIX_TOKENS = 64
+RARE_PREFIX_ITEMS = 5000
+MAX_PREFIX_TOKENS = 1024
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+def parse_query(query: str) -> Tuple[List[str], Optional[str], Optional[bool]]:
+    """Split a search box query into terms and filters.
+
+    ``chapter:<name>`` limits results to one chapter (quote names with
+    spaces: ``chapter:"Chapter 3"``), ``is:done`` and ``is:open`` filter on
+    completion. Everything else is a search term.
+    """
+    terms: List[str] = []
+    chapter = None
+    completed = None
+    try:
+        words = shlex.split(query)
+    except ValueError:
+        # Unbalanced quote while the user is still typing
+        words = query.replace('"', ' ').split()
+    for word in words:
+        lowered = word.lower()
+        if lowered.startswith('chapter:') and len(word) > 8:
+            chapter = word[8:]
+        elif lowered in ('is:done', 'is:completed'):
+            completed = True
+        elif lowered in ('is:open', 'is:pending'):
+            completed = False
+        else:
+            terms.extend(tokenize(word))
+    return terms, chapter, completed
+
+class SearchIndex:
+    """Inverted index over every item in every chapter.
+
+    Postings map each token to the positions of the items containing it,
+    grouped by chapter, so results point straight into the live ``AppState``.
+    Completion is read from the state at query time, which means toggles never
+    touch the index, and clearing a chapter only visits that chapter's tokens.
+
+    Every query term is treated as a prefix, which gives search-as-you-type
+    for free: the sorted vocabulary is bisected to find all matching tokens.
+    """
+
+    def __init__(self, state: AppState):
+        self.state = state
+        # token -> chapter -> ascending item positions
+        self._postings: Dict[str, Dict[str, List[int]]] = {}
+        # token -> number of items containing it, used to pick the driving term
+        self._counts: Dict[str, int] = {}
+        self._chapter_tokens: Dict[str, Set[str]] = {}
+        self._chapter_sizes: Dict[str, int] = {}
+        # Sorted keys of _postings; None while bulk indexing, sorted afterwards
+        self._vocabulary: Optional[List[str]] = []
+
+    # Building
+    @classmethod
+    def build(cls, state: AppState) -> 'SearchIndex':
+        index = cls(state)
+        index._vocabulary = None
+        for chapter, items in state.get('todos', {}).items():
+            index._index_chapter(chapter, items)
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    @classmethod
+    def load_or_build(cls, state: AppState, path: Path) -> 'SearchIndex':
+        """Load a persisted index, re-indexing only chapters that changed"""
+        try:
+            index, fingerprints = cls._read(state, path)
+        except FileNotFoundError:
+            return cls.build(state)
+        except Exception as e:
+            print(f"Rebuilding search index: {e}")
+            return cls.build(state)
+
+        todos = state.get('todos', {})
+        for chapter in list(index._chapter_tokens):
+            if chapter not in todos:
+                index._drop_chapter(chapter)
+        for chapter, items in todos.items():
+            if fingerprints.get(chapter) != cls._fingerprint(items):
+                index._drop_chapter(chapter)
+                index._index_chapter(chapter, items)
+        index._vocabulary = sorted(index._postings)
+        return index
+
+    # File layout: one line of JSON (version, vocabulary, chapters and their
+    # fingerprints), then (token, chapter, count) triples and the positions
+    # they describe, both as native int32 arrays. The file is a cache, so
+    # one written on a machine of the other byte order is simply rebuilt.
+    @classmethod
+    def _read(cls, state: AppState, path: Path) -> Tuple['SearchIndex', Dict[str, str]]:
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            if (not isinstance(header, dict) or header.get('version') != INDEX_VERSION
+                    or header.get('byteorder') != sys.byteorder):
+                raise ValueError("index version mismatch")
+            entries = array('i')
+            entries.frombytes(f.read(12 * header['entries']))
+            positions = array('i')
+            positions.frombytes(f.read())
+
+        index = cls(state)
+        index._vocabulary = None
+        tokens, chapters = header['tokens'], header['chapters']
+        index._chapter_sizes = dict(zip(chapters, header['chapter_sizes']))
+        chapter_tokens = index._chapter_tokens = {chapter: set() for chapter in chapters}
+        postings, counts = index._postings, index._counts
+        offset = 0
+        for i in range(0, len(entries), 3):
+            token, chapter, count = tokens[entries[i]], chapters[entries[i + 1]], entries[i + 2]
+            by_chapter = postings.get(token)
+            if by_chapter is None:
+                by_chapter = postings[token] = {}
+                counts[token] = 0
+            by_chapter[chapter] = positions[offset:offset + count].tolist()
+            counts[token] += count
+            chapter_tokens[chapter].add(token)
+            offset += count
+        if offset != len(positions):
+            raise ValueError("index file is truncated")
+        return index, header['fingerprints']
+
+    def save(self, path: Path) -> None:
+        """Persist the index next to the data file"""
+        chapters = list(self._chapter_sizes)
+        numbers = {chapter: number for number, chapter in enumerate(chapters)}
+        tokens = sorted(self._postings)
+        entries = array('i')
+        positions = array('i')
+        for number, token in enumerate(tokens):
+            for chapter, chapter_positions in self._postings[token].items():
+                entries.extend((number, numbers[chapter], len(chapter_positions)))
+                positions.extend(chapter_positions)
+        header = {
+            'version': INDEX_VERSION,
+            'byteorder': sys.byteorder,
+            'tokens': tokens,
+            'chapters': chapters,
+            'chapter_sizes': [self._chapter_sizes[chapter] for chapter in chapters],
+            'fingerprints': {chapter: self._fingerprint(items)
+                             for chapter, items in self.state.get('todos', {}).items()},
+            'entries': len(entries) // 3,
+        }
+        tmp_path = Path(path).with_name(Path(path).name + '.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+                f.write(entries.tobytes())
+                f.write(positions.tobytes())
+            tmp_path.replace(path)
+        except IOError as e:
+            print(f"Error saving search index: {e}")
+
+    @staticmethod
+    def _fingerprint(items: List[TodoItem]) -> str:
+        """Hash of a chapter's item IDs in order; texts never change once added"""
+        ids = item_ids(items)
+        if not isinstance(ids, array):
+            ids = array('q', ids)
+        return f"{len(ids)}:{hashlib.blake2b(ids.tobytes(), digest_size=16).hexdigest()}"
+
+    def _index_chapter(self, chapter: str, items: List[TodoItem]) -> None:
+        for item in items:
+            self._add(chapter, item.text)
+
+    def _add(self, chapter: str, text: str) -> None:
+        position = self._chapter_sizes.get(chapter, 0)
+        self._chapter_sizes[chapter] = position + 1
+        chapter_tokens = self._chapter_tokens.setdefault(chapter, set())
+        for token in set(tokenize(text)):
+            by_chapter = self._postings.get(token)
+            if by_chapter is None:
+                by_chapter = self._postings[token] = {}
+                self._counts[token] = 0
+                if self._vocabulary is not None:
+                    bisect.insort(self._vocabulary, token)
+            by_chapter.setdefault(chapter, []).append(position)
+            self._counts[token] += 1
+            chapter_tokens.add(token)
+
+    def _drop_chapter(self, chapter: str) -> None:
+        self._chapter_sizes.pop(chapter, None)
+        for token in self._chapter_tokens.pop(chapter, ()):
+            by_chapter = self._postings[token]
+            self._counts[token] -= len(by_chapter.pop(chapter))
+            if not by_chapter:
+                del self._postings[token]
+                del self._counts[token]
+                if self._vocabulary is not None:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, token)]
+
+    def apply(self, batch: List[Event]) -> None:
+        """Follow a batch of model events (see ``events.BookModel``).
+
+        Additions are indexed as they come; a chapter with a removal or a
+        replacement is indexed afresh once, from its state after the batch.
+        """
+        stale: Dict[str, None] = {}
+        for event in batch:
+            chapter = chapter_of(event)
+            if chapter is None or chapter in stale:
+                continue
+            if isinstance(event, ItemAdded):
+                self._add(chapter, event.item.text)
+            elif isinstance(event, (ItemRemoved, ChapterReplaced)):
+                stale[chapter] = None
+            elif isinstance(event, (ChapterCleared, ChapterDeleted)):
+                self._drop_chapter(chapter)
+        todos = self.state.get('todos', {})
+        for chapter in stale:
+            self._drop_chapter(chapter)
+            if chapter in todos:
+                self._index_chapter(chapter, todos[chapter])
+
+    # Querying
+    def _prefix_tokens(self, prefix: str) -> Tuple[List[str], bool]:
+        """Vocabulary tokens starting with ``prefix``, and whether it is broad.
+
+        Stops as soon as the prefix turns out broad; callers then only need
+        to know that, not every token it matches.
+        """
+        vocabulary = self._vocabulary
+        counts = self._counts
+        tokens = []
+        items = 0
+        for i in range(bisect.bisect_left(vocabulary, prefix), len(vocabulary)):
+            token = vocabulary[i]
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+            items += counts[token]
+            if len(tokens) > BROAD_PREFIX_TOKENS and (items > RARE_PREFIX_ITEMS or
+                                                       len(tokens) > MAX_PREFIX_TOKENS):
+                return tokens, True
+        return tokens, False
+
+    def search(self, query: str, chapter: Optional[str] = None,
+               completed: Optional[bool] = None, limit: int = 100,
+               scan_limit: Optional[int] = None) -> Tuple[List[Tuple[str, int]], bool]:
+        """Return up to ``limit`` (chapter, index) pairs matching every term,
+        and whether the search is complete.
+
+        Results are ordered by chapter, then by position. Filters passed as
+        arguments override those given in the query. When every term is a
+        very short prefix the items are scanned directly; with ``scan_limit``
+        the scan stops after that many items and the search is reported as
+        incomplete, so a caller can repeat it with a larger limit.
+        """
+        terms, query_chapter, query_completed = parse_query(query)
+        chapter = chapter if chapter is not None else query_chapter
+        completed = completed if completed is not None else query_completed
+        if not terms:
+            return [], True
+
+        # Walk the postings of the most selective term; the other terms are
+        # checked against per-chapter position sets, or against the item text
+        # when they are too broad for that to pay off
+        per_term = []
+        for term in dict.fromkeys(terms):
+            tokens, is_broad = self._prefix_tokens(term)
+            if not tokens:
+                return [], True
+            per_term.append((term, tokens, is_broad))
+        per_term.sort(key=lambda entry: sys.maxsize if entry[2] else self._estimate(entry[1]))
+        (driver_term, driver, driver_broad), others = per_term[0], per_term[1:]
+        narrow = [tokens for _, tokens, is_broad in others if not is_broad]
+        broad = [term for term, _, is_broad in others if is_broad]
+        if driver_broad:
+            # Every term matches a large share of the book; a plain scan finds
+            # ``limit`` hits faster than merging thousands of posting lists
+            driver = None
+            broad.insert(0, driver_term)
+
+        candidates: Dict[str, List[List[int]]] = {}
+        for token in driver or ():
+            by_chapter = self._postings[token]
+            if chapter is not None:
+                if chapter in by_chapter:
+                    candidates.setdefault(chapter, []).append(by_chapter[chapter])
+            else:
+                for name, positions in by_chapter.items():
+                    candidates.setdefault(name, []).append(positions)
+
+        todos = self.state.get('todos', {})
+        chapters = [chapter] if chapter is not None else list(todos)
+        results: List[Tuple[str, int]] = []
+        budget = scan_limit if scan_limit is not None else sys.maxsize
+        for name in chapters:
+            items = todos.get(name, [])
+            if driver is None:
+                if budget <= 0 and items:
+                    return results, False
+                positions_iter = iter(range(min(len(items), budget)))
+                budget -= len(items)
+            elif name in candidates:
+                positions_iter = self._iter_union(candidates[name])
+            else:
+                continue
+            other_sets = [self._positions(tokens, name) for tokens in narrow]
+            if any(not positions for positions in other_sets):
+                continue
+            if other_sets:
+                # Intersect in one go rather than test each position in Python
+                positions_iter = iter(sorted(set(positions_iter).intersection(*other_sets)))
+            for position in positions_iter:
+                if position >= len(items):
+                    continue
+                item = items[position]
+                if completed is not None and item.completed != completed:
+                    continue
+                if broad:
+                    tokens = tokenize(item.text)
+                    if not all(any(t.startswith(term) for t in tokens) for term in broad):
+                        continue
+                results.append((name, position))
+                if len(results) >= limit:
+                    return results, True
+            if budget < 0:
+                return results, False
+        return results, True
+
+    def _estimate(self, tokens: List[str]) -> int:
+        """Rough number of items matching any of ``tokens``"""
+        return sum(self._counts[token] for token in tokens)
+
+    def _positions(self, tokens: List[str], chapter: str) -> Set[int]:
+        """Positions in ``chapter`` of items containing any of ``tokens``"""
+        positions: Set[int] = set()
+        for token in tokens:
+            positions.update(self._postings[token].get(chapter, ()))
+        return positions
+
+    @staticmethod
+    def _iter_union(lists: List[List[int]]) -> Iterator[int]:
+        """Positions from several sorted posting lists, in order, without duplicates"""
+        if len(lists) == 1:
+            yield from lists[0]
+            return
+        last = -1
+        for position in heapq.merge(*lists):
+            if position != last:
+                yield position
+                last = position
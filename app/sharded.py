@@ -0,0 +1,323 @@
+import hashlib
+import json
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+from .models import AppState, TodoItem
+from .stats import BookStats
+from .storage import Storage, atomic_write_json
+
+if TYPE_CHECKING:
+    # Imported by prefetch(); concurrent.futures brings in logging, about
+    # 10 ms the command line does not need
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+MANIFEST_VERSION = 1
+
+class ShardedTodos(MutableMapping):
+    """``state['todos']`` for the sharded backend.
+
+    Chapters are known from the manifest, but a chapter's items are only read
+    from its shard when first accessed (or when a prefetch finishes). Reads
+    of a chapter that is being prefetched wait for that load instead of
+    reading the shard twice.
+    """
+
+    def __init__(self, storage: 'ShardedStorage', chapters: List[str]):
+        self._storage = storage
+        self._lock = threading.RLock()
+        # None means "still on disk"
+        self._items: Dict[str, Optional[list]] = {name: None for name in chapters}
+        self._pending: Dict[str, 'Future'] = {}
+
+    def is_loaded(self, chapter: str) -> bool:
+        return self._items.get(chapter) is not None
+
+    def loaded(self) -> Dict[str, list]:
+        """Chapters whose items are in memory"""
+        with self._lock:
+            return {name: items for name, items in self._items.items() if items is not None}
+
+    def prefetch(self, executor: 'ThreadPoolExecutor') -> List['Future']:
+        """Start loading every chapter that is still on disk"""
+        with self._lock:
+            for name, items in self._items.items():
+                if items is None and name not in self._pending:
+                    future = executor.submit(self._storage._load_shard, name)
+                    self._pending[name] = future
+                    future.add_done_callback(lambda f, name=name: self._resolve(name, f))
+            return list(self._pending.values())
+
+    def _resolve(self, name: str, future: 'Future') -> list:
+        with self._lock:
+            if self._pending.get(name) is future:
+                del self._pending[name]
+                # A chapter replaced or deleted meanwhile keeps the newer value
+                if name in self._items and self._items[name] is None:
+                    self._items[name] = future.result()
+            return self._items.get(name)
+
+    def snapshot(self) -> 'ShardedTodos':
+        """Copy of the loaded chapters; chapters still on disk stay unloaded"""
+        copy = ShardedTodos(self._storage, [])
+        with self._lock:
+            copy._items = {name: items.copy() if items is not None else None
+                           for name, items in self._items.items()}
+        return copy
+
+    # Mapping protocol
+    def __getitem__(self, chapter: str) -> list:
+        with self._lock:
+            if chapter not in self._items:
+                raise KeyError(chapter)
+            items = self._items[chapter]
+            if items is not None:
+                return items
+            future = self._pending.get(chapter)
+        if future is not None:
+            future.result()
+            return self._resolve(chapter, future)
+        items = self._storage._load_shard(chapter)
+        with self._lock:
+            if self._items.get(chapter) is None:
+                self._items[chapter] = items
+            return self._items[chapter]
+
+    def __setitem__(self, chapter: str, items: list) -> None:
+        with self._lock:
+            self._items[chapter] = items
+
+    def __delitem__(self, chapter: str) -> None:
+        with self._lock:
+            del self._items[chapter]
+
+    def __contains__(self, chapter: object) -> bool:
+        return chapter in self._items
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._items))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __repr__(self) -> str:
+        loaded = sum(1 for items in self._items.values() if items is not None)
+        return f"ShardedTodos({len(self._items)} chapters, {loaded} loaded)"
+
+class ShardedStorage(Storage):
+    """Manifest plus one JSON file per chapter.
+
+    ``todo_manifest.json`` holds the chapter list, current chapter,
+    settings and item counts; each chapter's items live in ``todo_shards/<hash>.json``.
+    ``load()`` reads the manifest and the current chapter only; the other
+    chapters are read on first access or by ``prefetch()`` on a small thread
+    pool. Saves rewrite the manifest and only the shards whose content
+    changed since they were last read or written.
+
+    If no manifest exists yet, ``todo_data.json`` from the JSON backend is
+    split into shards on first load.
+    """
+
+    incremental = True
+    hooks_write_chapter = True
+    progressive_load = False
+    external_sync = False
+    prefetch_workers = 4
+
+    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_manifest.json",
+                 data_dir: Optional[Path] = None, compact: bool = False):
+        super().__init__(app_name, file_name, data_dir, compact=compact)
+        self._shard_dir = self._data_path.with_name('todo_shards')
+        # chapter -> fingerprint of the shard content on disk
+        self._written: Dict[str, int] = {}
+        self._written_lock = threading.Lock()
+        self._executor: Optional['ThreadPoolExecutor'] = None
+
+    def _shard_path(self, chapter: str) -> Path:
+        digest = hashlib.sha1(chapter.encode('utf-8')).hexdigest()[:16]
+        return self._shard_dir / f'{digest}.json'
+
+    @staticmethod
+    def _fingerprint(items) -> int:
+        return hash(tuple((item.text, item.completed, item.created_at, item.id) for item in items))
+
+    def load(self) -> AppState:
+        """Read the manifest and the current chapter's shard"""
+        state = self._load_manifest()
+        todos = state['todos']
+        if state['current_chapter'] in todos:
+            todos[state['current_chapter']]
+        return state
+
+    def _load_manifest(self) -> AppState:
+        """State with every chapter still on disk"""
+        if not self._data_path.exists():
+            legacy_path = self._data_path.with_name('todo_data.json')
+            if legacy_path.exists():
+                return self._migrate(legacy_path)
+            return self._get_default_state()
+
+        try:
+            with open(self._data_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading data: {e}")
+            return self._get_default_state()
+
+        state = self._get_default_state()
+        state['chapters'] = manifest.get('chapters') or state['chapters']
+        state['current_chapter'] = manifest.get('current_chapter', state['current_chapter'])
+        state['settings'].update(manifest.get('settings', {}))
+        if isinstance(manifest.get('stats'), dict):
+            state['stats'] = manifest['stats']
+        state['todos'] = ShardedTodos(self, state['chapters'])
+        return state
+
+    def _migrate(self, legacy_path: Path) -> AppState:
+        """Split a JSON backend data file into shards"""
+        source = Storage(app_name=self.app_name, file_name=legacy_path.name,
+                         data_dir=legacy_path.parent, compact=self.compact)
+        state = source.load()
+        for chapter in state['todos']:
+            if chapter not in state['chapters']:
+                state['chapters'].append(chapter)
+        self.save(state)
+        return state
+
+    def _load_shard(self, chapter: str) -> list:
+        """Read one chapter's items; a missing shard is an empty chapter"""
+        path = self._shard_path(chapter)
+        data: List[Dict[str, Any]] = []
+        if path.exists():
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f).get('items', [])
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading chapter {chapter}: {e}")
+        items = self.new_items(TodoItem.from_dict(item) for item in data)
+        with self._written_lock:
+            self._written[chapter] = self._fingerprint(items)
+        return items
+
+    def prefetch(self, state: AppState) -> List['Future']:
+        """Load every chapter still on disk on the thread pool"""
+        todos = state.get('todos')
+        if not isinstance(todos, ShardedTodos):
+            return []
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers,
+                                                thread_name_prefix='shard-loader')
+        return todos.prefetch(self._executor)
+
+    def save(self, state: AppState) -> None:
+        """Write the manifest and every loaded shard that changed"""
+        todos = state.get('todos', {})
+        loaded = todos.loaded() if isinstance(todos, ShardedTodos) else dict(todos)
+        for chapter, items in loaded.items():
+            self._write_shard(chapter, items)
+        self._write_manifest(state)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def append_items(self, chapter: str, items: List[TodoItem]) -> None:
+        """Rewrite the chapter's shard and the manifest; other chapters are not read"""
+        state = self._load_manifest()
+        todos = state['todos']
+        if chapter not in todos:
+            state['chapters'].append(chapter)
+            todos[chapter] = self.new_items()
+        target = todos[chapter]
+        target.extend(items)
+        BookStats(state.setdefault('stats', {})).recount(chapter, target)
+        self._write_shard(chapter, target)
+        self._write_manifest(state)
+
+    def saved_current_chapter(self) -> str:
+        try:
+            with open(self._data_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('current_chapter') or 'General'
+        except (json.JSONDecodeError, IOError):
+            return self._get_default_state()['current_chapter']
+
+    # Incremental hooks
+    def add_item(self, state: AppState, chapter: str, item: TodoItem) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+
+    def toggle_item(self, state: AppState, chapter: str, item_id: int, completed: bool) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+
+    def clear_chapter(self, state: AppState, chapter: str) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+
+    def remove_item(self, state: AppState, chapter: str, item_id: int) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+    
+    def remove_items(self, state: AppState, chapter: str, item_ids: Sequence[int]) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+
+    def replace_chapter(self, state: AppState, chapter: str) -> None:
+        self._write_shard(chapter, state['todos'][chapter])
+    
+    def add_chapter(self, state: AppState, chapter: str) -> None:
+        self._write_shard(chapter, state['todos'].get(chapter, []))
+        self._write_manifest(state)
+
+    def delete_chapter(self, state: AppState, chapter: str) -> None:
+        self._write_manifest(state)
+
+    def update_settings(self, state: AppState) -> None:
+        self._write_manifest(state)
+
+    def _write_shard(self, chapter: str, items) -> None:
+        """Rewrite a chapter's shard unless it already holds ``items``"""
+        fingerprint = self._fingerprint(items)
+        with self._written_lock:
+            if self._written.get(chapter) == fingerprint:
+                return
+        try:
+            self._shard_dir.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self._shard_path(chapter),
+                              {'chapter': chapter, 'items': [item.to_dict() for item in items]},
+                              separators=(',', ':'))
+        except IOError as e:
+            print(f"Error saving chapter {chapter}: {e}")
+            return
+        with self._written_lock:
+            self._written[chapter] = fingerprint
+
+    def _write_manifest(self, state: AppState) -> None:
+        """Write chapters, current chapter, settings and counts; drop orphaned shards"""
+        chapters = list(state.get('chapters', []))
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'chapters': chapters,
+            'current_chapter': state.get('current_chapter', 'General'),
+            'settings': dict(state.get('settings', {})),
+            'stats': dict(state.get('stats', {})),
+        }
+        try:
+            atomic_write_json(self._data_path, manifest, indent=2)
+        except IOError as e:
+            print(f"Error saving data: {e}")
+            return
+
+        keep = {self._shard_path(name).name for name in chapters}
+        with self._written_lock:
+            for name in [name for name in self._written if name not in chapters]:
+                del self._written[name]
+        try:
+            orphans = [path for path in self._shard_dir.glob('*.json') if path.name not in keep]
+        except OSError:
+            orphans = []
+        for path in orphans:
+            try:
+                path.unlink()
+            except OSError as e:
+                print(f"Error removing {path.name}: {e}")
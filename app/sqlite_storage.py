@@ -0,0 +1,331 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .models import AppState, TodoItem
+from .storage import Storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chapters (
+    name     TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id         INTEGER PRIMARY KEY,
+    chapter    TEXT NOT NULL,
+    position   INTEGER NOT NULL,
+    text       TEXT NOT NULL,
+    completed  INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    item_id    INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_chapter ON items (chapter, position);
+CREATE INDEX IF NOT EXISTS idx_items_completed ON items (chapter, completed);
+CREATE INDEX IF NOT EXISTS idx_items_created_at ON items (created_at);
+"""
+
+class SQLiteStorage(Storage):
+    """Stores chapters and items as rows in a SQLite database.
+
+    Rows keep their item's position in the chapter list for ordering and
+    are found by item ID, so a toggle is a single UPDATE and an add a
+    single INSERT. ``save()`` still accepts a whole state for callers that
+    only know the full-save contract.
+    """
+
+    incremental = True
+    progressive_load = False
+    external_sync = False
+
+    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_data.db",
+                 data_dir: Optional[Path] = None, compact: bool = False):
+        super().__init__(app_name, file_name, data_dir, compact=compact)
+        # The connection is shared with the background writer thread; the lock
+        # keeps statements from different threads from interleaving
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self._data_path), check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._add_item_ids()
+
+    def load(self) -> AppState:
+        """Load application state from the database"""
+        state = self._get_default_state()
+        try:
+            with self._lock:
+                meta = dict(self._conn.execute('SELECT key, value FROM meta'))
+                chapters = [name for (name,) in self._conn.execute(
+                    'SELECT name FROM chapters ORDER BY position')]
+                rows = self._conn.execute(
+                    'SELECT chapter, text, completed, created_at, item_id FROM items '
+                    'ORDER BY chapter, position')
+                todos: Dict[str, List[TodoItem]] = {name: [] for name in chapters}
+                for chapter, text, completed, created_at, item_id in rows:
+                    todos.setdefault(chapter, []).append(
+                        TodoItem(text=text, completed=bool(completed), created_at=created_at,
+                                 id=item_id))
+        except sqlite3.Error as e:
+            print(f"Error loading data: {e}")
+            return state
+
+        if not chapters and not meta:
+            return state
+
+        state['chapters'] = chapters or state['chapters']
+        state['todos'] = todos or state['todos']
+        if 'current_chapter' in meta:
+            state['current_chapter'] = meta['current_chapter']
+        if 'settings' in meta:
+            state['settings'].update(json.loads(meta['settings']))
+        if 'stats' in meta:
+            state['stats'] = json.loads(meta['stats'])
+        return self._pack_todos(state)
+
+    def save(self, state: AppState) -> None:
+        """Replace the whole database content with ``state``"""
+        try:
+            with self._lock, self._conn:
+                self._write_state(state)
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    def _write_state(self, state: AppState) -> None:
+        self._conn.execute('DELETE FROM items')
+        self._conn.execute('DELETE FROM chapters')
+        self._write_chapters(state.get('chapters', []))
+        for chapter, items in state.get('todos', {}).items():
+            self._insert_items(chapter, 0, items)
+        self._write_meta(state)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # Incremental hooks
+    def add_item(self, state: AppState, chapter: str, item: TodoItem) -> None:
+        self._execute_write(
+            'INSERT INTO items (chapter, position, text, completed, created_at, item_id) '
+            'VALUES (?, (SELECT COUNT(*) FROM items WHERE chapter = ?), ?, ?, ?, ?)',
+            (chapter, chapter, item.text, int(item.completed), item.created_at, item.id))
+
+    def append_items(self, chapter: str, items: List[TodoItem]) -> None:
+        """Insert the items' rows in one transaction; no other rows are read"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute('INSERT OR IGNORE INTO chapters (name, position) '
+                                   'VALUES (?, (SELECT COUNT(*) FROM chapters))', (chapter,))
+                (start,) = self._conn.execute('SELECT COUNT(*) FROM items WHERE chapter = ?',
+                                              (chapter,)).fetchone()
+                self._insert_items(chapter, start, items)
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    def saved_current_chapter(self) -> str:
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT value FROM meta WHERE key = 'current_chapter'").fetchone()
+        except sqlite3.Error as e:
+            print(f"Error loading data: {e}")
+            row = None
+        return row[0] if row else self._get_default_state()['current_chapter']
+
+    def toggle_item(self, state: AppState, chapter: str, item_id: int, completed: bool) -> None:
+        self._execute_write(
+            'UPDATE items SET completed = ? WHERE chapter = ? AND item_id = ?',
+            (int(completed), chapter, item_id))
+
+    def clear_chapter(self, state: AppState, chapter: str) -> None:
+        self._execute_write('DELETE FROM items WHERE chapter = ?', (chapter,))
+
+    def remove_item(self, state: AppState, chapter: str, item_id: int) -> None:
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute('SELECT position FROM items WHERE chapter = ? AND item_id = ?',
+                                         (chapter, item_id)).fetchone()
+                if row is None:
+                    return
+                (index,) = row
+                self._conn.execute('DELETE FROM items WHERE chapter = ? AND position = ?',
+                                   (chapter, index))
+                # Close the gap in two steps so the unique (chapter, position)
+                # index never sees two rows at the same position
+                self._conn.execute('UPDATE items SET position = -position '
+                                   'WHERE chapter = ? AND position > ?', (chapter, index))
+                self._conn.execute('UPDATE items SET position = -position - 1 '
+                                   'WHERE chapter = ? AND position < 0', (chapter,))
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+    
+    def remove_items(self, state: AppState, chapter: str, item_ids: Sequence[int]) -> None:
+        ids = set(item_ids)
+        try:
+            with self._lock, self._conn:
+                rows = self._conn.execute('SELECT id, item_id FROM items WHERE chapter = ? '
+                                          'ORDER BY position', (chapter,)).fetchall()
+                self._conn.executemany('DELETE FROM items WHERE id = ?',
+                                       ((row_id,) for row_id, item_id in rows if item_id in ids))
+                # Renumber the rest densely, again in two steps past the unique index
+                kept = [row_id for row_id, item_id in rows if item_id not in ids]
+                self._conn.executemany('UPDATE items SET position = ? WHERE id = ?',
+                                       ((-1 - position, row_id) for position, row_id in enumerate(kept)))
+                self._conn.execute('UPDATE items SET position = -position - 1 '
+                                   'WHERE chapter = ? AND position < 0', (chapter,))
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    def replace_chapter(self, state: AppState, chapter: str) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM items WHERE chapter = ?', (chapter,))
+                self._insert_items(chapter, 0, state['todos'][chapter])
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+    
+    def add_chapter(self, state: AppState, chapter: str) -> None:
+        self._execute_write(
+            'INSERT OR IGNORE INTO chapters (name, position) '
+            'VALUES (?, (SELECT COUNT(*) FROM chapters))', (chapter,))
+
+    def delete_chapter(self, state: AppState, chapter: str) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute('DELETE FROM items WHERE chapter = ?', (chapter,))
+                # Rewrite the (small) chapter table to keep positions dense
+                self._conn.execute('DELETE FROM chapters')
+                self._write_chapters(state.get('chapters', []))
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    def update_settings(self, state: AppState) -> None:
+        try:
+            with self._lock, self._conn:
+                self._write_meta(state)
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    # Helpers
+    def _add_item_ids(self) -> None:
+        """Give databases created before item IDs existed an item_id column"""
+        try:
+            with self._lock, self._conn:
+                columns = {row[1] for row in self._conn.execute('PRAGMA table_info(items)')}
+                if 'item_id' not in columns:
+                    self._conn.execute('ALTER TABLE items ADD COLUMN item_id INTEGER NOT NULL DEFAULT 0')
+                    # Row ids are unique and already stable
+                    self._conn.execute('UPDATE items SET item_id = id')
+                # Toggles and removals find their row by item ID
+                self._conn.execute('CREATE INDEX IF NOT EXISTS idx_items_item_id ON items (chapter, item_id)')
+        except sqlite3.Error as e:
+            print(f"Error upgrading database: {e}")
+
+    def _execute_write(self, sql: str, params: Iterable[Any]) -> None:
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+
+    def _write_chapters(self, chapters: List[str]) -> None:
+        self._conn.executemany(
+            'INSERT OR IGNORE INTO chapters (name, position) VALUES (?, ?)',
+            ((name, position) for position, name in enumerate(chapters)))
+
+    def _insert_items(self, chapter: str, start: int, items: Iterable[TodoItem]) -> None:
+        self._conn.executemany(
+            'INSERT INTO items (chapter, position, text, completed, created_at, item_id) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            ((chapter, start + i, item.text, int(item.completed), item.created_at, item.id)
+             for i, item in enumerate(items)))
+
+    def _write_meta(self, state: AppState) -> None:
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+            [('current_chapter', state.get('current_chapter', 'General')),
+             ('settings', json.dumps(state.get('settings', {}))),
+             ('stats', json.dumps(dict(state.get('stats', {}))))])
+
+    def import_json(self, *paths: Path) -> int:
+        """One-shot import of existing JSON data files into the database.
+
+        Accepts both the packaged app's ``todo_data.json`` and the legacy
+        ``todo_book_data.json`` (same layout). Chapters from later files are
+        appended to those already present. Returns the number of imported
+        items.
+
+        Safe to run again, e.g. after a crash or on a second start before
+        the JSON file was moved away: each file's SHA-1 is recorded in the
+        meta table in the same transaction as its items, so a file already
+        imported is skipped, and items whose ID a chapter already holds are
+        not added twice.
+        """
+        import hashlib
+        from .store import item_ids
+
+        state = self.load()
+        with self._lock:
+            done = {key for (key,) in self._conn.execute("SELECT key FROM meta WHERE key LIKE 'import:%'")}
+        imported = 0
+        records = []
+        for path in paths:
+            path = Path(path)
+            if not path.exists():
+                continue
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                key = 'import:' + hashlib.sha1(raw).hexdigest()
+                if key in done:
+                    continue
+                data = self._deserialize_state(json.loads(raw.decode('utf-8')))
+            except (ValueError, IOError) as e:
+                print(f"Error importing {path}: {e}")
+                continue
+
+            before = imported
+            for chapter in data.get('chapters', []):
+                if chapter not in state['chapters']:
+                    state['chapters'].append(chapter)
+            for chapter, items in data['todos'].items():
+                if chapter not in state['chapters']:
+                    state['chapters'].append(chapter)
+                target = state['todos'].setdefault(chapter, [])
+                have = set(item_ids(target))
+                fresh = [item for item in items if item.id not in have]
+                target.extend(fresh)
+                imported += len(fresh)
+            state['current_chapter'] = data.get('current_chapter', state['current_chapter'])
+            state['settings'].update(data.get('settings', {}))
+            done.add(key)
+            records.append((key, json.dumps({'path': str(path), 'items': imported - before})))
+
+        if not records:
+            return 0
+        try:
+            with self._lock, self._conn:
+                self._write_state(state)
+                self._conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', records)
+        except sqlite3.Error as e:
+            print(f"Error saving data: {e}")
+            return 0
+        return imported
+
+def import_legacy_files(storage: SQLiteStorage) -> int:
+    """Import the JSON files of both apps from the default data directory"""
+    json_storage = Storage(app_name=storage.app_name, data_dir=storage.data_dir)
+    data_dir = json_storage._data_path.parent
+    return storage.import_json(data_dir / 'todo_data.json', data_dir / 'todo_book_data.json')
+
+if __name__ == '__main__':
+    import sys
+    target = SQLiteStorage()
+    sources = sys.argv[1:]
+    count = target.import_json(*sources) if sources else import_legacy_files(target)
+    print(f"Imported {count} items into {target._data_path}")
+    target.close()
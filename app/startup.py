@@ -0,0 +1,41 @@
+import sys
+import time
+from typing import List, Optional, Tuple
+
+# Imported before tkinter and the UI, so this is as close to process start as
+# the app can measure without help from the interpreter
+PROCESS_START = time.perf_counter()
+
+class StartupProfile:
+    """Timestamps of the startup phases, relative to ``start``.
+
+    Enabled with ``--startup-profile``. Marks are recorded as the app starts
+    and the report is printed once the window is interactive.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = PROCESS_START if start is None else start
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, name: str) -> float:
+        """Record that ``name`` finished now; returns seconds since start"""
+        elapsed = time.perf_counter() - self.start
+        self.marks.append((name, elapsed))
+        return elapsed
+
+    def get(self, name: str) -> Optional[float]:
+        for mark, elapsed in self.marks:
+            if mark == name:
+                return elapsed
+        return None
+
+    def report(self) -> str:
+        lines = ["Startup profile:"]
+        previous = 0.0
+        for name, elapsed in self.marks:
+            lines.append(f"  {name:20} {elapsed * 1000:8.1f} ms  (+{(elapsed - previous) * 1000:.1f} ms)")
+            previous = elapsed
+        return '\n'.join(lines)
+
+    def print_report(self, file=None) -> None:
+        print(self.report(), file=file or sys.stderr, flush=True)
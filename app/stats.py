@@ -0,0 +1,140 @@
+import datetime
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from .models import AppState
+from .store import ChapterStore
+
+# Persisted form of one chapter's counters, kept in ``state['stats']``:
+# {'total': int, 'completed': int, 'modified': ISO timestamp}
+StatsEntry = Dict[str, Any]
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+def count_completed(items: Iterable) -> int:
+    """Completed items in a chapter container; ChapterStores count their flag bits"""
+    if isinstance(items, ChapterStore):
+        return items.completed_count()
+    return sum(1 for item in items if item.completed)
+
+class ChapterStats(NamedTuple):
+    """Counters of one chapter, or of the whole book. A NamedTuple, so the
+    sharded backend's ``add`` command does not import dataclasses"""
+    total: int = 0
+    completed: int = 0
+    modified: str = ''
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.completed
+
+    def describe(self) -> str:
+        """``3/10 done`` for status bars and the chapter sidebar"""
+        return f"{self.completed}/{self.total} done"
+
+class BookStats:
+    """Item counts per chapter and across the book, kept up to date in O(1).
+
+    Callers report each change (``added``, ``toggled``, ...) instead of the
+    counts being recomputed from the items. ``entries`` is the persisted
+    form (``state['stats']`` in the packaged app); an entry is replaced on
+    every change, never edited, so a shallow copy is a consistent snapshot
+    for the writer thread.
+
+    Persisted counts are only trusted for chapters still on disk. A chapter
+    in memory is counted once when the stats are attached or verified,
+    since backends that write single changes do not rewrite the stats.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, StatsEntry]] = None):
+        self.entries: Dict[str, StatsEntry] = entries if entries is not None else {}
+        self.total = sum(entry.get('total', 0) for entry in self.entries.values())
+        self.completed = sum(entry.get('completed', 0) for entry in self.entries.values())
+        self.modified = max((entry.get('modified', '') for entry in self.entries.values()), default='')
+        # Chapters whose counts came from disk and were not checked yet
+        self._unverified = set(self.entries)
+
+    @classmethod
+    def attach(cls, state: AppState) -> 'BookStats':
+        """Stats kept in ``state['stats']``, counting the chapters already loaded"""
+        saved = state.get('stats')
+        entries: Dict[str, StatsEntry] = {}
+        if isinstance(saved, dict):
+            known = set(state.get('chapters', [])) | set(state.get('todos', {}))
+            entries = {chapter: {'total': int(entry.get('total', 0)),
+                                 'completed': int(entry.get('completed', 0)),
+                                 'modified': str(entry.get('modified', ''))}
+                       for chapter, entry in saved.items()
+                       if chapter in known and isinstance(entry, dict)}
+        state['stats'] = entries
+        stats = cls(entries)
+        stats.verify(state.get('todos', {}))
+        return stats
+
+    def verify(self, todos) -> None:
+        """Count every loaded chapter whose counts are unverified or missing"""
+        loaded = todos.loaded() if hasattr(todos, 'loaded') else todos
+        for chapter, items in loaded.items():
+            if chapter in self._unverified or chapter not in self.entries:
+                entry = self.entries.get(chapter, {})
+                self._set(chapter, len(items), count_completed(items),
+                          entry.get('modified') or _last_created(items))
+                self._unverified.discard(chapter)
+
+    @property
+    def verified(self) -> bool:
+        return not self._unverified
+
+    # Reading
+    def chapter(self, chapter: str) -> ChapterStats:
+        entry = self.entries.get(chapter)
+        if entry is None:
+            return ChapterStats()
+        return ChapterStats(entry['total'], entry['completed'], entry['modified'])
+
+    @property
+    def book(self) -> ChapterStats:
+        return ChapterStats(self.total, self.completed, self.modified)
+
+    # Changes
+    def added(self, chapter: str, completed: bool = False) -> None:
+        entry = self.entries.get(chapter)
+        total, done = (entry['total'], entry['completed']) if entry else (0, 0)
+        self._set(chapter, total + 1, done + completed)
+
+    def removed(self, chapter: str, completed: bool = False) -> None:
+        entry = self.entries[chapter]
+        self._set(chapter, entry['total'] - 1, entry['completed'] - completed)
+
+    def toggled(self, chapter: str, completed: bool) -> None:
+        entry = self.entries[chapter]
+        self._set(chapter, entry['total'], entry['completed'] + (1 if completed else -1))
+
+    def cleared(self, chapter: str) -> None:
+        """Counts of a chapter that is now empty, cleared or new"""
+        self._set(chapter, 0, 0)
+
+    def recount(self, chapter: str, items) -> None:
+        """Count a chapter whose items were replaced wholesale; O(items)"""
+        self._set(chapter, len(items), count_completed(items))
+
+    def deleted(self, chapter: str) -> None:
+        entry = self.entries.pop(chapter, None)
+        if entry is not None:
+            self.total -= entry['total']
+            self.completed -= entry['completed']
+        self.modified = _now()
+
+    def _set(self, chapter: str, total: int, completed: int, modified: Optional[str] = None) -> None:
+        old = self.entries.get(chapter)
+        if old is not None:
+            self.total -= old['total']
+            self.completed -= old['completed']
+        modified = modified or _now()
+        self.entries[chapter] = {'total': total, 'completed': completed, 'modified': modified}
+        self.total += total
+        self.completed += completed
+        self.modified = max(self.modified, modified)
+
+def _last_created(items) -> str:
+    return items[-1].created_at if len(items) else ''
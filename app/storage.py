@@ -1,19 +1,112 @@
 import json
 import os
+import threading
+from array import array
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence,
+                    Set, Tuple, Union)
+from . import durable, json_stream
+from .locking import FileLock
 from .models import AppState, TodoItem, Settings
 
+if TYPE_CHECKING:
+    from .store import ChapterStore
+
+# app.store (compact chapters, item ID columns) is imported where it is
+# used: the command line's ``add`` never needs it.
+
+# Top-level keys that track saves across processes; they live in the data
+# file but never in the AppState. Every save bumps the generation, and each
+# chapter's version is the generation that last changed it.
+SYNC_KEYS = ('generation', 'chapter_versions')
+
+# (inode, mtime in ns, size) of the data file, None if it does not exist
+FileStamp = Optional[Tuple[int, int, int]]
+
+# A chapter as of the version we last read or wrote: its item IDs and one
+# completion byte per item, about nine bytes an item
+ChapterBase = Tuple[Sequence[int], bytes]
+
+def chapter_base(items) -> ChapterBase:
+    from .store import completion_flags, item_ids
+    
+    return array('q', item_ids(items)), completion_flags(items)
+
+def atomic_write_json(path: Path, data: Any, **dump_kwargs) -> None:
+    """Write JSON to a temp file next to ``path``, fsync it and rename it into place"""
+    durable.write_json(path, data, generations=0, checksum=False, **dump_kwargs)
+
 class Storage:
     """Handles saving and loading application state"""
     
-    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_data.json"):
+    # Whether the incremental hooks below persist just the change. The JSON
+    # backend has no cheaper path than rewriting the file, so its hooks fall
+    # back to a full save; journaled/database backends override them.
+    incremental = False
+    
+    # Whether every incremental hook writes the changed chapter's whole item
+    # list from the state it is given, rather than just the change
+    hooks_write_chapter = False
+    
+    # Whether load_progressive() can hand out the state before the whole
+    # file is read. Backends that replay or assemble state after reading
+    # the main file turn this off.
+    progressive_load = True
+    
+    # Whether saves by other processes using the same data file are noticed
+    # and merged chapter by chapter (merge_from_disk() and save()). Backends
+    # with their own multi-file layout turn this off.
+    external_sync = True
+    
+    def __init__(self, app_name: str = "ScribbleThoughts", file_name: str = "todo_data.json",
+                 data_dir: Optional[Path] = None, compact: bool = False):
         self.app_name = app_name
         self.file_name = file_name
+        self.data_dir = Path(data_dir) if data_dir is not None else None
+        # Keep chapter items in columnar ChapterStores instead of TodoItem lists
+        self.compact = compact
         self._data_path = self._get_data_path()
+        # Saves take the file lock so another process never writes in
+        # between our read of its changes and our write
+        self._file_lock = FileLock(self._data_path.with_name(self._data_path.name + '.lock'))
+        self._save_lock = threading.Lock()
+        # What the file held when we last read or wrote it, and the chapters
+        # changed here since; guarded by _sync_lock (Tk and writer threads)
+        self._sync_lock = threading.Lock()
+        self._disk_stamp: FileStamp = None
+        self._generation = 0
+        self._versions: Dict[str, int] = {}
+        # Each chapter's content at the version in _versions, the common
+        # ancestor when a chapter changed both here and in the file
+        self._base: Dict[str, ChapterBase] = {}
+        self._dirty: Set[str] = set()
+        # Set when the data file was damaged and load fell back to a kept
+        # version: (that version's path, chapters replaced after the first yield)
+        self._recovery: Optional[Tuple[Path, List[str]]] = None
+        # The data file failed to load; the next save must not keep it as a
+        # previous version in place of a good one
+        self._damaged = False
+        # Items added by append_items() wait in the inbox until a save writes
+        # them into the data file. IDs of those already put into a state, so
+        # each is added once even if the user removes it before that save.
+        self._inbox_path = self._data_path.with_name(self._data_path.name + '.inbox')
+        self._inbox_stamp: FileStamp = None
+        self._inbox_folded: Set[int] = set()
+        # Set when items were read without IDs (files written before IDs
+        # existed) and were given new ones, which only a save makes stick
+        self._ids_assigned = False
+    
+    @property
+    def data_path(self) -> Path:
+        """Path of the main data file; side files (journal, index) live next to it"""
+        return self._data_path
         
     def _get_data_path(self) -> Path:
         """Get the path to the data file"""
+        if self.data_dir is not None:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            return self.data_dir / self.file_name
+            
         if os.name == 'nt':  # Windows
             base_dir = Path(os.getenv('APPDATA', Path.home() / 'AppData' / 'Roaming'))
         else:  # macOS/Linux
@@ -25,25 +118,546 @@ class Storage:
     
     def load(self) -> AppState:
         """Load application state from disk"""
+        state = None
+        for state in self.load_progressive():
+            pass
+        return state
+    
+    def load_progressive(self) -> Iterator[AppState]:
+        """Load state chapter by chapter, yielding the same state object as it fills.
+        
+        The first yield comes once the settings and the current chapter are in,
+        which is enough to show the window; later yields follow each further
+        chapter. The last yielded state is complete. Only one chapter's JSON is
+        decoded at a time, so peak memory is bounded by the largest chapter
+        rather than the whole file.
+        """
+        state = self._get_default_state()
         if not self._data_path.exists():
-            return self._get_default_state()
+            # A crash between keeping the old version and the rename
+            state = self._recover(state, ready=False)
+            self._load_inbox(state)
+            yield self._pack_todos(state)
+            return
             
+        stamp = self._stamp()
+        sync: Dict[str, Any] = {}
+        seen = set()
+        chapters = set()
+        ready = False
         try:
-            with open(self._data_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return self._deserialize_state(data)
-        except (json.JSONDecodeError, IOError) as e:
+            with open(self._data_path, 'rb') as raw:
+                f = durable.VerifyingReader(raw)
+                for key, chapter, value in json_stream.iter_object(f):
+                    if chapter is json_stream.NESTED:
+                        state[key] = {}
+                        continue
+                    if chapter is None and key in SYNC_KEYS:
+                        sync[key] = value
+                    elif chapter is None:
+                        state[key] = value
+                        seen.add(key)
+                    else:
+                        state[key][chapter] = self._decode_items(value)
+                        chapters.add(chapter)
+                        if ready:
+                            yield state
+                    if (not ready and 'settings' in seen and 'current_chapter' in seen
+                            and state['current_chapter'] in chapters):
+                        ready = True
+                        yield state
+                f.verify()
+        except (ValueError, IOError) as e:
             print(f"Error loading data: {e}")
-            return self._get_default_state()
+            self._damaged = True
+            state = self._recover(state, ready)
+            sync = {}
+        self._remember_disk(stamp, sync, state.get('todos', {}))
+        self._load_inbox(state)
+        yield self._pack_todos(state)
+    
+    def _recover(self, state: AppState, ready: bool) -> AppState:
+        """State from the newest kept version of the data file that is intact.
+        
+        Before the first yield the recovered state replaces ``state``; after
+        it, the caller already holds ``state``, so its chapters are replaced
+        in place and listed in the recovery record (see pop_recovery()). With
+        no usable version the default state is returned, or ``state`` as far
+        as it was read.
+        """
+        for path in durable.generation_paths(self._data_path)[1:]:
+            if not path.exists():
+                continue
+            try:
+                recovered = self._read_version(path)
+            except (ValueError, IOError) as e:
+                print(f"Error loading {path.name}: {e}")
+                continue
+            print(f"Recovered data from {path.name}")
+            if not ready:
+                self._recovery = (path, [])
+                return recovered
+            todos = state['todos']
+            touched = [chapter for chapter in todos if chapter not in recovered['todos']]
+            for chapter in touched:
+                del todos[chapter]
+            for chapter, items in recovered['todos'].items():
+                todos[chapter] = items
+                touched.append(chapter)
+            state['chapters'][:] = recovered['chapters']
+            if state.get('current_chapter') not in todos:
+                state['current_chapter'] = recovered['current_chapter']
+            self._recovery = (path, touched)
+            return state
+        return state if ready else self._get_default_state()
+    
+    def _read_version(self, path: Path) -> AppState:
+        """Read and verify a kept version of the data file; raises ValueError or IOError"""
+        return self._deserialize_state(durable.load_json(path))
+    
+    def pop_recovery(self) -> Optional[Tuple[Path, List[str]]]:
+        """Whether the last load fell back to a kept version; reported once.
+        
+        Returns the version's path and the chapters replaced after the
+        window was shown, or None.
+        """
+        recovery, self._recovery = self._recovery, None
+        return recovery
     
     def save(self, state: AppState) -> None:
-        """Save application state to disk"""
+        """Save application state to disk.
+        
+        Under the file lock, chapters another process saved since we last
+        looked are folded into what is written (see merge_from_disk()), so
+        its changes survive our save.
+        """
         try:
-            with open(self._data_path, 'w', encoding='utf-8') as f:
-                json.dump(self._serialize_state(state), f, indent=2, ensure_ascii=False)
+            with self._save_lock, self._file_lock:
+                self._save_merged(state)
         except IOError as e:
             print(f"Error saving data: {e}")
     
+    def _write(self, state: AppState, sync: Dict[str, Any]) -> None:
+        """Write ``state`` plus the sync keys to the data file"""
+        data = self._serialize_state(state)
+        todos = data.pop('todos')
+        data.update(sync)
+        data['todos'] = todos
+        # A damaged file is not worth keeping; the kept versions stay as they are
+        durable.write_json(self._data_path, data, 0 if self._damaged else durable.GENERATIONS, indent=2)
+        self._damaged = False
+    
+    def _read_disk(self, select: Callable[[Dict[str, int]], Set[str]]
+                   ) -> Tuple[FileStamp, int, Dict[str, int], Dict[str, Any]]:
+        """Read the sync keys of the data file and the chapters ``select`` picks.
+        
+        ``select`` gets the chapter versions and returns the chapters to
+        decode; the rest are skipped over. Returns the file stamp, the
+        generation, every chapter's version and the selected chapters.
+        Raises ValueError or IOError if the file cannot be read.
+        """
+        stamp = self._stamp()
+        generation, saved, wanted = 0, None, None
+        names: List[str] = []
+        chapters: Dict[str, Any] = {}
+        with open(self._data_path, 'r', encoding='utf-8') as f:
+            for key, chapter, value in json_stream.iter_object(f):
+                if chapter is None:
+                    if key == 'generation':
+                        generation = value
+                    elif key == 'chapter_versions' and isinstance(value, dict):
+                        saved = value
+                elif key != 'todos':
+                    continue
+                elif chapter is json_stream.NESTED:
+                    # Files written before versions existed: decode everything
+                    wanted = select(saved) if saved is not None else None
+                else:
+                    names.append(chapter)
+                    if wanted is None or chapter in wanted or chapter not in saved:
+                        chapters[chapter] = self._decode_items(value)
+        versions = {name: (saved or {}).get(name, 0) for name in names}
+        selected = select(versions)
+        chapters = {name: items for name, items in chapters.items() if name in selected}
+        return stamp, int(generation or 0), versions, chapters
+    
+    # Cross-process sync
+    def _stamp(self, path: Optional[Path] = None) -> FileStamp:
+        try:
+            st = os.stat(path or self._data_path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    def _remember_disk(self, stamp: FileStamp, sync: Dict[str, Any], todos: Dict[str, Any]) -> None:
+        """Record the sync keys of the file just loaded"""
+        saved = sync.get('chapter_versions')
+        if not isinstance(saved, dict):
+            saved = {}
+        base = {chapter: chapter_base(items) for chapter, items in todos.items()} if self.external_sync else {}
+        with self._sync_lock:
+            self._disk_stamp = stamp
+            self._generation = int(sync.get('generation') or 0)
+            self._versions = {chapter: saved.get(chapter, 0) for chapter in todos}
+            self._base = base
+    
+    def changed_on_disk(self) -> bool:
+        """Whether the data file was replaced or items were appended since we
+        last looked; two stat calls"""
+        return self.external_sync and (self._stamp() != self._disk_stamp
+                                       or self._stamp(self._inbox_path) != self._inbox_stamp)
+    
+    def mark_changed(self, chapter: str) -> None:
+        """Note a local change to ``chapter``.
+        
+        Call it after requesting the save that includes the change: a save
+        forgets the marks made before it started, so a mark must not come
+        before the snapshot it belongs to.
+        """
+        with self._sync_lock:
+            self._dirty.add(chapter)
+    
+    def merge_from_disk(self, state: AppState) -> Tuple[List[str], List[str]]:
+        """Fold chapters another process saved into ``state``.
+        
+        Only chapters whose version in the file differs from the one we last
+        saw are decoded. A chapter not changed here is replaced by the file's
+        copy; one changed on both sides is merged item by item against the
+        version both started from (see _merge_items()). Items appended to
+        the inbox are added as well.
+        Returns the chapters touched and, of those, the ones merged with
+        local changes or given inbox items, which still need saving. Does
+        nothing while a save is running; the next check picks it up.
+        """
+        if not self.external_sync or not self._save_lock.acquire(blocking=False):
+            return [], []
+        try:
+            touched: List[str] = []
+            merged: List[str] = []
+            if self._stamp() != self._disk_stamp:
+                try:
+                    with self._sync_lock:
+                        known = dict(self._versions)
+                        base = dict(self._base)
+                        dirty = set(self._dirty)
+                    stamp, generation, versions, theirs = self._read_disk(
+                        lambda versions: self._changed_chapters(known, versions))
+                    # Taken before the chapters are handed to the state and changed there
+                    their_base = {chapter: chapter_base(items) for chapter, items in theirs.items()}
+                    touched = self._apply_disk_changes(state, known, base, dirty, versions, theirs)
+                    merged = [chapter for chapter in touched if chapter in dirty]
+                    with self._sync_lock:
+                        self._disk_stamp = stamp
+                        self._generation = max(self._generation, generation)
+                        self._versions = dict(versions)
+                        base.update(their_base)
+                        self._base = {chapter: base[chapter] for chapter in versions if chapter in base}
+                except (ValueError, IOError) as e:
+                    print(f"Error reading changes from disk: {e}")
+                    # Not retried until the file changes again
+                    self._disk_stamp = self._stamp()
+            for chapter in self._fold_inbox(state):
+                if chapter not in touched:
+                    touched.append(chapter)
+                if chapter not in merged:
+                    merged.append(chapter)
+            return touched, merged
+        finally:
+            self._save_lock.release()
+    
+    def saved_current_chapter(self) -> str:
+        """The current chapter as last saved, reading no more of the file than that"""
+        try:
+            with open(self._data_path, 'rb') as raw:
+                for key, _, value in json_stream.iter_object(durable.VerifyingReader(raw), nested=()):
+                    if key == 'current_chapter' and isinstance(value, str):
+                        return value
+        except (ValueError, IOError):
+            pass
+        return self._get_default_state()['current_chapter']
+    
+    # Inbox
+    def append_items(self, chapter: str, items: List[TodoItem]) -> None:
+        """Add items to the end of ``chapter``, creating it if needed, while
+        reading and writing as little of the book as the backend allows.
+        
+        The book is one file here, so the items are appended to an inbox
+        file next to it instead (one JSON line each, under the file lock).
+        Loads and merge_from_disk() add them to the state, and the next save
+        writes them into the data file and removes the inbox.
+        """
+        lines = ''.join(json.dumps({'chapter': chapter, 'item': item.to_dict()}, ensure_ascii=False,
+                                   separators=(',', ':')) + '\n'
+                        for item in items)
+        with self._file_lock:
+            with open(self._inbox_path, 'ab') as f:
+                f.write(lines.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def _read_inbox(self) -> List[Tuple[str, TodoItem]]:
+        """The inbox's entries in order; a torn last line is left for later"""
+        entries = []
+        try:
+            with open(self._inbox_path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        entries.append((str(record['chapter']), TodoItem.from_dict(record['item'])))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except FileNotFoundError:
+            pass
+        except IOError as e:
+            print(f"Error reading inbox: {e}")
+        return entries
+    
+    def _fold_inbox(self, state: AppState) -> List[str]:
+        """Add inbox items not added before to ``state``; returns their chapters.
+        
+        Chapters are replaced with new containers rather than extended, so a
+        snapshot sharing them with the live state is not changed.
+        """
+        if not self.external_sync:
+            # Backends with their own layout append in place (append_items())
+            return []
+        from .store import item_ids
+        
+        stamp = self._stamp(self._inbox_path)
+        if stamp is None or stamp == self._inbox_stamp:
+            self._inbox_stamp = stamp
+            return []
+        entries = self._read_inbox()
+        self._inbox_stamp = stamp
+        added: Dict[str, List[TodoItem]] = {}
+        for chapter, item in entries:
+            if item.id not in self._inbox_folded:
+                self._inbox_folded.add(item.id)
+                added.setdefault(chapter, []).append(item)
+        todos, chapters = state.setdefault('todos', {}), state.setdefault('chapters', [])
+        for chapter, items in added.items():
+            existing = todos.get(chapter, [])
+            have = set(item_ids(existing))
+            todos[chapter] = self.new_items(list(existing) + [item for item in items if item.id not in have])
+            if chapter not in chapters:
+                chapters.append(chapter)
+        return list(added)
+    
+    def _load_inbox(self, state: AppState) -> None:
+        """Add the inbox to a freshly loaded state; the next save writes it"""
+        chapters = self._fold_inbox(state)
+        with self._sync_lock:
+            self._dirty.update(chapters)
+    
+    @staticmethod
+    def _changed_chapters(known: Dict[str, int], versions: Dict[str, int]) -> Set[str]:
+        return {chapter for chapter, version in versions.items() if known.get(chapter) != version}
+    
+    def _apply_disk_changes(self, state: AppState, known: Dict[str, int],
+                            base: Dict[str, ChapterBase], dirty: Set[str],
+                            versions: Dict[str, int], theirs: Dict[str, Any]) -> List[str]:
+        """Put the file's changed chapters into ``state``; returns the chapters touched"""
+        todos, chapters = state['todos'], state['chapters']
+        touched = []
+        for chapter, items in theirs.items():
+            if chapter in dirty and chapter in todos:
+                todos[chapter] = self._merge_items(todos[chapter], items, base.get(chapter))
+            else:
+                todos[chapter] = items
+                if chapter not in chapters:
+                    chapters.append(chapter)
+            touched.append(chapter)
+        # Deleted there and untouched here. The current chapter is kept so
+        # the window always has something to show; it is saved back.
+        for chapter in known:
+            if (chapter not in versions and chapter not in dirty and chapter in todos
+                    and chapter != state.get('current_chapter')):
+                del todos[chapter]
+                if chapter in chapters:
+                    chapters.remove(chapter)
+                touched.append(chapter)
+        return touched
+    
+    def _merge_items(self, ours, theirs, base: Optional[ChapterBase]):
+        """Three-way merge of a chapter changed both here and in the file.
+        
+        Items match on ID. ``base`` is the chapter as of the version both
+        sides started from: an item missing on one side but in the base was
+        removed there, and stays removed; one missing from the base was
+        added, and is kept. Completion is taken from the side that changed
+        it, ours if both did. Our items come first in our order, then the
+        ones only they added. Without a base (a chapter new on both sides)
+        this is the union of the two.
+        """
+        from .store import item_ids
+        
+        in_base = dict(zip(base[0], base[1])) if base is not None else {}
+        their_done = {item.id: item.completed for item in theirs}
+        merged = []
+        for item in ours:
+            if item.id in their_done:
+                completed = item.completed
+                if in_base.get(item.id) == completed:
+                    # Unchanged here; whatever they did stands
+                    completed = their_done[item.id]
+                merged.append(TodoItem(item.text, completed, item.created_at, item.id))
+            elif item.id not in in_base:
+                merged.append(TodoItem(item.text, item.completed, item.created_at, item.id))
+        have = set(item_ids(ours))
+        for item in theirs:
+            if item.id not in have and item.id not in in_base:
+                merged.append(TodoItem(item.text, item.completed, item.created_at, item.id))
+        return self.new_items(merged)
+    
+    def _save_merged(self, state: AppState) -> None:
+        """Body of save(), run with the file lock held"""
+        stamp = self._stamp()
+        with self._sync_lock:
+            known = dict(self._versions)
+            base = dict(self._base)
+            generation = self._generation
+            # Marks made from here on belong to a later save
+            dirty, self._dirty = self._dirty, set()
+        
+        try:
+            versions, theirs = known, {}
+            if stamp is not None and stamp != self._disk_stamp:
+                try:
+                    _, disk_generation, versions, theirs = self._read_disk(
+                        lambda versions: self._changed_chapters(known, versions))
+                    generation = max(generation, disk_generation)
+                except ValueError as e:
+                    # Unreadable file: ours replaces it, as before syncing existed
+                    print(f"Error reading changes from disk: {e}")
+                    versions, theirs = known, {}
+            
+            touched: List[str] = []
+            inbox = self._stamp(self._inbox_path)
+            if theirs or set(known) - set(versions) or inbox is not None:
+                # Merge into copies; the caller's snapshot stays as it was
+                state = dict(state)
+                state['todos'] = dict(state['todos'])
+                state['chapters'] = list(state['chapters'])
+                touched = self._apply_disk_changes(state, known, base, dirty, versions, theirs)
+            if inbox is not None:
+                for chapter in self._fold_inbox(state):
+                    dirty.add(chapter)
+                    if chapter not in touched:
+                        touched.append(chapter)
+            
+            generation += 1
+            written = {
+                chapter: (versions[chapter] if chapter in versions and chapter not in dirty
+                          else generation)
+                for chapter in state['todos']
+            }
+            self._write(state, {'generation': generation, 'chapter_versions': written})
+            # Chapters merged with the file keep their old base, like their version below
+            base = {chapter: (chapter_base(items) if written[chapter] == generation and chapter not in touched
+                              else base.get(chapter))
+                    for chapter, items in state['todos'].items()}
+        except IOError:
+            with self._sync_lock:
+                self._dirty |= dirty
+            raise
+        if inbox is not None:
+            # Everything in it is in the data file now; appends wait for the lock
+            try:
+                self._inbox_path.unlink()
+            except OSError as e:
+                print(f"Error removing inbox: {e}")
+            self._inbox_stamp = None
+            self._inbox_folded.clear()
+        
+        with self._sync_lock:
+            self._generation = generation
+            self._versions = written
+            self._base = {chapter: entry for chapter, entry in base.items() if entry is not None}
+            if touched:
+                # The caller's state lacks what we merged from the file: keep
+                # the old versions for those chapters so merge_from_disk()
+                # still brings them in
+                for chapter in touched:
+                    if chapter in known:
+                        self._versions[chapter] = known[chapter]
+                    else:
+                        self._versions.pop(chapter, None)
+                self._disk_stamp = None
+            else:
+                self._disk_stamp = self._stamp()
+    
+    def close(self) -> None:
+        """Release any resources held by the backend"""
+    
+    def prefetch(self, state: AppState) -> list:
+        """Start loading chapters that ``load()`` left on disk; returns futures"""
+        return []
+    
+    def new_items(self, items: Iterable[TodoItem] = ()) -> Union[List[TodoItem], 'ChapterStore']:
+        """Container for a chapter's items in this backend's representation"""
+        from .store import ChapterStore
+        
+        return ChapterStore(items) if self.compact else list(items)
+    
+    def _pack_todos(self, state: AppState) -> AppState:
+        """Convert plain item lists to ChapterStores when compact is enabled"""
+        if self.compact:
+            from .store import ChapterStore
+            
+            state['todos'] = {
+                chapter: items if isinstance(items, ChapterStore) else ChapterStore(items)
+                for chapter, items in state.get('todos', {}).items()
+            }
+        return state
+    
+    # Incremental hooks, called after the in-memory state was already changed.
+    # The change itself travels in the arguments, taken when it was made:
+    # items by ID, the item added as a copy. A hook may run on the writer
+    # thread after later changes, so the window passes a snapshot of the
+    # state as of the change (see writer.snapshot_state), holding the items
+    # of the changed chapter only for replace_chapter and for backends with
+    # ``hooks_write_chapter``.
+    def wants_snapshot(self) -> bool:
+        """Whether the backend asks for a full save of the current state, e.g.
+        to compact a journal; the hooks themselves never save one"""
+        return False
+    
+    def add_item(self, state: AppState, chapter: str, item: TodoItem) -> None:
+        """Persist an item appended to a chapter"""
+        self.save(state)
+    
+    def toggle_item(self, state: AppState, chapter: str, item_id: int, completed: bool) -> None:
+        """Persist the new completion flag of a single item"""
+        self.save(state)
+    
+    def clear_chapter(self, state: AppState, chapter: str) -> None:
+        """Persist removal of every item in a chapter"""
+        self.save(state)
+    
+    def remove_item(self, state: AppState, chapter: str, item_id: int) -> None:
+        """Persist removal of the item with ``item_id``"""
+        self.save(state)
+    
+    def remove_items(self, state: AppState, chapter: str, item_ids: Sequence[int]) -> None:
+        """Persist removal of several items by ID, wherever they were"""
+        self.save(state)
+    
+    def replace_chapter(self, state: AppState, chapter: str) -> None:
+        """Persist a chapter whose whole item list was swapped out"""
+        self.save(state)
+    
+    def add_chapter(self, state: AppState, chapter: str) -> None:
+        """Persist a newly created chapter"""
+        self.save(state)
+    
+    def delete_chapter(self, state: AppState, chapter: str) -> None:
+        """Persist removal of a chapter and its items"""
+        self.save(state)
+    
+    def update_settings(self, state: AppState) -> None:
+        """Persist settings and the current chapter"""
+        self.save(state)
+    
     def _get_default_state(self) -> AppState:
         """Return default application state"""
         return {
@@ -59,23 +673,40 @@ class Storage:
     
     def _serialize_state(self, state: AppState) -> Dict[str, Any]:
         """Convert state to serializable format"""
-        serialized = state.copy()
+        # Todos go last, current chapter first, so a streaming load has the
+        # settings and the visible chapter after reading the start of the file
+        serialized = {key: value for key, value in state.items() if key != 'todos'}
+        current = state.get('current_chapter')
+        chapters = sorted(state['todos'], key=lambda chapter: chapter != current)
         # Convert TodoItem objects to dictionaries
         serialized['todos'] = {
-            chapter: [item.to_dict() for item in items]
-            for chapter, items in state['todos'].items()
+            chapter: [item.to_dict() for item in state['todos'][chapter]]
+            for chapter in chapters
         }
         return serialized
     
+    def _decode_items(self, items: List[Dict[str, Any]]) -> Union[List[TodoItem], 'ChapterStore']:
+        """Convert one chapter's item dictionaries back to items"""
+        # IDs came in with every item at once, so the first tells for all
+        if items and not items[0].get('id'):
+            self._ids_assigned = True
+        if self.compact:
+            from .store import ChapterStore
+            
+            return ChapterStore.from_dicts(items)
+        return [TodoItem.from_dict(item) for item in items]
+    
     def _deserialize_state(self, data: Dict[str, Any]) -> AppState:
         """Convert serialized data back to application state"""
         # Ensure all required fields exist
         state = self._get_default_state()
         state.update(data)
+        for key in SYNC_KEYS + (durable.CHECKSUM_KEY,):
+            state.pop(key, None)
         
         # Convert todo dictionaries back to TodoItem objects
         state['todos'] = {
-            chapter: [TodoItem.from_dict(item) for item in items]
+            chapter: self._decode_items(items)
             for chapter, items in state.get('todos', {}).items()
         }
         
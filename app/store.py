@@ -0,0 +1,406 @@
+import datetime
+import struct
+import sys
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union, overload
+
+from .models import TodoItem, new_item_id
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# How created_at strings are rebuilt from the stored microseconds
+_FMT_ISO = 0        # datetime.isoformat(), the packaged app's format
+_FMT_MINUTES = 1    # "%Y-%m-%d %H:%M", the legacy todo_book format
+_FMT_RAW = 2        # anything else, kept verbatim in a side table
+
+# One entry is enough: items from an import share the import's timestamp,
+# and anything else is a miss either way
+@lru_cache(maxsize=1)
+def _encode_timestamp(value: str):
+    """Return (microseconds since epoch, format code) for a created_at string"""
+    if value:
+        try:
+            parsed = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            parsed = None
+        if parsed is not None and parsed.tzinfo is None:
+            micros = (parsed - _EPOCH) // datetime.timedelta(microseconds=1)
+            if parsed.isoformat() == value:
+                return micros, _FMT_ISO
+            if parsed.strftime('%Y-%m-%d %H:%M') == value:
+                return micros, _FMT_MINUTES
+    return 0, _FMT_RAW
+
+def _le(column: array) -> bytes:
+    """Little-endian bytes of an array column"""
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def _from_le(typecode: str, data) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+_MICROS_PER_DAY = 86_400_000_000
+_TWO_DIGITS = [f'{i:02d}' for i in range(60)]
+
+@lru_cache(maxsize=4096)
+def _date_string(day: int) -> str:
+    return (_EPOCH + datetime.timedelta(days=day)).date().isoformat()
+
+def _decode_timestamp(micros: int, fmt: int) -> str:
+    # Same output as building the datetime and formatting it, but only the
+    # date part goes through datetime, and that is cached per day
+    day, rest = divmod(micros, _MICROS_PER_DAY)
+    seconds, fraction = divmod(rest, 1_000_000)
+    minutes, second = divmod(seconds, 60)
+    hour, minute = divmod(minutes, 60)
+    if fmt == _FMT_MINUTES:
+        return f'{_date_string(day)} {_TWO_DIGITS[hour]}:{_TWO_DIGITS[minute]}'
+    time = f'{_TWO_DIGITS[hour]}:{_TWO_DIGITS[minute]}:{_TWO_DIGITS[second]}'
+    if fraction:
+        return f'{_date_string(day)}T{time}.{fraction:06d}'
+    return f'{_date_string(day)}T{time}'
+
+class ItemView:
+    """Lightweight stand-in for a ``TodoItem`` stored in a ``ChapterStore``.
+
+    Reads and writes go straight to the store's columns, so existing code can
+    keep using ``.text``, ``.completed`` and ``.created_at``.
+    """
+
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, store: 'ChapterStore', index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._store.text_at(self._index)
+
+    @property
+    def completed(self) -> bool:
+        return self._store.completed_at(self._index)
+
+    @completed.setter
+    def completed(self, value: bool) -> None:
+        self._store.set_completed(self._index, value)
+
+    @property
+    def created_at(self) -> str:
+        return self._store.created_at_at(self._index)
+
+    @property
+    def id(self) -> int:
+        return self._store.id_at(self._index)
+
+    def to_dict(self) -> dict:
+        return {'text': self.text, 'completed': self.completed, 'created_at': self.created_at,
+                'id': self.id}
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ItemView, TodoItem)):
+            return (self.text, self.completed, self.created_at, self.id) == \
+                   (other.text, other.completed, other.created_at, other.id)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return (f"ItemView(text={self.text!r}, completed={self.completed!r}, "
+                f"created_at={self.created_at!r}, id={self.id!r})")
+
+class ChapterStore:
+    """Columnar storage for the items of one chapter.
+
+    Texts live in a single UTF-8 buffer indexed by an offset array, completion
+    flags are packed eight to a byte and ``created_at`` is kept as int64
+    microseconds since the epoch (plus a one-byte format code so the original
+    string is reproduced exactly), and item IDs are an int64 column. Indexing returns ``ItemView`` objects,
+    so the store can replace a ``List[TodoItem]`` in ``AppState['todos']``.
+    Items can only be appended or cleared, which is all the app does.
+    """
+
+    __slots__ = ('_text_buf', '_text_offsets', '_flags', '_created', '_created_fmt',
+                 '_raw_created', '_ids', '_count')
+
+    def __init__(self, items: Iterable[Union[TodoItem, ItemView]] = ()):
+        self._text_buf = bytearray()
+        self._text_offsets = array('Q', [0])
+        self._flags = bytearray()
+        self._created = array('q')
+        self._created_fmt = bytearray()
+        self._raw_created: Dict[int, str] = {}
+        self._ids = array('q')
+        self._count = 0
+        self.extend(items)
+
+    @classmethod
+    def from_dicts(cls, data: Iterable[dict]) -> 'ChapterStore':
+        store = cls()
+        for item in data:
+            store.append_values(item.get('text', ''), bool(item.get('completed', False)),
+                                item.get('created_at', ''), item.get('id', 0))
+        return store
+
+    # Column access
+    def text_at(self, index: int) -> str:
+        return self._text_buf[self._text_offsets[index]:self._text_offsets[index + 1]].decode('utf-8')
+
+    def completed_at(self, index: int) -> bool:
+        return bool(self._flags[index >> 3] & (1 << (index & 7)))
+
+    def set_completed(self, index: int, value: bool) -> None:
+        if value:
+            self._flags[index >> 3] |= 1 << (index & 7)
+        else:
+            self._flags[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def completed_count(self) -> int:
+        """Number of completed items, counted over the packed flag bytes"""
+        # Bits past the last item are always clear (see pop)
+        return bin(int.from_bytes(self._flags, 'little')).count('1')
+
+    def created_at_at(self, index: int) -> str:
+        fmt = self._created_fmt[index]
+        if fmt == _FMT_RAW:
+            return self._raw_created.get(index, '')
+        return _decode_timestamp(self._created[index], fmt)
+
+    def id_at(self, index: int) -> int:
+        return self._ids[index]
+
+    @property
+    def ids(self) -> Sequence[int]:
+        """The ID column, in item order; read-only"""
+        return self._ids
+
+    def created_at_micros(self, index: int) -> Optional[int]:
+        """created_at as epoch microseconds, or None if it is not a timestamp"""
+        if self._created_fmt[index] == _FMT_RAW:
+            return None
+        return self._created[index]
+
+    # Mutation
+    def append_values(self, text: str, completed: bool, created_at: str, item_id: int = 0) -> None:
+        """Append one item; without ``item_id`` it gets a fresh ID"""
+        index = self._count
+        self._text_buf += text.encode('utf-8')
+        self._text_offsets.append(len(self._text_buf))
+        if index & 7 == 0:
+            self._flags.append(0)
+        self._count += 1
+        if completed:
+            self.set_completed(index, True)
+        micros, fmt = _encode_timestamp(created_at)
+        self._created.append(micros)
+        self._created_fmt.append(fmt)
+        if fmt == _FMT_RAW and created_at:
+            self._raw_created[index] = created_at
+        self._ids.append(item_id or new_item_id())
+
+    def pop(self) -> TodoItem:
+        """Remove the last item and return it as a ``TodoItem``"""
+        if not self._count:
+            raise IndexError("pop from empty ChapterStore")
+        index = self._count - 1
+        item = TodoItem(text=self.text_at(index), completed=self.completed_at(index),
+                        created_at=self.created_at_at(index), id=self._ids[index])
+        self._text_offsets.pop()
+        del self._text_buf[self._text_offsets[-1]:]
+        if index & 7 == 0:
+            self._flags.pop()
+        else:
+            self.set_completed(index, False)
+        self._created.pop()
+        self._created_fmt.pop()
+        self._raw_created.pop(index, None)
+        self._ids.pop()
+        self._count = index
+        return item
+    
+    def append(self, item: Union[TodoItem, ItemView]) -> None:
+        self.append_values(item.text, item.completed, item.created_at, item.id)
+
+    def extend(self, items: Iterable[Union[TodoItem, ItemView]]) -> None:
+        for item in items:
+            self.append(item)
+
+    def copy(self) -> 'ChapterStore':
+        """Independent copy of the columns, used for background snapshots"""
+        other = ChapterStore()
+        other._text_buf = bytearray(self._text_buf)
+        other._text_offsets = array('Q', self._text_offsets)
+        other._flags = bytearray(self._flags)
+        other._created = array('q', self._created)
+        other._created_fmt = bytearray(self._created_fmt)
+        other._raw_created = dict(self._raw_created)
+        other._ids = array('q', self._ids)
+        other._count = self._count
+        return other
+
+    def clear(self) -> None:
+        """Remove every item. Views handed out earlier become invalid."""
+        self.__init__()
+
+    # Sequence protocol
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> ItemView: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[ItemView]: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [ItemView(self, i) for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("ChapterStore index out of range")
+        return ItemView(self, index)
+
+    def __iter__(self) -> Iterator[ItemView]:
+        for i in range(self._count):
+            yield ItemView(self, i)
+
+    def __bool__(self) -> bool:
+        return self._count > 0
+
+    def __repr__(self) -> str:
+        return f"ChapterStore({self._count} items)"
+
+    # Binary layout, used by the binary storage backend. All integers are
+    # little-endian: u32 count, u32 text byte lengths, the UTF-8 texts,
+    # completion bits, i64 created_at micros, u8 format codes, the raw
+    # created_at strings as u32 count and (u32 index, u32 length, UTF-8),
+    # then i64 item IDs. Blocks written before IDs existed end after the raw
+    # strings; their items get fresh IDs when read.
+    def to_bytes(self) -> bytes:
+        offsets = self._text_offsets
+        lengths = array('I', [offsets[i + 1] - offsets[i] for i in range(self._count)])
+        parts = [struct.pack('<I', self._count), _le(lengths), bytes(self._text_buf),
+                 bytes(self._flags), _le(self._created), bytes(self._created_fmt),
+                 struct.pack('<I', len(self._raw_created))]
+        for index, value in sorted(self._raw_created.items()):
+            encoded = value.encode('utf-8')
+            parts.append(struct.pack('<II', index, len(encoded)))
+            parts.append(encoded)
+        parts.append(_le(self._ids))
+        return b''.join(parts)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ChapterStore':
+        """Rebuild a store from ``to_bytes()`` output; raises ValueError if it is damaged"""
+        view = memoryview(data)
+        try:
+            (count,) = struct.unpack_from('<I', view, 0)
+            pos = 4
+            lengths = _from_le('I', view[pos:pos + 4 * count])
+            pos += 4 * count
+            offsets = array('Q', accumulate(lengths, initial=0))
+            text_size = offsets[-1]
+            flag_size = (count + 7) >> 3
+            store = cls()
+            store._text_buf = bytearray(view[pos:pos + text_size])
+            pos += text_size
+            store._flags = bytearray(view[pos:pos + flag_size])
+            pos += flag_size
+            store._created = _from_le('q', view[pos:pos + 8 * count])
+            pos += 8 * count
+            store._created_fmt = bytearray(view[pos:pos + count])
+            pos += count
+            (raw_count,) = struct.unpack_from('<I', view, pos)
+            pos += 4
+            for _ in range(raw_count):
+                index, size = struct.unpack_from('<II', view, pos)
+                pos += 8
+                store._raw_created[index] = bytes(view[pos:pos + size]).decode('utf-8')
+                pos += size
+            if pos < len(view):
+                store._ids = _from_le('q', view[pos:pos + 8 * count])
+            else:
+                store._ids = array('q', (new_item_id() for _ in range(count)))
+        except struct.error as e:
+            raise ValueError(f"truncated chapter data: {e}") from e
+        if (len(lengths) != count or len(store._text_buf) != text_size or len(store._flags) != flag_size
+                or len(store._created) != count or len(store._created_fmt) != count
+                or len(store._ids) != count):
+            raise ValueError("truncated chapter data")
+        store._text_offsets = offsets
+        store._count = count
+        return store
+    
+    def to_items(self) -> List[TodoItem]:
+        """Materialize regular ``TodoItem`` objects"""
+        buf, offsets, flags, ids = self._text_buf, self._text_offsets, self._flags, self._ids
+        items = []
+        for i in range(self._count):
+            fmt = self._created_fmt[i]
+            created_at = (self._raw_created.get(i, '') if fmt == _FMT_RAW
+                          else _decode_timestamp(self._created[i], fmt))
+            items.append(TodoItem(text=buf[offsets[i]:offsets[i + 1]].decode('utf-8'),
+                                  completed=bool(flags[i >> 3] & (1 << (i & 7))),
+                                  created_at=created_at, id=ids[i]))
+        return items
+
+def item_ids(items) -> Sequence[int]:
+    """IDs of a chapter's items in order, from a list or a ``ChapterStore``"""
+    if isinstance(items, ChapterStore):
+        return items.ids
+    return [item.id for item in items]
+
+# Each flag byte spread to one byte per bit, for completion_flags()
+_SPREAD = [bytes((byte >> bit) & 1 for bit in range(8)) for byte in range(256)]
+
+def completion_flags(items) -> bytes:
+    """One byte per item, 1 if completed, from a list or a ``ChapterStore``"""
+    if isinstance(items, ChapterStore):
+        return b''.join([_SPREAD[byte] for byte in items._flags])[:len(items)]
+    return bytes([item.completed for item in items])
+
+class ItemIndex:
+    """Finds an item's position in its chapter by ID in O(1).
+
+    A chapter's map is built on its first lookup. The caller reports
+    appends and pops with ``appended``/``popped``, and anything else that
+    changes a chapter's item list (clear, replace, merge) with ``forget``.
+    """
+
+    def __init__(self):
+        self._chapters: Dict[str, Dict[int, int]] = {}
+
+    def find(self, todos: Dict[str, Iterable], chapter: str, item_id: int) -> Optional[int]:
+        """Position of the item with ``item_id`` in ``chapter``, or None"""
+        positions = self._chapters.get(chapter)
+        if positions is None:
+            items = todos.get(chapter)
+            if items is None:
+                return None
+            positions = self._chapters[chapter] = {
+                item_id: index for index, item_id in enumerate(item_ids(items))
+            }
+        return positions.get(item_id)
+
+    def appended(self, chapter: str, item_id: int, index: int) -> None:
+        positions = self._chapters.get(chapter)
+        if positions is not None:
+            positions[item_id] = index
+
+    def popped(self, chapter: str, item_id: int) -> None:
+        positions = self._chapters.get(chapter)
+        if positions is not None:
+            positions.pop(item_id, None)
+
+    def forget(self, chapter: Optional[str] = None) -> None:
+        """Drop the map of ``chapter`` (of every chapter by default)"""
+        if chapter is None:
+            self._chapters.clear()
+        else:
+            self._chapters.pop(chapter, None)
@@ -0,0 +1,252 @@
+import csv
+import datetime
+import json
+import os
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+from .models import AppState, TodoItem
+
+# Chapter import/export in four formats. Readers are generators over the
+# open file and writers take any iterable of items, so neither side ever
+# holds more than one line of the document; the only thing that grows is
+# the chapter the items end up in.
+
+FORMATS = ('txt', 'md', 'csv', 'jsonl')
+
+_SUFFIXES = {
+    '.txt': 'txt',
+    '.md': 'md',
+    '.markdown': 'md',
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+}
+
+# Items appended to the chapter per step of an import
+BATCH_SIZE = 10_000
+
+_CHECKBOX = re.compile(r'\s*[-*+]\s+\[([ xX])\]\s?(.*)')
+_BULLET = re.compile(r'\s*[-*+]\s+(.*)')
+_CSV_COLUMNS = ('text', 'completed', 'created_at')
+_TRUE = {'1', 'true', 'yes', 'y', 'x', 'done'}
+
+def detect_format(path: Path) -> str:
+    """Format implied by the file suffix; raises ValueError if there is none"""
+    fmt = _SUFFIXES.get(Path(path).suffix.lower())
+    if fmt is None:
+        raise ValueError(f"Cannot tell the format of {Path(path).name}; use one of {', '.join(FORMATS)}")
+    return fmt
+
+# Readers
+def _read_txt(f: TextIO, created_at: str) -> Iterator[TodoItem]:
+    for line in f:
+        text = line.rstrip('\r\n')
+        if text.strip():
+            yield TodoItem(text, False, created_at)
+
+def _read_md(f: TextIO, created_at: str) -> Iterator[TodoItem]:
+    """``- [ ]``/``- [x]`` items and plain bullets; indented lines continue
+    the item above, anything else (headings, prose) is skipped"""
+    pending: Optional[TodoItem] = None
+    for line in f:
+        line = line.rstrip('\r\n')
+        match = _CHECKBOX.match(line)
+        if match:
+            if pending is not None:
+                yield pending
+            pending = TodoItem(match.group(2), match.group(1) != ' ', created_at)
+            continue
+        match = _BULLET.match(line)
+        if match:
+            if pending is not None:
+                yield pending
+            pending = TodoItem(match.group(1), False, created_at)
+        elif pending is not None and line.startswith('  ') and line.strip():
+            pending.text += '\n' + line[2:]
+        elif pending is not None:
+            yield pending
+            pending = None
+    if pending is not None:
+        yield pending
+
+def _read_csv(f: TextIO, created_at: str) -> Iterator[TodoItem]:
+    """Columns text, completed, created_at; a header row may name them in any order"""
+    columns = {name: index for index, name in enumerate(_CSV_COLUMNS)}
+    for number, row in enumerate(csv.reader(f)):
+        if number == 0 and 'text' in (cell.strip().lower() for cell in row):
+            columns = {cell.strip().lower(): index for index, cell in enumerate(row)}
+            continue
+        if not row:
+            continue
+        cells = {name: row[index] for name, index in columns.items() if index < len(row)}
+        if not cells.get('text', '').strip():
+            continue
+        yield TodoItem(cells['text'], cells.get('completed', '').strip().lower() in _TRUE,
+                       cells.get('created_at') or created_at)
+
+def _read_jsonl(f: TextIO, created_at: str) -> Iterator[TodoItem]:
+    """One item object (or bare string) per line"""
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"line {number}: {e}") from e
+        if isinstance(data, str):
+            yield TodoItem(data, False, created_at)
+        elif isinstance(data, dict):
+            # Imported items are new to the book: an "id" in the file is ignored
+            yield TodoItem(data.get('text', ''), bool(data.get('completed', False)),
+                           data.get('created_at') or created_at)
+        else:
+            raise ValueError(f"line {number}: expected an object or a string")
+
+# Writers
+def _write_txt(f: TextIO, items: Iterable[TodoItem], chapter: str) -> int:
+    """One item per line; line breaks inside an item become spaces"""
+    count = 0
+    for item in items:
+        f.write(item.text.replace('\r', '').replace('\n', ' '))
+        f.write('\n')
+        count += 1
+    return count
+
+def _write_md(f: TextIO, items: Iterable[TodoItem], chapter: str) -> int:
+    f.write(f'# {chapter}\n\n')
+    count = 0
+    for item in items:
+        f.write('- [x] ' if item.completed else '- [ ] ')
+        f.write(item.text.replace('\n', '\n  '))
+        f.write('\n')
+        count += 1
+    return count
+
+def _write_csv(f: TextIO, items: Iterable[TodoItem], chapter: str) -> int:
+    writer = csv.writer(f)
+    writer.writerow(_CSV_COLUMNS)
+    count = 0
+    for item in items:
+        writer.writerow((item.text, 'true' if item.completed else 'false', item.created_at))
+        count += 1
+    return count
+
+def _write_jsonl(f: TextIO, items: Iterable[TodoItem], chapter: str) -> int:
+    count = 0
+    for item in items:
+        f.write(json.dumps({'text': item.text, 'completed': item.completed,
+                            'created_at': item.created_at}, ensure_ascii=False))
+        f.write('\n')
+        count += 1
+    return count
+
+_FORMATS: Dict[str, Tuple[Callable, Callable]] = {
+    'txt': (_read_txt, _write_txt),
+    'md': (_read_md, _write_md),
+    'csv': (_read_csv, _write_csv),
+    'jsonl': (_read_jsonl, _write_jsonl),
+}
+
+def read_items(path: Path, fmt: Optional[str] = None,
+               created_at: Optional[str] = None) -> Iterator[TodoItem]:
+    """Stream the items in ``path``.
+
+    Items without a timestamp of their own (every txt line, for instance)
+    get ``created_at``, by default the time the import started. Raises
+    ValueError for unknown formats or malformed JSON lines.
+    """
+    reader = _FORMATS[fmt or detect_format(path)][0]
+    created_at = created_at or datetime.datetime.now().isoformat()
+    newline = '' if reader is _read_csv else None
+    with open(path, 'r', encoding='utf-8-sig', newline=newline) as f:
+        yield from reader(f, created_at)
+
+def write_items(path: Path, items: Iterable[TodoItem], fmt: Optional[str] = None,
+                chapter: str = '') -> int:
+    """Stream ``items`` to ``path``; returns how many were written.
+
+    The file is written next to ``path`` and renamed into place, so a failed
+    export never leaves half a file behind.
+    """
+    path = Path(path)
+    writer = _FORMATS[fmt or detect_format(path)][1]
+    tmp_path = path.with_name(path.name + '.tmp')
+    newline = '' if writer is _write_csv else None
+    with open(tmp_path, 'w', encoding='utf-8', newline=newline) as f:
+        count = writer(f, items, chapter)
+    os.replace(tmp_path, path)
+    return count
+
+def import_into(state: AppState, chapter: str, items: Iterable[TodoItem],
+                new_items: Callable[[], list], batch_size: int = BATCH_SIZE) -> int:
+    """Append ``items`` to ``chapter`` in batches; returns how many were added.
+
+    The chapter is created (with ``new_items()``) if it does not exist.
+    Nothing is rendered or saved here: callers redraw and persist once.
+    """
+    todos = state.setdefault('todos', {})
+    if chapter not in todos:
+        todos[chapter] = new_items()
+    chapters = state.setdefault('chapters', [])
+    if chapter not in chapters:
+        chapters.append(chapter)
+    target = todos[chapter]
+    count = 0
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return count
+        target.extend(batch)
+        count += len(batch)
+
+def main(argv=None) -> None:
+    """``python -m app.transfer import|export FILE --chapter NAME``"""
+    import argparse
+    from .backends import BACKENDS, create_storage
+
+    parser = argparse.ArgumentParser(prog='python -m app.transfer',
+                                     description="Import a file into a chapter or export a chapter to a file")
+    parser.add_argument('direction', choices=['import', 'export'])
+    parser.add_argument('file', type=Path)
+    parser.add_argument('--chapter', help="Chapter to import into or export (default: the current one)")
+    parser.add_argument('--format', choices=FORMATS, help="File format (default: from the file suffix)")
+    parser.add_argument('--backend', default='json', choices=sorted(BACKENDS))
+    parser.add_argument('--compact', action='store_true')
+    args = parser.parse_args(argv)
+
+    storage = create_storage(args.backend, compact=args.compact)
+    try:
+        state = storage.load()
+        chapter = args.chapter or state.get('current_chapter', 'General')
+        if args.direction == 'export':
+            if chapter not in state.get('todos', {}):
+                raise ValueError(f"No chapter named {chapter!r}")
+            count = write_items(args.file, state['todos'][chapter], args.format, chapter)
+            print(f"Exported {count} items from {chapter} to {args.file}")
+            return
+
+        is_new = chapter not in state.get('todos', {})
+        count = import_into(state, chapter, read_items(args.file, args.format), storage.new_items)
+        if storage.external_sync:
+            storage.mark_changed(chapter)
+        if storage.incremental:
+            if is_new:
+                storage.add_chapter(state, chapter)
+            storage.replace_chapter(state, chapter)
+            if storage.wants_snapshot():
+                storage.save(state)
+        else:
+            storage.save(state)
+        print(f"Imported {count} items into {chapter}")
+    except (ValueError, IOError) as e:
+        print(f"Error: {e}")
+        raise SystemExit(1)
+    finally:
+        storage.close()
+
+if __name__ == '__main__':
+    main()
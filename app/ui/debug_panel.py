@@ -0,0 +1,74 @@
+import tkinter as tk
+from tkinter import ttk
+from pathlib import Path
+from typing import Optional
+
+from ..metrics import Metrics
+
+class DebugPanel:
+    """Window showing the live instrumentation table, toggled with F12"""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, root: tk.Tk, metrics: Metrics, dump_path: Path):
+        self.root = root
+        self.metrics = metrics
+        self.dump_path = dump_path
+        self.window: Optional[tk.Toplevel] = None
+        self._refresh_job: Optional[str] = None
+
+    def _build(self) -> None:
+        """Create the window the first time it is needed"""
+        self.window = tk.Toplevel(self.root)
+        self.window.title("Instrumentation")
+        self.window.attributes('-topmost', True)
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
+
+        self.text = tk.Text(self.window, width=68, height=22, font=('Courier', 9), wrap='none')
+        self.text.pack(fill='both', expand=True)
+
+        buttons = ttk.Frame(self.window)
+        buttons.pack(fill='x')
+        self.info_var = tk.StringVar()
+        ttk.Label(buttons, textvariable=self.info_var).pack(side='left', padx=4)
+        ttk.Button(buttons, text="Reset", command=self._reset).pack(side='right')
+        ttk.Button(buttons, text="Dump", command=self.dump).pack(side='right')
+
+    def toggle(self) -> None:
+        if self.window is not None and self.window.state() != 'withdrawn':
+            self.hide()
+        else:
+            self.show()
+
+    def show(self) -> None:
+        if self.window is None:
+            self._build()
+        self.window.deiconify()
+        self.window.lift()
+        self._refresh()
+
+    def hide(self) -> None:
+        if self._refresh_job is not None:
+            self.root.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        if self.window is not None:
+            self.window.withdraw()
+
+    def _refresh(self) -> None:
+        """Redraw the table; repeats while the window is shown"""
+        self.text.delete('1.0', 'end')
+        self.text.insert('1.0', self.metrics.report())
+        self._refresh_job = self.root.after(self.REFRESH_MS, self._refresh)
+
+    def _reset(self) -> None:
+        self.metrics.reset()
+        self.info_var.set("Reset")
+
+    def dump(self) -> None:
+        """Write the current numbers to the dump file"""
+        try:
+            self.metrics.dump(self.dump_path)
+            self.info_var.set(f"Saved {self.dump_path.name}")
+        except IOError as e:
+            print(f"Error saving metrics: {e}")
+            self.info_var.set("Could not save metrics")
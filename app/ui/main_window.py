@@ -1,23 +1,97 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from typing import Dict, List, Optional, Callable, Any
 import threading
-import keyboard as kb
+from collections import deque
 from pathlib import Path
 import os
 
 from ..models import TodoItem, AppState, Settings
+from ..writer import SaveWriter, snapshot_state
+from ..store import item_ids
+from .. import events
+from ..events import BookModel
+from ..search import SearchIndex
+from ..fuzzy import FuzzyMatcher
+from ..clipboard import ClipboardHistory, ClipboardWatcher
 from .menu_bar import MenuBar, MenuActions
 from .todo_list import TodoList, TodoListCallbacks
 from .theme import ThemeManager
+from .palette import QuickPastePalette
+from .scheduler import CountingProxy, RenderScheduler
+from ..startup import StartupProfile
+from ..metrics import LagProbe, Metrics
+from .. import transfer
+from ..archive import (ARCHIVE_AFTER_DAYS, SEGMENT_ITEMS, Archive, archive_cutoff, archive_query,
+                       split_cold)
+from ..undo import ChapterCleared, ItemAdded, ItemToggled, UndoHistory
+
+PALETTE_HOTKEY = 'ctrl+shift+space'
+
+def _timestamp(epoch: float) -> str:
+    import datetime
+    return datetime.datetime.fromtimestamp(epoch).isoformat()
 
 class MainWindow:
     """Main application window"""
     
-    def __init__(self, root, storage):
+    # Handlers timed when instrumentation is on
+    INSTRUMENTED_HANDLERS = ('on_item_added', 'on_toggle_complete', 'on_copy_click',
+                             'on_clear_all', 'save_state')
+    
+    # How often to check whether another instance saved the data file
+    DISK_CHECK_MS = 2000
+    
+    # How often to look for completed items old enough to archive
+    ARCHIVE_CHECK_MS = 60 * 60 * 1000
+    
+    TRANSFER_FILETYPES = [
+        ("Markdown checklist", "*.md"),
+        ("Plain text", "*.txt"),
+        ("CSV", "*.csv"),
+        ("JSON Lines", "*.jsonl"),
+        ("All files", "*.*"),
+    ]
+    
+    def __init__(self, root, storage, profile: Optional[StartupProfile] = None,
+                 metrics: Optional[Metrics] = None):
         self.root = root
         self.storage = storage
-        self.state = self.storage.load()
+        self.profile = profile
+        self.metrics = metrics
+        if metrics:
+            # Before anything captures the bound methods (callbacks, writer)
+            metrics.instrument(storage, ('load', 'load_progressive', 'save'), 'storage')
+            metrics.instrument(self, self.INSTRUMENTED_HANDLERS, 'ui')
+        # The JSON backend streams the file: the window is built once the
+        # current chapter is in and the other chapters follow on idle ticks
+        self._loader = None
+        if self.storage.progressive_load:
+            self._loader = self.storage.load_progressive()
+            self.state = next(self._loader)
+        else:
+            self.state = self.storage.load()
+        self._mark('state_loaded')
+        self.writer = SaveWriter(self.storage.save)
+        # A save the backend asked for is queued and has not run yet
+        self._snapshot_queued = False
+        self.history = UndoHistory(limit=self.state.get('settings', {}).get('undo_limit', 200))
+        # Built after the window is up, on a worker thread from a copy of the
+        # state; model events that arrive meanwhile wait in the backlog
+        self._search_index: Optional[SearchIndex] = None
+        self._index_future = None
+        self._index_backlog: Optional[List[events.Event]] = None
+        # Query typed before the index was ready, run once it is
+        self._pending_search: Optional[str] = None
+        # Next pass of a search whose scan stopped early
+        self._search_job: Optional[str] = None
+        
+        # Widget updates from handlers are applied once per event-loop tick
+        self.render = RenderScheduler(root, metrics)
+        # Changes to the book go through the model; its events reach the
+        # subscribers below in one batch per tick, ahead of the redraws
+        self.model = BookModel(self.state, self.storage.new_items,
+                               schedule=lambda deliver: self.render.mark('model', deliver))
         
         # Initialize UI
         self._setup_window()
@@ -26,13 +100,174 @@ class MainWindow:
         
         # Set initial state
         self._update_from_state()
+        self._mark('ui_built')
+        
+        self.model.subscribe(self._apply_settings)
+        self.model.subscribe(self._apply_to_list)
+        self.model.subscribe(self._apply_to_search)
+        self.model.subscribe(lambda batch: self._update_status())
+        if metrics:
+            self.model.subscribe(lambda batch: metrics.count('model.events', len(batch)))
+        
+        self._lag_probe: Optional[LagProbe] = None
+        if metrics:
+            self._setup_instrumentation()
+        
+        # Quick-paste palette, opened from its own global hotkey
+        self._matcher: Optional[FuzzyMatcher] = None
+        self.palette = QuickPastePalette(self.root, self._get_matcher, self.copy_to_clipboard)
         
-        # Register hotkey if enabled
         self._hotkey_registered = False
-        self._register_hotkey()
+        self._prefetch: list = []
+        self._disk_check_job: Optional[str] = None
+        # Cold completed items; opened when first archived to or searched
+        self._archive: Optional[Archive] = None
+        self._archive_queue: deque = deque()
+        self._archive_job: Optional[str] = None
+        
+        # Clipboard history mode; loaded and watched only while it is shown
+        self.clipboard_history: Optional[ClipboardHistory] = None
+        self.clipboard_watcher: Optional[ClipboardWatcher] = None
         
         # Bind close event
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Z>', lambda e: self.redo())
+        
+        # Only what the first frame needs runs before the event loop. The
+        # rest (sv_ttk, keyboard, other chapters, search index) runs one
+        # step per idle tick so input is handled in between.
+        self._startup_steps = deque([
+            self._mark_first_paint,
+            self._apply_theme,
+            self._register_hotkey,
+            self._start_history_mode,
+            self._mark_interactive,
+            self._continue_loading,
+            self._start_prefetch,
+            self._start_disk_check,
+        ])
+        self.root.after_idle(self._run_startup_step)
+    
+    def _run_startup_step(self) -> None:
+        """Run the next deferred startup step and schedule the one after"""
+        if not self._startup_steps:
+            return
+        step = self._startup_steps.popleft()
+        step()
+        if self._startup_steps:
+            self.root.after_idle(self._run_startup_step)
+    
+    def _mark(self, name: str) -> None:
+        if self.profile:
+            self.profile.mark(name)
+    
+    def _mark_first_paint(self) -> None:
+        if self.profile:
+            # Flush pending geometry and redraws so the mark follows the frame
+            self.root.update_idletasks()
+            self.profile.mark('first_paint')
+    
+    def _mark_interactive(self) -> None:
+        self._mark('interactive')
+    
+    def _apply_theme(self) -> None:
+        """Switch from the basic first-frame colors to the full theme"""
+        self.theme_manager.set_theme(self.state.get('settings', {}).get('theme', 'light'))
+    
+    def _start_history_mode(self) -> None:
+        if self._history_mode():
+            self._enter_history()
+    
+    def _continue_loading(self) -> None:
+        """Read the next chapter of a progressive load; requeues itself until done"""
+        if self._loader is None:
+            self._report_recovery()
+            return
+        if next(self._loader, None) is None:
+            self._loader = None
+            self._mark('state_complete')
+            self._verify_stats()
+            self._report_recovery()
+        else:
+            self._startup_steps.appendleft(self._continue_loading)
+    
+    def _finish_loading(self) -> None:
+        """Read the rest of a progressive load now; anything that saves or
+        looks at every chapter must not see a partial state"""
+        if self._loader is not None:
+            for _ in self._loader:
+                pass
+            self._loader = None
+            self._mark('state_complete')
+            self._verify_stats()
+            self._report_recovery()
+    
+    def _report_recovery(self) -> None:
+        """Tell the user if the data file was damaged and a kept version was loaded"""
+        recovery = self.storage.pop_recovery()
+        if recovery is None:
+            return
+        path, touched = recovery
+        if touched:
+            # The window showed the damaged file's first chapters
+            self.history.clear()
+            for chapter in touched:
+                self.model.chapter_changed(chapter)
+        self._set_status(f"Data file was damaged; loaded the version saved before ({path.name})")
+    
+    def _verify_stats(self) -> None:
+        """Count chapters that were still on disk when the window opened"""
+        if not self.model.stats.verified:
+            self.model.stats.verify(self.state.get('todos', {}))
+            self._update_status()
+    
+    def _start_prefetch(self) -> None:
+        """Load chapters the backend left on disk, then build the search index"""
+        self._prefetch = self.storage.prefetch(self.state)
+        self._warm_search_index()
+    
+    def _start_disk_check(self) -> None:
+        if self.storage.external_sync:
+            self._disk_check_job = self.root.after(self.DISK_CHECK_MS, self._check_disk)
+    
+    def _check_disk(self) -> None:
+        """Timer callback: a stat call, plus a merge if another instance saved"""
+        if self._loader is None and self.storage.changed_on_disk():
+            self._merge_external_changes()
+        self._disk_check_job = self.root.after(self.DISK_CHECK_MS, self._check_disk)
+    
+    def _merge_external_changes(self) -> None:
+        """Bring in the chapters another instance changed and redraw only those"""
+        touched, merged = self.storage.merge_from_disk(self.state)
+        if not touched:
+            return
+        if self.metrics:
+            self.metrics.count('sync.chapters', len(touched))
+        # Undo deltas refer to item positions the merge may have moved
+        self.history.clear()
+        for chapter in touched:
+            self.model.chapter_changed(chapter)
+        if merged:
+            # Both sides changed these; write the union back
+            self.writer.request_save(snapshot_state(self.state))
+            for chapter in merged:
+                self.storage.mark_changed(chapter)
+        self._set_status(f"Updated from another window: {', '.join(touched)}")
+    
+    def _setup_instrumentation(self) -> None:
+        """Time list updates, probe event-loop lag and bind F12 to the debug panel"""
+        from .debug_panel import DebugPanel
+        self.metrics.instrument(self.todo_list, ('update_items',), 'list')
+        self.metrics.instrument(self.render, ('flush',), 'render')
+        self._lag_probe = LagProbe(self.root, self.metrics)
+        self._lag_probe.start()
+        self.debug_panel = DebugPanel(self.root, self.metrics, self._metrics_path())
+        self.root.bind('<F12>', lambda e: self.debug_panel.toggle())
+    
+    def _metrics_path(self) -> Path:
+        return self.storage.data_path.with_name('metrics.json')
     
     def _setup_window(self) -> None:
         """Configure main window properties"""
@@ -62,6 +297,7 @@ class MainWindow:
             relief='sunken',
             anchor='w'
         )
+        self._status = CountingProxy(self.status_var, self.render.tk_calls, 'StatusBar')
         self.status_bar.pack(side='bottom', fill='x')
     
     def _setup_menu(self) -> None:
@@ -70,7 +306,9 @@ class MainWindow:
             on_mode_change=self.on_mode_change,
             on_clear_all=self.on_clear_all,
             on_theme_change=self.on_theme_change,
-            on_toggle_hotkey=self.on_toggle_hotkey
+            on_toggle_hotkey=self.on_toggle_hotkey,
+            on_import=self.on_import,
+            on_export=self.on_export
         )
         
         self.menu_bar = MenuBar(
@@ -88,30 +326,62 @@ class MainWindow:
         callbacks = TodoListCallbacks(
             on_toggle_complete=self.on_toggle_complete,
             on_copy_click=self.on_copy_click,
-            on_item_added=self.on_item_added
+            on_item_added=self.on_item_added,
+            on_search=self.on_search
         )
         
-        self.todo_list = TodoList(self.main_frame, callbacks=callbacks)
+        self.todo_list = TodoList(self.main_frame, callbacks=callbacks, virtual=True,
+                                  scheduler=self.render)
         self.todo_list.pack(fill='both', expand=True, pady=(5, 0))
         
         # Set initial mode
         self.todo_list.set_mode(self.state.get('settings', {}).get('mode', 'todo'))
         
-        # Load initial todos
+        # Load initial todos; the clipboard history is shown once loaded
+        if not self._history_mode():
+            self._show_chapter()
+    
+    def _show_chapter(self) -> None:
+        """Fill the list with the current chapter's items"""
         current_chapter = self.state.get('current_chapter', 'General')
         todos = self.state.get('todos', {}).get(current_chapter, [])
-        self.todo_list.update_items([(t.text, t.completed, t.created_at) for t in todos])
+        self.todo_list.update_items([(t.text, t.completed, t.created_at) for t in todos],
+                                   keys=list(item_ids(todos)))
+    
+    def _update_status(self) -> None:
+        """Show the item count of what the list displays, at the end of the tick"""
+        self.render.mark('status', self._draw_status)
+    
+    def _set_status(self, message: str) -> None:
+        """Show a message in the status bar, at the end of the tick"""
+        self.render.mark('status', lambda: self._status.set(message))
+    
+    def _draw_status(self) -> None:
+        if self._history_mode() and self.clipboard_history is not None:
+            self._status.set(f"Clipboard history: {len(self.clipboard_history)} entries")
+            return
+        self._status.set(self._progress_text())
+    
+    def _progress_text(self) -> str:
+        """Counts of the current chapter and the book, from the model's counters"""
+        stats = self.model.stats
+        current_chapter = self.model.current_chapter
+        return (f"{current_chapter}: {stats.chapter(current_chapter).describe()}"
+                f"  |  Book: {stats.book.describe()}")
     
     def _update_from_state(self) -> None:
         """Update UI from current state"""
-        # Apply theme
+        # Plain colors for the first frame; the full theme is applied once
+        # the window is up
         theme = self.state.get('settings', {}).get('theme', 'light')
-        self.theme_manager.set_theme(theme)
+        self.theme_manager.set_basic_theme(theme)
         
         # Update status
-        current_chapter = self.state.get('current_chapter', 'General')
-        todo_count = len(self.state.get('todos', {}).get(current_chapter, []))
-        self.status_var.set(f"{current_chapter}: {todo_count} items")
+        self.status_var.set(self._progress_text())
+    
+    def _index_path(self) -> Path:
+        """Search index file kept next to the data file"""
+        return self.storage.data_path.with_suffix('.index')
     
     def _register_hotkey(self) -> None:
         """Register global hotkey if enabled"""
@@ -120,7 +390,12 @@ class MainWindow:
             
         if self.state.get('settings', {}).get('hotkey_enabled', True):
             try:
+                # Imported here: installing the keyboard hook is slow and
+                # not needed for the first frame
+                import keyboard as kb
                 kb.add_hotkey('ctrl+space', self.toggle_visibility)
+                # The keyboard hook runs on its own thread; hop to Tk's
+                kb.add_hotkey(PALETTE_HOTKEY, lambda: self.root.after(0, self.palette.open))
                 self._hotkey_registered = True
             except Exception as e:
                 print(f"Failed to register hotkey: {e}")
@@ -129,11 +404,178 @@ class MainWindow:
         """Unregister global hotkey"""
         if self._hotkey_registered:
             try:
+                import keyboard as kb
                 kb.remove_hotkey('ctrl+space')
+                kb.remove_hotkey(PALETTE_HOTKEY)
                 self._hotkey_registered = False
             except Exception as e:
                 print(f"Failed to unregister hotkey: {e}")
     
+    def _warm_search_index(self) -> None:
+        """Build the search index once background chapter loads are done"""
+        if not all(future.done() for future in self._prefetch):
+            self.root.after(50, self._warm_search_index)
+            return
+        self._verify_stats()
+        self._build_search_index()
+    
+    def _build_search_index(self) -> None:
+        """Load or build the search index on a worker thread, once"""
+        if self._search_index is not None or self._index_future is not None:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        
+        self._finish_loading()
+        # Pending events are already in the state the copy is taken from
+        self.model.flush()
+        todos = self.state.get('todos', {})
+        snapshot = snapshot_state(self.state, list(todos))
+        self._index_backlog = []
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-index')
+        self._index_future = executor.submit(SearchIndex.load_or_build, snapshot, self._index_path())
+        executor.shutdown(wait=False)
+        self._poll_search_index()
+    
+    def _poll_search_index(self) -> None:
+        if not self._index_future.done():
+            self.root.after(50, self._poll_search_index)
+            return
+        self.model.flush()
+        try:
+            index = self._index_future.result()
+            # Point it at the live state and catch up on changes made meanwhile
+            index.state = self.state
+            index.apply(self._index_backlog)
+        except Exception as e:
+            print(f"Error building search index: {e}")
+            index = SearchIndex.build(self.state)
+        self._index_future = None
+        self._index_backlog = None
+        self._search_index = index
+        if self.profile:
+            self.profile.mark('search_ready')
+            self.profile.print_report()
+        if self._pending_search is not None:
+            self.on_search(self._pending_search)
+        self._start_archiving()
+    
+    # Archive
+    def _get_archive(self) -> Archive:
+        if self._archive is None:
+            self._archive = Archive(self.storage.data_path.with_name('todo_archive'))
+        return self._archive
+    
+    def _start_archiving(self) -> None:
+        """Queue every chapter for an archiving pass; one chapter is done per idle tick"""
+        self._archive_job = None
+        days = self.state.get('settings', {}).get('archive_after_days', ARCHIVE_AFTER_DAYS)
+        cutoff = archive_cutoff(days)
+        if cutoff is not None:
+            self._archive_queue = deque(self.state.get('chapters', []))
+            self.root.after_idle(self._archive_step, cutoff)
+    
+    def _archive_step(self, cutoff: str) -> None:
+        """Move one batch of a chapter's cold items to the archive"""
+        if not self._archive_queue:
+            self._archive_job = self.root.after(self.ARCHIVE_CHECK_MS, self._start_archiving)
+            return
+        chapter = self._archive_queue.popleft()
+        todos = self.state.get('todos', {})
+        stats = self.model.stats
+        # Only completed items are archived; the counters spare walking the
+        # chapters without any (an uncounted chapter is walked to be sure)
+        if chapter in todos and (chapter not in stats.entries or stats.chapter(chapter).completed):
+            keep, cold = split_cold(todos[chapter], cutoff)
+            if cold:
+                self._archive_items(chapter, keep, cold)
+            if len(cold) == SEGMENT_ITEMS:
+                # More left than one batch; the rest follows next tick
+                self._archive_queue.appendleft(chapter)
+        self.root.after_idle(self._archive_step, cutoff)
+    
+    def _archive_items(self, chapter: str, keep: list, cold: List[TodoItem]) -> None:
+        """Write ``cold`` to the archive, then drop it from the chapter.
+        
+        The archive is written and fsynced first, on this thread, so the
+        removal is only queued once the items are safely on disk.
+        """
+        try:
+            self._get_archive().add(chapter, [item.to_dict() for item in cold])
+        except IOError as e:
+            print(f"Error archiving items of {chapter}: {e}")
+            return
+        removed = {item.id: self.model.find(chapter, item.id) for item in cold}
+        self.model.replace_chapter(chapter, self.storage.new_items(keep))
+        # Storage gets the IDs only, not the chapter
+        self._persist('remove_items', chapter, list(removed))
+        self.history.items_removed(chapter, removed, self.state['todos'][chapter])
+        if self.metrics:
+            self.metrics.count('archive.items', len(cold))
+    
+    def _search_archive(self, query: str) -> None:
+        """Show archived items matching ``query``; scans the compressed segments"""
+        matches = self._get_archive().search(query, limit=500)
+        self.todo_list.show_results([(chapter, (item.text, item.completed, item.created_at))
+                                     for chapter, item in matches],
+                                    keys=[('archive', chapter, item.id) for chapter, item in matches])
+        self._set_status(f"Archive: {len(matches)} results")
+    
+    # Clipboard history
+    def _history_mode(self) -> bool:
+        return self.state.get('settings', {}).get('mode', 'todo') == 'history'
+    
+    def _enter_history(self) -> None:
+        """Load the history, show it and start watching the clipboard"""
+        if self.clipboard_history is None:
+            directory = self.storage.data_path.with_name('clipboard_history')
+            self.clipboard_history = ClipboardHistory(directory).load()
+            self.clipboard_watcher = ClipboardWatcher(self.root, self.on_clipboard_change)
+            # Copies usually happen in other windows; check as soon as we are back
+            self.root.bind('<FocusIn>', lambda e: self.clipboard_watcher.poke(), add='+')
+        self._show_history()
+        self.clipboard_watcher.start()
+        self._update_status()
+    
+    def _leave_history(self) -> None:
+        if self.clipboard_watcher is not None and self.clipboard_watcher.running:
+            self.clipboard_watcher.stop()
+            self._show_chapter()
+        self._update_status()
+    
+    def _show_history(self) -> None:
+        entries = self.clipboard_history.entries()
+        self.todo_list.update_items([(e.text, False, _timestamp(e.captured_at)) for e in entries],
+                                   keys=[e.digest for e in entries])
+    
+    def on_clipboard_change(self, text: str) -> None:
+        """Record a clipboard capture and show it"""
+        before = len(self.clipboard_history)
+        entry = self.clipboard_history.add(text)
+        if entry is None:
+            return
+        if len(self.clipboard_history) == before + 1:
+            self.todo_list.add_item(entry.text, False, _timestamp(entry.captured_at), key=entry.digest)
+        else:
+            # A repeat moved to the end or old entries were evicted
+            self._show_history()
+        self._update_status()
+    
+    def _get_matcher(self) -> FuzzyMatcher:
+        """Fuzzy matcher over every stored entry, built on first use"""
+        if self._matcher is None:
+            self._finish_loading()
+            self.model.flush()
+            self._matcher = FuzzyMatcher(
+                item.text for items in self.state.get('todos', {}).values() for item in items
+            )
+        return self._matcher
+    
+    def copy_to_clipboard(self, text: str) -> None:
+        """Put text on the system clipboard"""
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text)
+        self._set_status(f"Copied to clipboard: {text[:30]}...")
+    
     def toggle_visibility(self) -> None:
         """Toggle window visibility"""
         if self.root.state() == 'withdrawn':
@@ -143,93 +585,367 @@ class MainWindow:
         else:
             self.root.withdraw()
     
+    def _sync_settings(self) -> None:
+        """Copy menu settings into the state"""
+        self.model.update_settings(self.menu_bar.get_state())
+    
     def save_state(self) -> None:
-        """Save current state to storage"""
-        # Update settings from menu
-        menu_state = self.menu_bar.get_state()
-        if 'settings' not in self.state:
-            self.state['settings'] = {}
-        self.state['settings'].update(menu_state)
+        """Queue a save of what the storage does not have yet.
+        
+        Incremental backends were handed every change as it was made, so
+        only the settings and current chapter are left to write; the others
+        get a full save of the current state on the writer thread.
+        """
+        if self.storage.incremental:
+            self.save_settings()
+            return
+        self._sync_settings()
+        self._finish_loading()
+        self.writer.request_save(snapshot_state(self.state))
+    
+    def save_settings(self) -> None:
+        """Persist only the settings through the storage's incremental path"""
+        self._sync_settings()
+        self._persist('update_settings')
+    
+    def _persist(self, hook: str, *args: Any) -> None:
+        """Hand a change to the writer thread.
         
-        # Save to storage
-        self.storage.save(self.state)
+        Incremental backends get the matching hook call, with a snapshot of
+        the state as it is now: the hook runs after later changes were made
+        to the live state. For the others a full save is requested so bursts
+        of changes coalesce into one write.
+        """
+        self._finish_loading()
+        if self.metrics:
+            self.metrics.count(f'persist.{hook}')
+        if self.storage.incremental:
+            # Only hooks that write a whole chapter need its items copied
+            chapters = []
+            if args and (hook == 'replace_chapter' or self.storage.hooks_write_chapter):
+                chapters = [args[0]]
+            self.writer.submit(getattr(self.storage, hook), snapshot_state(self.state, chapters), *args)
+            self._save_snapshot_if_wanted()
+        else:
+            self.writer.request_save(snapshot_state(self.state))
+        if args and self.storage.external_sync:
+            # After the request, so the mark never predates the snapshot
+            self.storage.mark_changed(args[0])
+    
+    def _save_snapshot_if_wanted(self) -> None:
+        """Queue the full save an incremental backend asked for (journal
+        compaction), behind the changes queued so far and from a snapshot
+        taken now, so it holds exactly those changes"""
+        if self._snapshot_queued or not self.storage.wants_snapshot():
+            return
+        self._snapshot_queued = True
+        self.writer.submit(self._save_snapshot, snapshot_state(self.state))
+    
+    def _save_snapshot(self, state) -> None:
+        # Writer thread
+        try:
+            self.storage.save(state)
+        finally:
+            self._snapshot_queued = False
     
     # Event handlers
+    # The menu handlers only store the setting; _apply_settings acts on it
     def on_mode_change(self, mode: str) -> None:
-        """Handle mode change (todo/clipboard)"""
-        self.todo_list.set_mode(mode)
-        self.save_state()
+        """Handle mode change (todo/clipboard/history)"""
+        self.save_settings()
     
     def on_theme_change(self, theme: str) -> None:
         """Handle theme change"""
-        self.theme_manager.set_theme(theme)
-        self.save_state()
+        self.save_settings()
     
     def on_toggle_hotkey(self, enabled: bool) -> None:
         """Handle hotkey toggle"""
-        if enabled:
-            self._register_hotkey()
-        else:
-            self._unregister_hotkey()
-        self.save_state()
+        self.save_settings()
     
     def on_clear_all(self) -> None:
         """Handle clear all action"""
+        if self._history_mode() and self.clipboard_history is not None:
+            if messagebox.askyesno("Clear All", "Are you sure you want to clear the clipboard history?"):
+                self.clipboard_history.clear()
+                self.todo_list.clear()
+                self._update_status()
+            return
         if messagebox.askyesno("Clear All", "Are you sure you want to clear all tasks?"):
             current_chapter = self.state.get('current_chapter', 'General')
             if current_chapter in self.state.get('todos', {}):
-                self.state['todos'][current_chapter] = []
-                self.todo_list.clear()
-                self.save_state()
-                self.status_var.set(f"{current_chapter}: 0 items")
+                cleared = self.state['todos'][current_chapter]
+                self._clear_chapter(current_chapter)
+                self.history.record(ChapterCleared(current_chapter, cleared))
     
-    def on_toggle_complete(self, index: int) -> None:
+    def on_import(self) -> None:
+        """Import a txt/md/csv/jsonl file into the current chapter"""
+        if self._history_mode():
+            return
+        path = filedialog.askopenfilename(title="Import into Chapter", filetypes=self.TRANSFER_FILETYPES)
+        if not path:
+            return
+        chapter = self.state.get('current_chapter', 'General')
+        self._finish_loading()
+        try:
+            count = transfer.import_into(self.state, chapter, transfer.read_items(Path(path)),
+                                         self.storage.new_items)
+        except (ValueError, IOError) as e:
+            # Lines read before the error stay in the chapter and are saved
+            print(f"Error importing {path}: {e}")
+            messagebox.showerror("Import", f"Could not import {Path(path).name}:\n{e}")
+            count = None
+        # Undo deltas assume the chapter ends with the last item added by hand
+        self.history.clear()
+        self.model.chapter_changed(chapter)
+        self._persist('replace_chapter', chapter)
+        if count is not None:
+            self._set_status(f"Imported {count} items into {chapter}")
+    
+    def on_export(self) -> None:
+        """Write the current chapter to a txt/md/csv/jsonl file"""
+        chapter = self.state.get('current_chapter', 'General')
+        path = filedialog.asksaveasfilename(title="Export Chapter", initialfile=f"{chapter}.md",
+                                            defaultextension='.md', filetypes=self.TRANSFER_FILETYPES)
+        if not path:
+            return
+        try:
+            count = transfer.write_items(Path(path), self.state.get('todos', {}).get(chapter, []),
+                                         chapter=chapter)
+        except (ValueError, IOError) as e:
+            print(f"Error exporting {path}: {e}")
+            messagebox.showerror("Export", f"Could not export {Path(path).name}:\n{e}")
+            return
+        self._set_status(f"Exported {count} items to {Path(path).name}")
+    
+    def on_toggle_complete(self, item_id: int) -> None:
         """Handle todo completion toggle"""
-        current_chapter = self.state.get('current_chapter', 'General')
-        if current_chapter in self.state.get('todos', {}):
-            todos = self.state['todos'][current_chapter]
-            if 0 <= index < len(todos):
-                todos[index].completed = not todos[index].completed
-                self.save_state()
-    
-    def on_copy_click(self, index: int) -> None:
-        """Handle copy button click"""
-        current_chapter = self.state.get('current_chapter', 'General')
-        if current_chapter in self.state.get('todos', {}):
-            todos = self.state['todos'][current_chapter]
-            if 0 <= index < len(todos):
-                text = todos[index].text
-                self.root.clipboard_clear()
-                self.root.clipboard_append(text)
-                self.status_var.set(f"Copied to clipboard: {text[:30]}...")
+        current_chapter = self.model.current_chapter
+        index = self.model.find(current_chapter, item_id)
+        if index is not None:
+            self._toggle_item(current_chapter, index)
+            self.history.record(ItemToggled(current_chapter, index))
+    
+    def on_copy_click(self, key) -> None:
+        """Handle copy button click; ``key`` is an item ID or a history entry digest"""
+        if self._history_mode() and self.clipboard_history is not None:
+            entry = self.clipboard_history.get(key)
+            if entry is not None:
+                self.copy_to_clipboard(entry.text)
+            return
+        current_chapter = self.model.current_chapter
+        index = self.model.find(current_chapter, key)
+        if index is not None:
+            self.copy_to_clipboard(self.state['todos'][current_chapter][index].text)
     
     def on_item_added(self, text: str) -> None:
         """Handle new todo item added"""
         import datetime
         
-        current_chapter = self.state.get('current_chapter', 'General')
-        if current_chapter not in self.state.get('todos', {}):
-            self.state['todos'][current_chapter] = []
+        if self._history_mode() and self.clipboard_history is not None:
+            # Typed entries go into the history like a capture
+            self.on_clipboard_change(text)
+            return
         
+        current_chapter = self.state.get('current_chapter', 'General')
         todo = TodoItem(
             text=text,
             completed=False,
             created_at=datetime.datetime.now().isoformat()
         )
+        self._append_item(current_chapter, todo)
+        self.history.record(ItemAdded(current_chapter, todo))
         
-        self.state['todos'][current_chapter].append(todo)
-        self.todo_list.add_item(text, False, todo.created_at)
+    # Changes shared by the handlers and undo/redo: each goes through the
+    # model, whose events update the views, and on to storage
+    # Storage hooks get the change by value: the item may be toggled or
+    # moved before the writer thread gets to it
+    def _append_item(self, chapter: str, todo: TodoItem) -> None:
+        self.model.add_item(chapter, todo)
+        self._persist('add_item', chapter, TodoItem(todo.text, todo.completed, todo.created_at, todo.id))
         
-        # Update status
-        todo_count = len(self.state['todos'][current_chapter])
-        self.status_var.set(f"{current_chapter}: {todo_count} items")
+    def _remove_last_item(self, chapter: str) -> None:
+        item_id = self.state['todos'][chapter][-1].id
+        self.model.remove_last(chapter)
+        self._persist('remove_item', chapter, item_id)
         
-        self.save_state()
+    def _toggle_item(self, chapter: str, index: int) -> None:
+        item_id = self.state['todos'][chapter][index].id
+        completed = self.model.toggle_item(chapter, index)
+        self._persist('toggle_item', chapter, item_id, completed)
+    
+    def _clear_chapter(self, chapter: str) -> None:
+        self.model.clear_chapter(chapter)
+        self._persist('clear_chapter', chapter)
+    
+    def _restore_chapter(self, chapter: str, items) -> None:
+        self.model.replace_chapter(chapter, items)
+        self._persist('replace_chapter', chapter)
+    
+    # Model subscribers
+    def _apply_settings(self, batch: List[events.Event]) -> None:
+        """Act on changed settings: theme, global hotkeys and the list mode"""
+        changed = events.last_settings(batch)
+        if 'theme' in changed:
+            self.theme_manager.set_theme(changed['theme'])
+        if 'hotkey_enabled' in changed:
+            if changed['hotkey_enabled']:
+                self._register_hotkey()
+            else:
+                self._unregister_hotkey()
+        if 'mode' in changed:
+            self.todo_list.set_mode(changed['mode'])
+            if changed['mode'] == 'history':
+                self._enter_history()
+            else:
+                self._leave_history()
+    
+    def _apply_to_list(self, batch: List[events.Event]) -> None:
+        """Apply a batch to the list row by row; re-read the chapter only
+        when it was switched or replaced"""
+        if self._history_mode() or 'mode' in events.last_settings(batch):
+            # The list shows the clipboard history, or _apply_settings redraws it
+            return
+        shown = self.model.current_chapter
+        for event in batch:
+            if isinstance(event, events.ChapterSwitched) or (
+                    isinstance(event, events.ChapterReplaced) and event.chapter == shown):
+                # Reads the state after the whole batch
+                self._show_chapter()
+                return
+            if events.chapter_of(event) != shown:
+                continue
+            if isinstance(event, events.ItemAdded):
+                item = event.item
+                self.todo_list.add_item(item.text, item.completed, item.created_at, key=item.id)
+            elif isinstance(event, events.ItemRemoved):
+                self.todo_list.remove_last()
+            elif isinstance(event, events.ItemToggled):
+                self.todo_list.set_completed(event.item_id, event.completed)
+            elif isinstance(event, (events.ChapterCleared, events.ChapterDeleted)):
+                self.todo_list.clear()
+    
+    # Events after which the palette's matcher is rebuilt on next use
+    _MATCHER_RESETS = (events.ItemRemoved, events.ChapterCleared, events.ChapterReplaced,
+                       events.ChapterDeleted)
+    
+    def _apply_to_search(self, batch: List[events.Event]) -> None:
+        """Keep the search index and the palette's matcher in step with the model"""
+        if self._search_index is not None:
+            self._search_index.apply(batch)
+        elif self._index_backlog is not None:
+            self._index_backlog.extend(batch)
+        if self._matcher is None:
+            return
+        if any(isinstance(event, self._MATCHER_RESETS) for event in batch):
+            self._matcher = None
+        else:
+            added = [event.item.text for event in batch if isinstance(event, events.ItemAdded)]
+            if added:
+                self._matcher.extend(added)
+    
+    # Undo/redo
+    def undo(self) -> None:
+        """Reverse the last change to the todos (Ctrl+Z)"""
+        if self._history_mode():
+            return
+        change = self.history.undo()
+        if change is None:
+            self._set_status("Nothing to undo")
+            return
+        if isinstance(change, ItemAdded):
+            self._remove_last_item(change.chapter)
+        elif isinstance(change, ItemToggled):
+            self._toggle_item(change.chapter, change.index)
+        elif isinstance(change, ChapterCleared):
+            self._restore_chapter(change.chapter, change.items)
+    
+    def redo(self) -> None:
+        """Apply the last undone change again (Ctrl+Y)"""
+        if self._history_mode():
+            return
+        change = self.history.redo()
+        if change is None:
+            self._set_status("Nothing to redo")
+            return
+        if isinstance(change, ItemAdded):
+            self._append_item(change.chapter, change.item)
+        elif isinstance(change, ItemToggled):
+            self._toggle_item(change.chapter, change.index)
+        elif isinstance(change, ChapterCleared):
+            self._clear_chapter(change.chapter)
+    
+    # Items a search scans per pass when its terms are too broad for the
+    # index; each further pass scans this many times more
+    SEARCH_SCAN_ITEMS = 2000
+    SEARCH_SCAN_GROWTH = 8
+    
+    def on_search(self, query: str) -> None:
+        """Show items from every chapter matching the search box"""
+        self._pending_search = None
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+            self._search_job = None
+        if not query:
+            self._update_status()
+            return
+        
+        rest = archive_query(query)
+        if rest is not None:
+            self._search_archive(rest)
+            return
+        
+        if self._search_index is None:
+            self._pending_search = query
+            self._set_status("Search: preparing the index...")
+            self._build_search_index()
+            return
+        self._run_search(query, self.SEARCH_SCAN_ITEMS)
+    
+    def _run_search(self, query: str, scan_limit: int) -> None:
+        """One search pass; an incomplete one is repeated with a larger scan when idle"""
+        self._search_job = None
+        # Results point into the state; the index must have seen every change
+        self.model.flush()
+        matches, complete = self._search_index.search(query, limit=500, scan_limit=scan_limit)
+        todos = self.state.get('todos', {})
+        results = []
+        for chapter, index in matches:
+            item = todos[chapter][index]
+            results.append((chapter, (item.text, item.completed, item.created_at)))
+        self.todo_list.show_results(results, keys=matches)
+        if complete:
+            self._set_status(f"Search: {len(matches)} results")
+        else:
+            self._set_status(f"Search: {len(matches)} results so far, searching...")
+            self._search_job = self.root.after(1, self._run_search, query,
+                                               scan_limit * self.SEARCH_SCAN_GROWTH)
     
     def on_close(self) -> None:
         """Handle window close event"""
         self._unregister_hotkey()
+        if self._disk_check_job is not None:
+            self.root.after_cancel(self._disk_check_job)
+        if self._archive_job is not None:
+            self.root.after_cancel(self._archive_job)
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._archive_queue.clear()
+        if self.clipboard_watcher is not None:
+            self.clipboard_watcher.stop()
+            self.clipboard_history.close()
         self.save_state()
+        if self._search_index is not None:
+            self.writer.submit(self._search_index.save, self._index_path())
+        # Drain pending writes before the process exits
+        self.writer.close()
+        self.storage.close()
+        if self.metrics:
+            self._lag_probe.stop()
+            try:
+                self.metrics.dump(self._metrics_path())
+                print(f"Metrics written to {self._metrics_path()}")
+            except IOError as e:
+                print(f"Error saving metrics: {e}")
         self.root.quit()
         self.root.destroy()
     
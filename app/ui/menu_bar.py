@@ -10,6 +10,8 @@ class MenuActions:
     on_clear_all: Callable[[], None]
     on_theme_change: Callable[[str], None]
     on_toggle_hotkey: Callable[[bool], None]
+    on_import: Callable[[], None]
+    on_export: Callable[[], None]
 
 class MenuBar:
     """Application menu bar with all menu items"""
@@ -28,6 +30,12 @@ class MenuBar:
     
     def _setup_menus(self) -> None:
         """Set up all menu items"""
+        # File menu
+        file_menu = tk.Menu(self.menubar, tearoff=0)
+        file_menu.add_command(label="Import into Chapter...", command=self.actions.on_import)
+        file_menu.add_command(label="Export Chapter...", command=self.actions.on_export)
+        self.menubar.add_cascade(label="File", menu=file_menu)
+        
         # Modes menu
         modes_menu = tk.Menu(self.menubar, tearoff=0)
         modes_menu.add_radiobutton(
@@ -42,6 +50,12 @@ class MenuBar:
             variable=self.mode_var,
             command=lambda: self.actions.on_mode_change("clipboard")
         )
+        modes_menu.add_radiobutton(
+            label="Clipboard History", 
+            value="history",
+            variable=self.mode_var,
+            command=lambda: self.actions.on_mode_change("history")
+        )
         self.menubar.add_cascade(label="Modes", menu=modes_menu)
         
         # Clear All menu item
@@ -0,0 +1,113 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, List, Optional
+
+from ..fuzzy import FuzzyMatcher
+
+class QuickPastePalette:
+    """Popup that fuzzy-finds a stored entry and copies it on Enter"""
+
+    MAX_RESULTS = 12
+
+    def __init__(self, root: tk.Tk, get_matcher: Callable[[], FuzzyMatcher],
+                 on_copy: Callable[[str], None]):
+        self.root = root
+        self.get_matcher = get_matcher
+        self.on_copy = on_copy
+        self.window: Optional[tk.Toplevel] = None
+        self._results: List[str] = []
+        self._refine_job: Optional[str] = None
+
+    def _build(self) -> None:
+        """Create the popup the first time it is needed"""
+        self.window = tk.Toplevel(self.root)
+        self.window.withdraw()
+        self.window.overrideredirect(True)
+        self.window.attributes('-topmost', True)
+
+        frame = ttk.Frame(self.window, padding=4, relief='solid')
+        frame.pack(fill='both', expand=True)
+
+        self.query_var = tk.StringVar()
+        self.entry = ttk.Entry(frame, textvariable=self.query_var, width=50)
+        self.entry.pack(fill='x')
+        self.listbox = tk.Listbox(frame, height=self.MAX_RESULTS, activestyle='none',
+                                  exportselection=False)
+        self.listbox.pack(fill='both', expand=True, pady=(4, 0))
+
+        self.query_var.trace_add('write', lambda *args: self._update_results())
+        self.entry.bind('<Return>', self._on_enter)
+        self.entry.bind('<Escape>', lambda e: self.close())
+        self.entry.bind('<Down>', lambda e: self._move_selection(1))
+        self.entry.bind('<Up>', lambda e: self._move_selection(-1))
+        self.listbox.bind('<Double-1>', self._on_enter)
+        self.window.bind('<FocusOut>', self._on_focus_out)
+
+    def open(self) -> None:
+        """Show the palette centered on the screen with an empty query"""
+        if self.window is None:
+            self._build()
+        self.matcher = self.get_matcher()
+        self.query_var.set('')
+        self._update_results()
+
+        self.window.update_idletasks()
+        width, height = self.window.winfo_reqwidth(), self.window.winfo_reqheight()
+        x = (self.window.winfo_screenwidth() - width) // 2
+        y = (self.window.winfo_screenheight() - height) // 3
+        self.window.geometry(f'+{x}+{y}')
+        self.window.deiconify()
+        self.window.lift()
+        self.entry.focus_force()
+
+    def close(self) -> None:
+        self._cancel_refine()
+        if self.window is not None:
+            self.window.withdraw()
+
+    def _update_results(self) -> None:
+        """Re-rank for the current query; unfinished scans continue when idle"""
+        self._cancel_refine()
+        results, complete = self.matcher.search(self.query_var.get(), limit=self.MAX_RESULTS)
+        self._show(results)
+        if not complete:
+            self._refine_job = self.window.after(1, self._update_results)
+
+    def _cancel_refine(self) -> None:
+        if self._refine_job is not None:
+            self.window.after_cancel(self._refine_job)
+            self._refine_job = None
+
+    def _show(self, results) -> None:
+        texts = [entry for _, entry in results]
+        if texts == self._results:
+            return
+        self._results = texts
+        self.listbox.delete(0, 'end')
+        for text in texts:
+            # Keep multi-line entries on one row
+            self.listbox.insert('end', ' '.join(text.split()))
+        if texts:
+            self.listbox.selection_set(0)
+
+    def _move_selection(self, step: int) -> str:
+        if not self._results:
+            return 'break'
+        selection = self.listbox.curselection()
+        index = (selection[0] if selection else 0) + step
+        index = max(0, min(index, len(self._results) - 1))
+        self.listbox.selection_clear(0, 'end')
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return 'break'
+
+    def _on_enter(self, event=None) -> None:
+        selection = self.listbox.curselection()
+        if self._results:
+            self.on_copy(self._results[selection[0] if selection else 0])
+        self.close()
+
+    def _on_focus_out(self, event) -> None:
+        # Focus moving between the entry and the list is not a real focus loss
+        if self.window.focus_get() is None:
+            self.close()
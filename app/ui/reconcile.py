@@ -0,0 +1,154 @@
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+
+# What a row looks like on screen: (text, values, tags)
+Row = Tuple[str, tuple, tuple]
+
+def _stable_positions(sequence: Sequence[int]) -> Set[int]:
+    """Positions in ``sequence`` forming a longest increasing subsequence.
+
+    Kept rows whose new indexes form this subsequence are already in the
+    right relative order and never need a move.
+    """
+    tails: List[int] = []       # index into sequence of the smallest tail per length
+    parents: List[int] = [-1] * len(sequence)
+    for i, value in enumerate(sequence):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sequence[tails[mid]] < value:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0:
+            parents[i] = tails[lo - 1]
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+
+    stable = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        stable.add(i)
+        i = parents[i]
+    return stable
+
+class TreeReconciler:
+    """Keeps the top level of a Treeview in sync with a keyed list of rows.
+
+    Instead of deleting and re-inserting everything, ``reconcile`` compares
+    the previously rendered rows with the new ones by key and issues only the
+    Tk calls needed: one ``delete`` for all removed rows, one ``insert`` per
+    new row, one ``move`` per row that changed order and one ``item`` per row
+    whose text, values or tags changed.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._keys: List[Hashable] = []
+        self._iids: Dict[Hashable, str] = {}
+        # Treeview item id -> key, to map clicked rows back to the model
+        self._by_iid: Dict[str, Hashable] = {}
+        self._rows: Dict[Hashable, Row] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._iids
+
+    @property
+    def keys(self) -> List[Hashable]:
+        return self._keys
+
+    def iid(self, key: Hashable) -> str:
+        """Treeview item id of the row rendered for ``key``"""
+        return self._iids[key]
+
+    def key(self, iid: str) -> Hashable:
+        """Key of the row with Treeview item id ``iid``; raises KeyError"""
+        return self._by_iid[iid]
+
+    def reconcile(self, rows: Sequence[Tuple[Hashable, Row]]) -> Dict[str, int]:
+        """Bring the Treeview in line with ``rows`` and return operation counts"""
+        stats = {'inserted': 0, 'deleted': 0, 'moved': 0, 'updated': 0}
+        new_keys = [key for key, _ in rows]
+        new_index = {key: i for i, key in enumerate(new_keys)}
+        if len(new_index) != len(new_keys):
+            raise ValueError("Row keys must be unique")
+
+        # 1. Drop rows whose key disappeared, in a single call
+        removed = [key for key in self._keys if key not in new_index]
+        if removed:
+            iids = [self._iids.pop(key) for key in removed]
+            self.tree.delete(*iids)
+            for iid in iids:
+                del self._by_iid[iid]
+            for key in removed:
+                del self._rows[key]
+            stats['deleted'] = len(removed)
+
+        # 2. Kept rows on the longest increasing run of new indexes stay put;
+        #    the others are detached and re-attached at their new position
+        kept = [key for key in self._keys if key in new_index]
+        stable_at = _stable_positions([new_index[key] for key in kept])
+        stable = {kept[i] for i in stable_at}
+        unstable = [self._iids[key] for key in kept if key not in stable]
+        if unstable:
+            self.tree.detach(*unstable)
+
+        # 3. Walk the new order. Everything before index i is already in
+        #    place, and the next stable row (if any) sits right at i.
+        for i, (key, row) in enumerate(rows):
+            if key not in self._iids:
+                text, values, tags = row
+                iid = self._iids[key] = self.tree.insert('', i, text=text, values=values, tags=tags)
+                self._by_iid[iid] = key
+                self._rows[key] = row
+                stats['inserted'] += 1
+                continue
+            if key not in stable:
+                self.tree.move(self._iids[key], '', i)
+                stats['moved'] += 1
+            if self._rows[key] != row:
+                self._apply(key, row)
+                stats['updated'] += 1
+
+        self._keys = new_keys
+        return stats
+
+    def append(self, key: Hashable, row: Row) -> None:
+        """Fast path for adding one row at the end"""
+        if key in self._iids:
+            raise ValueError(f"Duplicate row key: {key!r}")
+        text, values, tags = row
+        iid = self._iids[key] = self.tree.insert('', 'end', text=text, values=values, tags=tags)
+        self._by_iid[iid] = key
+        self._rows[key] = row
+        self._keys.append(key)
+
+    def pop(self) -> None:
+        """Fast path for removing the last row"""
+        key = self._keys.pop()
+        iid = self._iids.pop(key)
+        self.tree.delete(iid)
+        del self._by_iid[iid]
+        del self._rows[key]
+    
+    def update(self, key: Hashable, row: Row) -> None:
+        """Fast path for re-rendering a single row"""
+        if self._rows.get(key) != row:
+            self._apply(key, row)
+
+    def clear(self) -> None:
+        if self._keys:
+            self.tree.delete(*(self._iids[key] for key in self._keys))
+        self._keys = []
+        self._iids.clear()
+        self._by_iid.clear()
+        self._rows.clear()
+
+    def _apply(self, key: Hashable, row: Row) -> None:
+        text, values, tags = row
+        self.tree.item(self._iids[key], text=text, values=values, tags=tags)
+        self._rows[key] = row
@@ -0,0 +1,105 @@
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class TkCallCounter(Counter):
+    """Tk calls by ``Widget.method``, for the debug panel and benchmarks"""
+
+    @property
+    def total(self) -> int:
+        return sum(self.values())
+
+class CountingProxy:
+    """Stands in for a widget, counting each method call in ``counts``.
+
+    Attribute lookups are forwarded; the counting wrapper for a method is
+    built on first use and cached on the proxy, so later calls cost one
+    extra Python call.
+    """
+
+    def __init__(self, widget: Any, counts: TkCallCounter, name: str):
+        self._widget = widget
+        self._counts = counts
+        self._name = name
+
+    @property
+    def widget(self) -> Any:
+        return self._widget
+
+    def __getattr__(self, attribute: str):
+        value = getattr(self._widget, attribute)
+        if not callable(value):
+            return value
+        counts, key = self._counts, f'{self._name}.{attribute}'
+
+        def call(*args, **kwargs):
+            counts[key] += 1
+            return value(*args, **kwargs)
+        setattr(self, attribute, call)
+        return call
+
+    def __getitem__(self, key):
+        return self._widget[key]
+
+    def __setitem__(self, key, value) -> None:
+        self._widget[key] = value
+
+    def __str__(self) -> str:
+        return str(self._widget)
+
+class RenderScheduler:
+    """Applies widget updates once per event-loop tick.
+
+    Handlers change the model and ``mark`` the region of the screen that
+    shows it, passing the function that redraws it. The first mark of a
+    tick schedules a single ``after_idle`` flush; marking a region again
+    before then only replaces its redraw function, so ten changes to the
+    list in one tick cost one redraw. Regions are redrawn in the order
+    they were first marked.
+
+    ``tk_calls`` counts the Tk calls made through ``CountingProxy`` widgets
+    sharing it; with ``metrics`` each flush also adds them to the
+    ``render.*`` counters.
+    """
+
+    def __init__(self, widget, metrics=None):
+        self.widget = widget
+        self.metrics = metrics
+        self.tk_calls = TkCallCounter()
+        self.marks = 0
+        self.flushes = 0
+        self._flushed_marks = 0
+        self._pending: Dict[Hashable, Callable[[], None]] = {}
+        self._job: Optional[str] = None
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._pending)
+
+    def mark(self, region: Hashable, redraw: Callable[[], None]) -> None:
+        """Redraw ``region`` with ``redraw`` at the end of this tick"""
+        self.marks += 1
+        self._pending[region] = redraw
+        if self._job is None:
+            self._job = self.widget.after_idle(self._run)
+
+    def _run(self) -> None:
+        self._job = None
+        self.flush()
+
+    def flush(self) -> None:
+        """Redraw every marked region now, e.g. before mapping a click to a row"""
+        if not self._pending:
+            return
+        before = self.tk_calls.total
+        # Redraws may mark other regions (model events mark the list and the
+        # status bar); those are drawn in this flush too
+        while self._pending:
+            pending, self._pending = self._pending, {}
+            for redraw in pending.values():
+                redraw()
+        self.flushes += 1
+        if self.metrics:
+            self.metrics.count('render.flushes')
+            self.metrics.count('render.marks', self.marks - self._flushed_marks)
+            self.metrics.count('render.tk_calls', self.tk_calls.total - before)
+        self._flushed_marks = self.marks
@@ -2,11 +2,22 @@ import tkinter as tk
 from tkinter import ttk
 from typing import Literal, Optional
 
-# Try to import sv_ttk for modern theming
-try:
-    import sv_ttk
-except ImportError:
-    sv_ttk = None
+# sv_ttk (modern theming) is imported on first use; it is slow to import
+# and not needed for the first frame
+_sv_ttk = None
+_sv_ttk_loaded = False
+
+def _load_sv_ttk():
+    """Import sv_ttk once, or return None if it is not installed"""
+    global _sv_ttk, _sv_ttk_loaded
+    if not _sv_ttk_loaded:
+        try:
+            import sv_ttk
+            _sv_ttk = sv_ttk
+        except ImportError:
+            _sv_ttk = None
+        _sv_ttk_loaded = True
+    return _sv_ttk
 
 class ThemeManager:
     """Manages application theming and styling"""
@@ -22,6 +33,7 @@ class ThemeManager:
         self.current_theme = theme_name
         
         # Use sv_ttk if available, otherwise fall back to basic theming
+        sv_ttk = _load_sv_ttk()
         if sv_ttk:
             try:
                 sv_ttk.set_theme(theme_name)
@@ -29,7 +41,11 @@ class ThemeManager:
             except Exception:
                 pass
         
-        # Fallback theming
+        self.set_basic_theme(theme_name)
+    
+    def set_basic_theme(self, theme_name: Literal['light', 'dark']) -> None:
+        """Apply plain ttk colors; cheap enough for the first frame"""
+        self.current_theme = theme_name
         bg_color = '#f0f0f0' if theme_name == 'light' else '#1e1e1e'
         fg_color = '#000000' if theme_name == 'light' else '#ffffff'
         
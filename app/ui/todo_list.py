@@ -1,55 +1,122 @@
 import tkinter as tk
 from tkinter import ttk
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Set, Tuple
 from dataclasses import dataclass
 
-@dataclass
-class TodoItem:
-    text: str
-    completed: bool
-    created_at: str
+from ..models import TodoItem
+from .reconcile import Row, TreeReconciler
+from .scheduler import CountingProxy, RenderScheduler
 
 @dataclass
 class TodoListCallbacks:
-    on_toggle_complete: Callable[[int], None]
-    on_copy_click: Callable[[int], None]
+    # Called with the key the clicked item was added with (see add_item)
+    on_toggle_complete: Callable[[Hashable], None]
+    on_copy_click: Callable[[Hashable], None]
     on_item_added: Callable[[str], None]
+    # Called with the search box text on every change; '' ends the search
+    on_search: Optional[Callable[[str], None]] = None
 
 class TodoList(ttk.Frame):
-    """A list of todo items with copy functionality"""
+    """A list of todo items with copy functionality
+    
+    With ``virtual=True`` the Treeview only holds the rows that fit in the
+    viewport plus a small overscan. The items live in ``self._items`` and
+    scrolling re-fills the same few rows, so the number of Tk calls and the
+    Tcl memory no longer depend on the chapter size.
+    
+    Otherwise every row is materialized and kept in sync by a keyed
+    ``TreeReconciler``, so updates cost Tk calls proportional to what
+    changed rather than to the list size.
+    
+    Changes update the model right away but reach the Treeview on the next
+    ``RenderScheduler`` flush (shared with the rest of the window when one
+    is passed in), so a burst of changes in one tick is drawn once.
     
-    def __init__(self, parent, callbacks: TodoListCallbacks, **kwargs):
+    Every item has a key, and clicks are reported by key: a clicked row is
+    mapped to its item through hash maps (row to key, key to position), so
+    the lookup costs the same at any list size.
+    """
+    
+    OVERSCAN = 2
+    # Modes that show the copy column
+    COPY_MODES = ('clipboard', 'history')
+    
+    def __init__(self, parent, callbacks: TodoListCallbacks, virtual: bool = False,
+                 scheduler: Optional[RenderScheduler] = None, **kwargs):
         super().__init__(parent, **kwargs)
         self.callbacks = callbacks
-        self.current_mode = 'todo'  # 'todo' or 'clipboard'
+        self.scheduler = scheduler or RenderScheduler(self)
+        self.current_mode = 'todo'  # 'todo', 'clipboard' or 'history'
+        self.virtual = virtual
+        self._items: List[Tuple[str, bool, str]] = []
+        self._keys: List[Hashable] = []
+        # Key -> index in _items; built on first use after the items are
+        # replaced, then kept up to date by appends and pops
+        self._positions: Optional[Dict[Hashable, int]] = None
+        # Virtual mode: index of the first visible item and the number of
+        # rows that fit in the viewport
+        self._offset = 0
+        self._visible_rows = 15
+        self._rows: List[str] = []
+        self._slots: Dict[str, int] = {}
+        self._row_cache: Dict[str, Row] = {}
+        # While search results are shown the chapter's items are parked here
+        self._searching = False
+        self._suppress_search = False
+        self._parked: Optional[Tuple[List[Tuple[str, bool, str]], List[Hashable], int]] = None
+        self._result_texts: List[str] = []
+        # What the next flush has to draw: everything, or the rows popped,
+        # changed and appended since the last one
+        self._full_redraw = False
+        self._popped = 0
+        self._dirty_rows: Set[int] = set()
+        self._appended = 0
         self._setup_ui()
+        self._reconciler = TreeReconciler(self.tree)
     
     def _setup_ui(self) -> None:
         """Initialize the UI components"""
         # Configure grid weights
         self.columnconfigure(0, weight=1)
-        self.rowconfigure(1, weight=1)
+        self.rowconfigure(2, weight=1)
+        
+        # Search box, results update as you type
+        self.search_var = tk.StringVar()
+        if self.callbacks.on_search is not None:
+            self.search_entry = ttk.Entry(self, textvariable=self.search_var)
+            self.search_entry.grid(row=0, column=0, columnspan=2, sticky='ew', padx=2, pady=2)
+            self.search_entry.bind('<Escape>', lambda e: self.search_var.set(''))
+            self.search_var.trace_add('write', self._on_search_changed)
         
         # Entry for new todos
         self.entry = ttk.Entry(self)
-        self.entry.grid(row=0, column=0, sticky='ew', padx=2, pady=2)
+        self.entry.grid(row=1, column=0, sticky='ew', padx=2, pady=2)
         self.entry.bind('<Return>', self._on_add_todo)
         
         # Scrollbar for the list
-        scrollbar = ttk.Scrollbar(self, orient='vertical')
-        scrollbar.grid(row=1, column=1, sticky='ns')
+        self.scrollbar = ttk.Scrollbar(self, orient='vertical')
+        self.scrollbar.grid(row=2, column=1, sticky='ns')
         
-        # Treeview for todos
-        self.tree = ttk.Treeview(
+        # Treeview for todos; calls through it are counted for the debug panel
+        self.tree = CountingProxy(ttk.Treeview(
             self,
             columns=('copy',),
             show='tree',
             selectmode='browse',
-            yscrollcommand=scrollbar.set,
-            height=15
-        )
-        self.tree.grid(row=1, column=0, sticky='nsew')
-        scrollbar.config(command=self.tree.yview)
+            height=self._visible_rows
+        ), self.scheduler.tk_calls, 'Treeview')
+        self.tree.grid(row=2, column=0, sticky='nsew')
+        
+        if self.virtual:
+            # The scrollbar follows the model, not the Treeview
+            self.scrollbar.config(command=self._on_scrollbar)
+            self.tree.bind('<Configure>', self._on_tree_configure)
+            self.tree.bind('<MouseWheel>', self._on_mousewheel)
+            self.tree.bind('<Button-4>', self._on_mousewheel)
+            self.tree.bind('<Button-5>', self._on_mousewheel)
+        else:
+            self.tree.config(yscrollcommand=self.scrollbar.set)
+            self.scrollbar.config(command=self.tree.yview)
         
         # Configure columns
         self.tree.column('#0', stretch=tk.YES, anchor='w')
@@ -63,73 +130,311 @@ class TodoList(ttk.Frame):
         """Set the display mode (todo or clipboard)"""
         self.current_mode = mode
         self._update_columns()
+        # The copy column content depends on the mode
+        self._invalidate()
     
     def _update_columns(self) -> None:
         """Update the treeview columns based on current mode"""
-        if self.current_mode == 'clipboard':
+        if self.current_mode in self.COPY_MODES:
             self.tree.heading('copy', text='')
             self.tree.column('copy', width=30, stretch=False, anchor='center')
         else:
             self.tree.heading('copy', text='')
             self.tree.column('copy', width=0, stretch=False, minwidth=0)
     
-    def add_item(self, text: str, completed: bool = False, created_at: Optional[str] = None) -> None:
-        """Add a new todo item to the list"""
-        item_id = self.tree.insert('', 'end', text=text, tags=('completed' if completed else 'active',))
-        self.tree.set(item_id, 'copy', '⧉' if self.current_mode == 'clipboard' else '')
+    def add_item(self, text: str, completed: bool = False, created_at: Optional[str] = None,
+                 key: Optional[Hashable] = None) -> None:
+        """Add a new todo item to the list
+        
+        ``key`` identifies the item across updates and in the click
+        callbacks; it defaults to the item's position, which is stable for
+        appends.
+        """
+        item = (text, completed, created_at or '')
+        if self._searching:
+            # The chapter is parked behind the results; update it there
+            items, keys, offset = self._parked
+            items.append(item)
+            keys.append(len(keys) if key is None else key)
+            return
+        
+        key = len(self._items) if key is None else key
+        if self._positions is not None:
+            self._positions[key] = len(self._items)
+        self._items.append(item)
+        self._keys.append(key)
+        self._appended += 1
+        self._schedule()
+    
+    def update_items(self, items: Sequence[Tuple[str, bool, str]],
+                     keys: Optional[Sequence[Hashable]] = None) -> None:
+        """Update the list with new items
         
-        if completed:
-            self.tree.item(item_id, tags=('completed',))
-            self.tree.item(item_id, text=f'✓ {text}')
+        Rows are matched to the previous ones by ``keys`` (positions by
+        default) and only the differences are applied to the Treeview.
+        """
+        self._end_search()
+        self._items = list(items)
+        self._keys = list(keys) if keys is not None else list(range(len(self._items)))
+        self._positions = None
+        self._offset = 0
+        self._invalidate()
     
-    def update_items(self, items: List[Tuple[str, bool, str]]) -> None:
-        """Update the list with new items"""
-        self.tree.delete(*self.tree.get_children())
-        for text, completed, _ in items:
-            self.add_item(text, completed)
+    def set_completed(self, key: Hashable, completed: bool) -> None:
+        """Redraw the item with ``key`` with a new completion flag"""
+        self._end_search()
+        index = self._position(key)
+        if index is None:
+            return
+        text, _, created_at = self._items[index]
+        self._items[index] = (text, completed, created_at)
+        self._dirty_rows.add(index)
+        self._schedule()
+    
+    def remove_last(self) -> None:
+        """Remove the last item"""
+        self._end_search()
+        if not self._items:
+            return
+        self._items.pop()
+        key = self._keys.pop()
+        if self._positions is not None:
+            del self._positions[key]
+        if self._appended:
+            # Never drawn
+            self._appended -= 1
+        else:
+            self._popped += 1
+        self._schedule()
     
     def clear(self) -> None:
         """Clear all items from the list"""
-        self.tree.delete(*self.tree.get_children())
+        self._end_search()
+        self._items = []
+        self._keys = []
+        self._positions = None
+        self._offset = 0
+        self._invalidate()
+    
+    # Search results
+    @property
+    def searching(self) -> bool:
+        return self._searching
+    
+    def show_results(self, results: Sequence[Tuple[str, Tuple[str, bool, str]]],
+                     keys: Sequence[Hashable]) -> None:
+        """Show search results in place of the current chapter
+        
+        ``results`` are (chapter, item) pairs; the chapter's own items come
+        back once the search box is emptied.
+        """
+        if not self._searching:
+            self._parked = (self._items, self._keys, self._offset)
+            self._searching = True
+        self._result_texts = [item[0] for _, item in results]
+        self._items = [(f'{chapter}: {text}', completed, created_at)
+                       for chapter, (text, completed, created_at) in results]
+        self._keys = list(keys)
+        self._positions = None
+        self._offset = 0
+        self._invalidate()
+    
+    def _end_search(self) -> None:
+        """Put the parked chapter items back"""
+        if not self._searching:
+            return
+        self._items, self._keys, self._offset = self._parked
+        self._positions = None
+        self._parked = None
+        self._searching = False
+        self._result_texts = []
+        if self.search_var.get():
+            self._suppress_search = True
+            self.search_var.set('')
+            self._suppress_search = False
+        self._invalidate()
+    
+    def _on_search_changed(self, *args) -> None:
+        if self._suppress_search:
+            return
+        query = self.search_var.get().strip()
+        if not query:
+            self._end_search()
+        self.callbacks.on_search(query)
+    
+    def _row(self, item: Tuple[str, bool, str]) -> Row:
+        """How an item is displayed: (text, values, tags)"""
+        text, completed, _ = item
+        return (
+            f'✓ {text}' if completed else text,
+            ('⧉' if self.current_mode in self.COPY_MODES else '',),
+            ('completed' if completed else 'active',)
+        )
+    
+    # Deferred drawing
+    def _schedule(self) -> None:
+        self.scheduler.mark(self, self._flush)
+    
+    def _invalidate(self) -> None:
+        """Redraw every row on the next flush"""
+        self._full_redraw = True
+        self._schedule()
+    
+    def flush(self) -> None:
+        """Draw pending changes now instead of at the end of the tick"""
+        self.scheduler.flush()
+    
+    def _flush(self) -> None:
+        """Bring the Treeview up to date with the model"""
+        if self.virtual:
+            # Unchanged rows are skipped by the row cache
+            self._render()
+        elif self._full_redraw:
+            self._refresh()
+        else:
+            for _ in range(self._popped):
+                self._reconciler.pop()
+            drawn = len(self._items) - self._appended
+            for index in sorted(self._dirty_rows):
+                if index < drawn:
+                    self._reconciler.update(self._keys[index], self._row(self._items[index]))
+            for index in range(drawn, len(self._items)):
+                self._reconciler.append(self._keys[index], self._row(self._items[index]))
+        self._full_redraw = False
+        self._popped = 0
+        self._dirty_rows.clear()
+        self._appended = 0
+    
+    def _refresh(self) -> None:
+        """Re-render every row from the model, applying only the changes"""
+        if self.virtual:
+            self._render()
+        else:
+            self._reconciler.reconcile([(key, self._row(item)) for key, item in zip(self._keys, self._items)])
+    
+    # Virtual mode
+    def _row_capacity(self) -> int:
+        """Number of Treeview rows kept materialized"""
+        return self._visible_rows + self.OVERSCAN
+    
+    def _render(self) -> None:
+        """Fill the materialized rows from the model starting at the offset"""
+        self._offset = max(0, min(self._offset, len(self._items) - self._visible_rows))
+        window = self._items[self._offset:self._offset + self._row_capacity()]
+        
+        # Grow or shrink the pool of rows to match the window
+        while len(self._rows) < len(window):
+            row_id = self.tree.insert('', 'end')
+            self._slots[row_id] = len(self._rows)
+            self._rows.append(row_id)
+        if len(self._rows) > len(window):
+            self.tree.delete(*self._rows[len(window):])
+            for row_id in self._rows[len(window):]:
+                self._row_cache.pop(row_id, None)
+                del self._slots[row_id]
+            del self._rows[len(window):]
+        
+        for row_id, item in zip(self._rows, window):
+            self._render_row(row_id, item)
+        self._update_scrollbar()
+    
+    def _render_row(self, row_id: str, item: Tuple[str, bool, str]) -> None:
+        """Write one model item into a Treeview row with a single Tk call"""
+        row = self._row(item)
+        if self._row_cache.get(row_id) == row:
+            return
+        text, values, tags = row
+        self.tree.item(row_id, text=text, values=values, tags=tags)
+        self._row_cache[row_id] = row
+    
+    def _update_scrollbar(self) -> None:
+        total = len(self._items)
+        if total <= self._visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._offset / total, (self._offset + self._visible_rows) / total)
+    
+    def scroll_to(self, offset: int) -> None:
+        """Make the item at ``offset`` the first visible one"""
+        offset = max(0, min(offset, len(self._items) - self._visible_rows))
+        if offset != self._offset:
+            self._offset = offset
+            self._schedule()
+    
+    def _on_scrollbar(self, action: str, value: str, unit: Optional[str] = None) -> None:
+        """Translate scrollbar commands into model offsets"""
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self._items)))
+        elif action == 'scroll':
+            step = self._visible_rows if unit == 'pages' else 1
+            self.scroll_to(self._offset + int(value) * step)
+    
+    def _on_mousewheel(self, event) -> str:
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self._offset + delta * 3)
+        # Keep the Treeview from scrolling its own (tiny) content
+        return 'break'
+    
+    def _on_tree_configure(self, event) -> None:
+        """Recompute how many rows fit when the widget is resized"""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 25)
+        visible = max(1, event.height // row_height)
+        if visible != self._visible_rows:
+            self._visible_rows = visible
+            self._schedule()
+    
+    def _position(self, key: Hashable) -> Optional[int]:
+        """Index of the item with ``key``, or None"""
+        if self._positions is None:
+            self._positions = {key: index for index, key in enumerate(self._keys)}
+        return self._positions.get(key)
+    
+    def _model_index(self, row_id: str) -> int:
+        """Map a Treeview row to the index of the item it shows, in O(1)"""
+        if self.virtual:
+            return self._offset + self._slots[row_id]
+        return self._position(self._reconciler.key(row_id))
     
     def _on_add_todo(self, event=None) -> None:
         """Handle adding a new todo"""
         text = self.entry.get().strip()
         if text:
+            # New items go to the chapter, so leave the results view first
+            self._end_search()
             self.callbacks.on_item_added(text)
             self.entry.delete(0, 'end')
     
     def _on_item_double_click(self, event) -> None:
         """Handle double-click on an item (toggle completion)"""
-        if self.current_mode != 'todo':
+        if self.current_mode != 'todo' or self._searching:
             return
             
+        # Rows must show the current model before a click is mapped to an item
+        self.flush()
         item = self.tree.identify_row(event.y)
         if not item:
             return
             
-        # Toggle completion
-        current_tags = self.tree.item(item, 'tags')
-        is_completed = 'completed' in current_tags
+        # Toggle completion in the model and redraw the row
+        index = self._model_index(item)
+        text, completed, created_at = self._items[index]
+        self._items[index] = (text, not completed, created_at)
+        self._dirty_rows.add(index)
+        self._schedule()
         
-        if is_completed:
-            self.tree.item(item, tags=('active',))
-            text = self.tree.item(item, 'text')[2:]  # Remove '✓ '
-            self.tree.item(item, text=text)
-        else:
-            self.tree.item(item, tags=('completed',))
-            text = self.tree.item(item, 'text')
-            self.tree.item(item, text=f'✓ {text}')
-        
-        # Get the index of the item
-        index = self.tree.index(item)
-        self.callbacks.on_toggle_complete(index)
+        self.callbacks.on_toggle_complete(self._keys[index])
     
     def _on_item_click(self, event) -> None:
         """Handle single click on an item (for copy button)"""
-        if self.current_mode != 'clipboard':
+        if self.current_mode not in self.COPY_MODES:
             return
             
+        self.flush()
         region = self.tree.identify_region(event.x, event.y)
         if region != 'cell':
             return
@@ -138,15 +443,16 @@ class TodoList(ttk.Frame):
         item = self.tree.identify_row(event.y)
         
         if column == '#1' and item:  # Clicked on copy column
-            # Get the todo text (without the checkmark if present)
-            text = self.tree.item(item, 'text')
-            if text.startswith('✓ '):
-                text = text[2:]
-                
             # Show visual feedback
             self.tree.set(item, 'copy', '✓')
-            self.after(500, lambda: self.tree.set(item, 'copy', '⧉'))
+            self.after(500, lambda: self.tree.exists(item) and self.tree.set(item, 'copy', '⧉'))
+            
+            index = self._model_index(item)
+            if self._searching:
+                # Results may come from other chapters; copy the text directly
+                self.clipboard_clear()
+                self.clipboard_append(self._result_texts[index])
+                return
             
             # Trigger the copy callback
-            index = self.tree.index(item)
-            self.callbacks.on_copy_click(index)
+            self.callbacks.on_copy_click(self._keys[index])
@@ -0,0 +1,138 @@
+import bisect
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Union
+
+# Changes are deltas: each keeps only what is needed to reverse it, so an
+# add or toggle costs a few objects however large the book is. A cleared
+# chapter keeps its old item container, which is the size of the change.
+
+@dataclass
+class ItemAdded:
+    chapter: str
+    item: Any
+
+    @property
+    def size(self) -> int:
+        return 1
+
+@dataclass
+class ItemToggled:
+    chapter: str
+    index: int
+
+    @property
+    def size(self) -> int:
+        return 1
+
+@dataclass
+class ChapterCleared:
+    chapter: str
+    items: Any   # the container that was replaced, kept as it was
+
+    @property
+    def size(self) -> int:
+        return max(1, len(self.items))
+
+Change = Union[ItemAdded, ItemToggled, ChapterCleared]
+
+class UndoHistory:
+    """Undo and redo stacks of changes.
+
+    At most ``limit`` changes are kept, and together they hold at most
+    ``max_items`` items (a cleared chapter counts its items); beyond either
+    cap the oldest changes are forgotten. Recording a new change drops the
+    redo stack.
+    """
+
+    def __init__(self, limit: int = 200, max_items: int = 100_000):
+        self.limit = limit
+        self.max_items = max_items
+        self._undo: Deque[Change] = deque()
+        self._redo: Deque[Change] = deque()
+        self._held = 0
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    @property
+    def held_items(self) -> int:
+        return self._held
+
+    def record(self, change: Change) -> None:
+        """Remember a change the user just made"""
+        self._held -= sum(redo.size for redo in self._redo)
+        self._redo.clear()
+        self._undo.append(change)
+        self._held += change.size
+        self._trim()
+
+    def undo(self) -> Optional[Change]:
+        """The change to reverse, moved onto the redo stack"""
+        if not self._undo:
+            return None
+        change = self._undo.pop()
+        self._redo.append(change)
+        return change
+
+    def redo(self) -> Optional[Change]:
+        """The change to apply again, moved back onto the undo stack"""
+        if not self._redo:
+            return None
+        change = self._redo.pop()
+        self._undo.append(change)
+        return change
+
+    def items_removed(self, chapter: str, removed: Dict[int, int], items: Any) -> None:
+        """Follow items taken out of ``chapter`` other than by undo (archiving).
+
+        ``removed`` maps each removed item's ID to the position it had and
+        ``items`` is the chapter's container now. Changes to a removed item
+        are forgotten and toggles of later items move up. Changes from before
+        the chapter was last cleared are about other items and stay.
+        """
+        positions = sorted(removed.values())
+        gone = set(positions)
+        for stack in (self._undo, self._redo):
+            kept: Deque[Change] = deque()
+            current = True
+            # Newest first: the top of either stack matches the chapter as it is
+            for change in reversed(stack):
+                if not current or change.chapter != chapter:
+                    kept.appendleft(change)
+                    continue
+                if isinstance(change, ItemToggled):
+                    if change.index in gone:
+                        self._held -= change.size
+                        continue
+                    change = ItemToggled(chapter, change.index - bisect.bisect_left(positions, change.index))
+                elif isinstance(change, ItemAdded):
+                    if change.item.id in removed:
+                        self._held -= change.size
+                        continue
+                elif isinstance(change, ChapterCleared):
+                    if stack is self._redo:
+                        # Redone, the clear is undone by restoring what is there now
+                        self._held += max(1, len(items)) - change.size
+                        change = ChapterCleared(chapter, items)
+                    current = False
+                kept.appendleft(change)
+            stack.clear()
+            stack.extend(kept)
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self._held = 0
+
+    def _trim(self) -> None:
+        while self._undo and (len(self._undo) > self.limit or self._held > self.max_items):
+            self._held -= self._undo.popleft().size
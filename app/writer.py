@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from .models import AppState
+
+@dataclass
+class WriterMetrics:
+    """Counters collected by the background writer"""
+    requested: int = 0      # save requests received
+    coalesced: int = 0      # requests folded into an already pending save
+    writes: int = 0         # tasks actually executed (full saves and incremental calls)
+    failures: int = 0
+    last_latency: float = 0.0   # seconds
+    max_latency: float = 0.0
+    total_latency: float = 0.0
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.writes if self.writes else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['avg_latency'] = self.avg_latency
+        return data
+
+# Marker for coalescable full-save tasks in the queue
+_SAVE = object()
+
+def snapshot_state(state: AppState, chapters: Optional[Iterable[str]] = None) -> AppState:
+    """Shallow copy of the state that is safe to serialize on another thread.
+
+    Only the containers are copied; the items themselves are shared, which is
+    fine because their fields are only ever replaced, never resized. Compact
+    ``ChapterStore`` chapters copy their columns, which is a few memcpys.
+    With ``chapters``, only those chapters' items are copied and the others
+    are left out, for writes that touch nothing else.
+    """
+    snapshot = dict(state)
+    snapshot['chapters'] = list(state.get('chapters', []))
+    todos = state.get('todos', {})
+    if chapters is not None:
+        snapshot['todos'] = {chapter: todos[chapter].copy() for chapter in chapters if chapter in todos}
+    elif hasattr(todos, 'snapshot'):
+        # Lazily loaded chapters: copy what is in memory, leave the rest on disk
+        snapshot['todos'] = todos.snapshot()
+    else:
+        snapshot['todos'] = {chapter: items.copy() for chapter, items in todos.items()}
+    snapshot['settings'] = dict(state.get('settings', {}))
+    if 'stats' in state:
+        # Entries are replaced on change, never edited in place
+        snapshot['stats'] = dict(state['stats'])
+    return snapshot
+
+class SaveWriter:
+    """Performs storage writes on a dedicated thread.
+
+    Full saves are coalesced: a request arriving while another save is still
+    queued replaces it, and a save is held back until no new request arrived
+    for ``debounce`` seconds. Other calls queued with ``submit`` run in order.
+    """
+
+    def __init__(self, save_fn: Callable[[Any], None], debounce: float = 0.25,
+                 name: str = 'save-writer'):
+        self._save_fn = save_fn
+        self.debounce = debounce
+        self.metrics = WriterMetrics()
+        self._tasks: Deque[Tuple[Any, tuple]] = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._flushing = 0
+        self._closed = False
+        self._last_request = 0.0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def request_save(self, payload: Any) -> None:
+        """Queue a full save of ``payload``, replacing any pending one"""
+        with self._cond:
+            self.metrics.requested += 1
+            self._last_request = time.monotonic()
+            if self._tasks and self._tasks[-1][0] is _SAVE:
+                self._tasks[-1] = (_SAVE, (payload,))
+                self.metrics.coalesced += 1
+            else:
+                self._tasks.append((_SAVE, (payload,)))
+            self._cond.notify_all()
+
+    def submit(self, fn: Callable[..., None], *args: Any) -> None:
+        """Queue an arbitrary write call, executed in submission order"""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SaveWriter is closed")
+            self._tasks.append((fn, args))
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Skip the debounce and wait until every queued write is done"""
+        with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(lambda: not self._tasks and not self._busy, timeout)
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: float = None) -> None:
+        """Flush pending writes and stop the thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _next_task(self) -> Tuple[Any, tuple]:
+        """Block until a task is due; returns (None, ()) once closed and drained"""
+        with self._cond:
+            while True:
+                if not self._tasks:
+                    if self._closed:
+                        return None, ()
+                    self._cond.wait()
+                    continue
+
+                fn, args = self._tasks[0]
+                if fn is _SAVE and len(self._tasks) == 1 and not (self._flushing or self._closed):
+                    remaining = self._last_request + self.debounce - time.monotonic()
+                    if remaining > 0:
+                        self._cond.wait(remaining)
+                        continue
+
+                self._tasks.popleft()
+                self._busy = True
+                return fn, args
+
+    def _run(self) -> None:
+        while True:
+            fn, args = self._next_task()
+            if fn is None:
+                return
+
+            failed = False
+            start = time.perf_counter()
+            try:
+                if fn is _SAVE:
+                    self._save_fn(*args)
+                else:
+                    fn(*args)
+            except Exception as e:
+                failed = True
+                print(f"Error in background save: {e}")
+            elapsed = time.perf_counter() - start
+
+            with self._cond:
+                metrics = self.metrics
+                metrics.writes += 1
+                metrics.failures += failed
+                metrics.last_latency = elapsed
+                metrics.max_latency = max(metrics.max_latency, elapsed)
+                metrics.total_latency += elapsed
+                self._busy = False
+                self._cond.notify_all()
@@ -0,0 +1,70 @@
+"""Moving cold completed items to the archive: load time and file size of the
+live book before and after, and what an archive search costs.
+
+Every generated item is older than the archive cutoff, so the completed ones
+(about 30%) are all archived.
+
+    python -m benchmarks.bench_archive --items 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.archive import ARCHIVE_AFTER_DAYS, Archive, archive_cutoff, split_cold
+from app.backends import create_storage
+from .common import make_state
+
+def load(storage):
+    start = time.perf_counter()
+    state = storage.load()
+    return state, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = create_storage('json', Path(tmp))
+        storage.save(make_state(args.items))
+        # Load once so every item has its ID, as it would in the app
+        state, _ = load(storage)
+        storage.save(state)
+        state, load_before = load(storage)
+        size_before = storage.data_path.stat().st_size
+
+        archive = Archive(Path(tmp) / 'todo_archive')
+        cutoff = archive_cutoff(ARCHIVE_AFTER_DAYS)
+        archived = 0
+        start = time.perf_counter()
+        for chapter, items in state['todos'].items():
+            while True:
+                items, cold = split_cold(items, cutoff)
+                if not cold:
+                    break
+                archived += archive.add(chapter, [item.to_dict() for item in cold])
+            state['todos'][chapter] = items
+        archive_time = time.perf_counter() - start
+        storage.save(state)
+
+        _, load_after = load(storage)
+        size_after = storage.data_path.stat().st_size
+        archive_size = sum(path.stat().st_size for path in archive.directory.iterdir())
+
+        start = time.perf_counter()
+        results = Archive(archive.directory).search('review', limit=500)
+        search_time = time.perf_counter() - start
+        start = time.perf_counter()
+        missing = Archive(archive.directory).search('nosuchword', limit=500)
+        scan_time = time.perf_counter() - start
+
+    print(f"{args.items:,} items, {archived:,} archived in {archive_time:.2f} s")
+    print(f"  live file   {size_before / 1e6:8.1f} MB -> {size_after / 1e6:8.1f} MB  "
+          f"(archive {archive_size / 1e6:.1f} MB)")
+    print(f"  load        {load_before * 1000:8.1f} ms -> {load_after * 1000:8.1f} ms")
+    print(f"  search      {search_time * 1000:8.1f} ms for the first {len(results)} matches, "
+          f"{scan_time * 1000:.1f} ms for a full scan ({len(missing)} matches)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Load, save and toggle cost of the JSON, SQLite and sharded storage backends.
+
+For the sharded backend "load" is the startup cost: the manifest and the
+current chapter only.
+
+    python -m benchmarks.bench_backends --sizes 1000 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.sharded import ShardedStorage
+from app.sqlite_storage import SQLiteStorage
+from app.storage import Storage
+from .common import make_state, summarize, time_calls
+
+def bench(storage_cls, total_items: int, toggles: int) -> str:
+    state = make_state(total_items)
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = storage_cls(data_dir=Path(tmp))
+
+        start = time.perf_counter()
+        storage.save(state)
+        save_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        loaded = storage.load()
+        load_time = time.perf_counter() - start
+        assert sum(len(items) for items in loaded['todos'].values()) == total_items
+
+        items = state['todos']['General']
+        counter = iter(range(toggles))
+
+        def toggle():
+            index = next(counter) % len(items)
+            item = items[index]
+            item.completed = not item.completed
+            storage.toggle_item(state, 'General', item.id, item.completed)
+
+        toggle_samples = time_calls(toggle, toggles)
+        storage.close()
+
+    return (f"save {save_time * 1000:10.1f} ms  load {load_time * 1000:10.1f} ms\n"
+            f"           toggle {summarize(toggle_samples)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000])
+    parser.add_argument('--toggles', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        print(f"{size:>9,} items")
+        print(f"  json     {bench(Storage, size, args.toggles)}")
+        print(f"  sqlite   {bench(SQLiteStorage, size, args.toggles)}")
+        print(f"  sharded  {bench(ShardedStorage, size, args.toggles)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Binary vs JSON data files: save time, load time and file size.
+
+"chapter" is the time to read one chapter on its own, which the binary
+format does with a single seek and the JSON format cannot do without reading
+the whole file. Rows marked compact load into ChapterStores.
+
+    python -m benchmarks.bench_binary --sizes 10000 1000000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.binary_storage import BinaryStorage
+from app.storage import Storage
+from .common import make_state
+
+def bench(storage, state) -> str:
+    start = time.perf_counter()
+    storage.save(state)
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    loaded = storage.load()
+    load_time = time.perf_counter() - start
+    assert sum(len(items) for items in loaded['todos'].values()) == \
+           sum(len(items) for items in state['todos'].values())
+    del loaded
+
+    chapter = ''
+    if isinstance(storage, BinaryStorage):
+        start = time.perf_counter()
+        storage.load_chapter('Chapter 5')
+        chapter = f"  chapter {(time.perf_counter() - start) * 1000:8.1f} ms"
+
+    size = storage.data_path.stat().st_size
+    return (f"save {save_time * 1000:9.1f} ms  load {load_time * 1000:9.1f} ms  "
+            f"size {size / 1e6:8.2f} MB{chapter}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        state = make_state(size)
+        print(f"{size:>9,} items")
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, storage in [
+                ('json', Storage(data_dir=Path(tmp))),
+                ('json compact', Storage(data_dir=Path(tmp), compact=True)),
+                ('binary', BinaryStorage(data_dir=Path(tmp))),
+                ('binary compact', BinaryStorage(data_dir=Path(tmp), compact=True)),
+            ]:
+                print(f"  {label:15} {bench(storage, state)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""The command line on a book of ``--items`` items: time per ``add`` process
+(as in a shell loop), items per second for a batch piped to ``add -``, and
+one ``list`` of the book's first chapter.
+
+Interpreter startup alone is shown first for comparison. ``start`` is an
+``add`` to an empty book, which is the command line's own startup; a backend
+whose start exceeds ``--budget-ms`` is reported and the exit status is 1.
+``python -X importtime -m app add ...`` shows where the time goes.
+
+    python -m benchmarks.bench_cli --items 100000
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.backends import BACKENDS, create_storage
+from .common import make_state
+
+# Time a command may take to start, in ms
+STARTUP_BUDGET_MS = 50
+
+def run(args, stdin=None):
+    start = time.perf_counter()
+    subprocess.run(args, input=stdin, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100_000)
+    parser.add_argument('--runs', type=int, default=20, help="add processes per backend")
+    parser.add_argument('--batch', type=int, default=10_000, help="items piped to one add")
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help="Longest start allowed")
+    args = parser.parse_args(argv)
+
+    bare = statistics.median(run([sys.executable, '-c', 'pass']) for _ in range(args.runs))
+    print(f"interpreter startup {bare * 1000:.1f} ms")
+    batch = ''.join(f'batch item {i}\n' for i in range(args.batch)).encode('utf-8')
+    print(f"{'backend':<10}{'start (ms)':>12}{'add (ms)':>10}{'batch (items/s)':>18}{'list (ms)':>11}")
+    command = [sys.executable, '-m', 'app']
+    slow = []
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp:
+            common = ['--backend', backend, '--data-dir', tmp, '-q']
+            start = statistics.median(run(command + ['add', f'item {i}'] + common) for i in range(args.runs))
+        if start * 1000 > args.budget_ms:
+            slow.append(backend)
+        with tempfile.TemporaryDirectory() as tmp:
+            state = make_state(args.items)
+            create_storage(backend, Path(tmp)).save(state)
+            chapter = state['current_chapter']
+            common = ['--backend', backend, '--data-dir', tmp, '-q']
+            add = statistics.median(run(command + ['add', f'item {i}', '--chapter', chapter] + common)
+                                    for i in range(args.runs))
+            piped = run(command + ['add', '-', '--chapter', chapter] + common, stdin=batch)
+            listed = run(command + ['list', '--chapter', chapter] + common)
+        print(f"{backend:<10}{start * 1000:>12.1f}{add * 1000:>10.1f}{args.batch / piped:>18,.0f}"
+              f"{listed * 1000:>11.1f}")
+    if slow:
+        print(f"Start over {args.budget_ms:g} ms: {', '.join(slow)}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
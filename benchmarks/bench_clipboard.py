@@ -0,0 +1,85 @@
+"""Clipboard history: capture cost, disk footprint and idle CPU of the watcher.
+
+Captures are a mix of new texts and repeats. The idle measurement drives
+ClipboardWatcher with a fake Tk root whose clipboard never changes, and
+converts the CPU spent per check into CPU usage at the backed-off interval.
+The fake clipboard read is free, so add the cost of one Tk ``clipboard_get``
+per check on platforms without a clipboard sequence number.
+"""
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from app.clipboard import ClipboardHistory, ClipboardWatcher
+from .common import WORDS, summarize
+
+class IdleRoot:
+    """Just enough of a Tk root for the watcher; timers are stepped by hand"""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.pending = None
+
+    def after(self, ms, func):
+        self.pending = (ms, func)
+        return 'after#1'
+
+    def after_cancel(self, job):
+        self.pending = None
+
+    def clipboard_get(self) -> str:
+        return self.text
+
+def bench_captures(captures: int, capacity: int) -> None:
+    rng = random.Random(0)
+    repeats = [' '.join(rng.choice(WORDS) for _ in range(6)) for _ in range(200)]
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        history = ClipboardHistory(directory, max_entries=capacity)
+        samples = []
+        for i in range(captures):
+            if rng.random() < 0.3:
+                text = rng.choice(repeats)
+            else:
+                text = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))) + f' #{i}'
+            start = time.perf_counter()
+            history.add(text)
+            samples.append(time.perf_counter() - start)
+        history.close()
+
+        files = list(directory.glob('seg-*.jsonl'))
+        size = sum(path.stat().st_size for path in files)
+        print(f"capture    {summarize(samples)}  ({captures:,} captures, {len(history):,} kept)")
+        print(f"disk       {size / 1e6:8.2f} MB in {len(files)} segments")
+
+        start = time.perf_counter()
+        loaded = ClipboardHistory(directory, max_entries=capacity).load()
+        print(f"load       {(time.perf_counter() - start) * 1000:8.1f} ms  ({len(loaded):,} entries)")
+
+def bench_idle(polls: int, clipboard_size: int) -> None:
+    root = IdleRoot('x' * clipboard_size)
+    watcher = ClipboardWatcher(root, on_change=lambda text: None)
+    watcher.start()
+    for _ in range(polls):
+        ms, func = root.pending
+        func()
+    per_poll = watcher.cpu_time / watcher.polls
+    cpu = per_poll / (watcher.max_interval / 1000)
+    print(f"idle poll  {per_poll * 1e6:8.1f} us CPU per check ({clipboard_size:,} char clipboard), "
+          f"interval {watcher.interval} ms -> {cpu * 100:.4f}% CPU")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--captures', type=int, default=50_000)
+    parser.add_argument('--capacity', type=int, default=5000)
+    parser.add_argument('--polls', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    bench_captures(args.captures, args.capacity)
+    for size in (100, 100_000):
+        bench_idle(args.polls, size)
+
+if __name__ == '__main__':
+    main()
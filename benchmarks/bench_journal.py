@@ -0,0 +1,45 @@
+"""Per-mutation write cost of the JSON and journaled storage backends.
+
+The JSON backend rewrites the whole file on every toggle, so its cost grows
+with the book. The journal appends one record per toggle and should stay
+flat regardless of size (compaction is disabled here to isolate the append).
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from app.journal import JournalStorage
+from app.storage import Storage
+from .common import make_state, summarize, time_calls
+
+def bench(storage_cls, total_items: int, toggles: int, **kwargs) -> str:
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = storage_cls(data_dir=Path(tmp), **kwargs)
+        state = make_state(total_items)
+        storage.save(state)
+        items = state['todos']['General']
+        counter = iter(range(toggles))
+
+        def toggle():
+            index = next(counter) % len(items)
+            item = items[index]
+            item.completed = not item.completed
+            storage.toggle_item(state, 'General', item.id, item.completed)
+
+        samples = time_calls(toggle, toggles)
+        storage.close()
+        return summarize(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--toggles', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        print(f"{size:>9,} items")
+        print(f"  json     {bench(Storage, size, args.toggles)}")
+        print(f"  journal  {bench(JournalStorage, size, args.toggles, compact_threshold=1 << 62)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Memory held by a loaded book: TodoItem lists versus compact ChapterStores.
+
+Both representations are decoded from the same JSON text, the way
+``Storage.load`` does, and measured with tracemalloc (retained and peak).
+Load time is measured separately since tracing slows allocation down.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from app.storage import Storage
+from .common import make_state
+
+def measure(build):
+    """Return (result, retained bytes, peak bytes) for ``build()``"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    text = json.dumps(Storage()._serialize_state(make_state(args.items)))
+
+    print(f"{'representation':16} {'retained':>10} {'peak':>10} {'per item':>10} {'load':>9}")
+    for name, compact in (('TodoItem lists', False), ('ChapterStore', True)):
+        storage = Storage(compact=compact)
+        load = lambda: storage._deserialize_state(json.loads(text))
+        state, retained, peak = measure(load)
+        del state
+        start = time.perf_counter()
+        load()
+        elapsed = time.perf_counter() - start
+        print(f"{name:16} {retained / 1e6:8.1f} MB {peak / 1e6:8.1f} MB "
+              f"{retained / args.items:8.0f} B {elapsed:7.2f} s")
+
+    # Access cost of the views compared with plain attributes
+    for name, compact in (('TodoItem lists', False), ('ChapterStore', True)):
+        items = Storage(compact=compact)._deserialize_state(json.loads(text))['todos']['General']
+        start = time.perf_counter()
+        done = sum(1 for item in items if item.completed and item.text)
+        elapsed = time.perf_counter() - start
+        print(f"{name:16} iterate {len(items):,} items in {elapsed * 1000:7.1f} ms ({done} done)")
+
+if __name__ == '__main__':
+    main()
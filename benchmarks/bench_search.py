@@ -0,0 +1,42 @@
+"""Build, persist and query cost of the full-text search index."""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from app.search import SearchIndex
+from .common import make_state, summarize, time_calls
+
+QUERIES = ['b', 'buy', 'buy mi', 'fix bug is:done', 'pay rent review',
+           'review chapter:"Chapter 3"', '#4999', 'zzz']
+
+# First scan pass of the window's search box (MainWindow.SEARCH_SCAN_ITEMS)
+SCAN_LIMIT = 2000
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=500_000)
+    parser.add_argument('--chapters', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    state = make_state(args.items, chapters=args.chapters)
+    start = time.perf_counter()
+    index = SearchIndex.build(state)
+    print(f"build      {time.perf_counter() - start:8.2f} s  ({args.items:,} items)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'todo_data.index'
+        start = time.perf_counter()
+        index.save(path)
+        print(f"save       {time.perf_counter() - start:8.2f} s  ({path.stat().st_size / 1e6:.1f} MB)")
+        start = time.perf_counter()
+        SearchIndex.load_or_build(state, path)
+        print(f"load       {time.perf_counter() - start:8.2f} s")
+
+    for query in QUERIES:
+        samples = time_calls(lambda: index.search(query, scan_limit=SCAN_LIMIT), args.repeat)
+        print(f"{query!r:30} {summarize(samples)}")
+
+if __name__ == '__main__':
+    main()
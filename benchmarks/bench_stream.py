@@ -0,0 +1,63 @@
+"""Streaming vs whole-file JSON loading: time to first chapter, total time, peak memory.
+
+The whole-file path is the previous ``Storage.load``: ``json.load`` followed
+by converting every chapter. The streaming path is ``load_progressive``;
+"first" is the time until it yields the state with the current chapter, which
+is when the window can be shown.
+"""
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.storage import Storage
+from .common import make_state
+
+def whole_file(storage: Storage):
+    with open(storage.data_path, 'r', encoding='utf-8') as f:
+        return storage._deserialize_state(json.load(f))
+
+def streaming(storage: Storage):
+    loader = storage.load_progressive()
+    state = next(loader)
+    first = time.perf_counter()
+    for state in loader:
+        pass
+    return state, first
+
+def measure(label: str, storage: Storage, load) -> None:
+    start = time.perf_counter()
+    result = load(storage)
+    total = time.perf_counter() - start
+    first = total
+    if isinstance(result, tuple):
+        first = result[1] - start
+    del result
+
+    tracemalloc.start()
+    result = load(storage)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    print(f"{label:10} first {first * 1000:9.1f} ms  total {total * 1000:9.1f} ms  "
+          f"peak {peak / 1e6:8.1f} MB")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--chapters', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            storage = Storage(data_dir=Path(tmp))
+            storage.save(make_state(size, chapters=args.chapters))
+            print(f"{size:,} items in {args.chapters} chapters, "
+                  f"{storage.data_path.stat().st_size / 1e6:.1f} MB file")
+            measure('json.load', storage, whole_file)
+            measure('streaming', storage, streaming)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Chapter import/export per format: time, and memory beyond the chapter itself.
+
+"overhead" is the peak traced memory of an import minus what the imported
+chapter holds once it is done, i.e. what the pipeline itself needed. With
+streaming readers it stays flat however long the file is.
+
+    python -m benchmarks.bench_transfer --items 1000000
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app import transfer
+from app.store import ChapterStore
+from .common import make_state
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    items = [item for chapter in make_state(args.items, chapters=1)['todos'].values() for item in chapter]
+    print(f"{len(items):,} items")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in transfer.FORMATS:
+            path = Path(tmp) / f'chapter.{fmt}'
+            start = time.perf_counter()
+            transfer.write_items(path, items, chapter='Bench')
+            export_time = time.perf_counter() - start
+
+            for new_items in (list, ChapterStore):
+                state = {'chapters': [], 'todos': {}}
+                start = time.perf_counter()
+                transfer.import_into(state, 'Bench', transfer.read_items(path), new_items)
+                import_time = time.perf_counter() - start
+                del state
+
+                state = {'chapters': [], 'todos': {}}
+                tracemalloc.start()
+                transfer.import_into(state, 'Bench', transfer.read_items(path), new_items)
+                final, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                del state
+                print(f"  {fmt:6} {new_items.__name__:12} export {export_time * 1000:8.1f} ms  "
+                      f"import {import_time * 1000:8.1f} ms  overhead {(peak - final) / 1e6:6.1f} MB  "
+                      f"file {path.stat().st_size / 1e6:7.1f} MB")
+
+if __name__ == '__main__':
+    main()
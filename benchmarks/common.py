@@ -0,0 +1,57 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the repository root, e.g.::
+
+    python -m benchmarks.bench_journal
+"""
+import datetime
+import random
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from app.models import AppState, TodoItem
+
+def make_state(total_items: int, chapters: int = 10, seed: int = 0) -> AppState:
+    """Build a synthetic book with ``total_items`` spread over ``chapters``"""
+    rng = random.Random(seed)
+    names = ['General'] + [f'Chapter {i}' for i in range(1, chapters)]
+    start = datetime.datetime(2024, 1, 1)
+    todos: Dict[str, List[TodoItem]] = {name: [] for name in names}
+    for i in range(total_items):
+        chapter = names[i % chapters]
+        words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 8)))
+        todos[chapter].append(TodoItem(
+            text=f'{words} #{i}',
+            completed=rng.random() < 0.3,
+            created_at=(start + datetime.timedelta(minutes=i)).isoformat(),
+        ))
+    return {
+        'chapters': names,
+        'current_chapter': 'General',
+        'todos': todos,
+        'settings': {'theme': 'light', 'hotkey_enabled': True, 'mode': 'todo'},
+    }
+
+def time_calls(fn: Callable[[], None], repeat: int) -> List[float]:
+    """Call ``fn`` ``repeat`` times and return each duration in seconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def summarize(samples: List[float]) -> str:
+    """Format mean/p50/p95 of a list of durations in milliseconds"""
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (f"mean {statistics.mean(ordered) * 1000:8.3f} ms  "
+            f"p50 {statistics.median(ordered) * 1000:8.3f} ms  "
+            f"p95 {p95 * 1000:8.3f} ms")
+
+WORDS = (
+    'buy milk call mom fix bug review pull request write docs deploy release '
+    'book flight pay rent clean desk read paper update resume plan sprint '
+    'refactor storage tune query answer email backup laptop renew passport'
+).split()
@@ -0,0 +1,204 @@
+"""Display-free stand-ins for the Tk widgets used by ``TodoList``.
+
+Every widget method call is counted, so benchmarks can report how many Tk
+calls an update costs. ``RecordingTreeview`` keeps enough state (rows, order,
+options) for ``TodoList`` and ``TreeReconciler`` to behave as with a real
+Treeview.
+"""
+import importlib.util
+import itertools
+import sys
+import types
+from collections import Counter
+from typing import Dict, List
+
+# Height of a fake Treeview row in pixels, for identify_row()
+ROW_HEIGHT = 20
+
+class CallCounter(Counter):
+    """Tk calls by ``Widget.method`` name, shared by all fake widgets"""
+
+    @property
+    def total(self) -> int:
+        return sum(self.values())
+
+class RecordingWidget:
+    """Accepts and counts any widget method; unknown ones return None"""
+
+    calls = CallCounter()
+
+    def __init__(self, parent=None, **options):
+        self.parent = parent
+        self.options = dict(options)
+
+    def _record(self, name: str) -> None:
+        RecordingWidget.calls[f'{type(self).__name__}.{name}'] += 1
+
+    def __getattr__(self, name: str):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            self._record(name)
+        return method
+
+    def config(self, **options) -> None:
+        self._record('config')
+        self.options.update(options)
+
+    configure = config
+
+class Frame(RecordingWidget):
+    def after(self, ms, func=None, *args):
+        self._record('after')
+        return 'after#0'
+
+    def after_idle(self, func, *args):
+        # Never fires: benchmarks flush the render scheduler themselves
+        self._record('after_idle')
+        return 'after#idle'
+
+class Entry(RecordingWidget):
+    def __init__(self, parent=None, **options):
+        super().__init__(parent, **options)
+        self.text = ''
+
+    def get(self) -> str:
+        self._record('get')
+        return self.text
+
+    def delete(self, first, last=None) -> None:
+        self._record('delete')
+        self.text = ''
+
+class Scrollbar(RecordingWidget):
+    def set(self, first, last) -> None:
+        self._record('set')
+        self.position = (float(first), float(last))
+
+class RecordingTreeview(RecordingWidget):
+    """Treeview keeping rows in memory"""
+
+    def __init__(self, parent=None, **options):
+        super().__init__(parent, **options)
+        self.rows: Dict[str, dict] = {}
+        self.order: List[str] = []
+        self._ids = itertools.count(1)
+
+    def insert(self, parent, index, iid=None, **options) -> str:
+        self._record('insert')
+        iid = iid or f'I{next(self._ids):03X}'
+        self.rows[iid] = {'text': '', 'values': (), 'tags': ()}
+        self.rows[iid].update(options)
+        if index == 'end':
+            self.order.append(iid)
+        else:
+            self.order.insert(int(index), iid)
+        return iid
+
+    def item(self, iid, option=None, **options):
+        self._record('item')
+        if option is not None:
+            return self.rows[iid].get(option)
+        if not options:
+            return dict(self.rows[iid])
+        self.rows[iid].update(options)
+
+    def set(self, iid, column=None, value=None):
+        self._record('set')
+        if value is not None:
+            self.rows[iid]['values'] = (value,)
+        return self.rows[iid]['values']
+
+    def delete(self, *iids) -> None:
+        self._record('delete')
+        for iid in iids:
+            del self.rows[iid]
+            if iid in self.order:
+                self.order.remove(iid)
+
+    def detach(self, *iids) -> None:
+        self._record('detach')
+        for iid in iids:
+            self.order.remove(iid)
+
+    def move(self, iid, parent, index) -> None:
+        self._record('move')
+        if iid in self.order:
+            self.order.remove(iid)
+        self.order.insert(int(index), iid)
+
+    def get_children(self, item='') -> tuple:
+        self._record('get_children')
+        return tuple(self.order)
+
+    def index(self, iid) -> int:
+        self._record('index')
+        return self.order.index(iid)
+
+    def identify_row(self, y) -> str:
+        self._record('identify_row')
+        index = int(y) // ROW_HEIGHT
+        return self.order[index] if 0 <= index < len(self.order) else ''
+
+    def exists(self, iid) -> bool:
+        self._record('exists')
+        return iid in self.rows
+
+    def texts(self) -> List[str]:
+        """Displayed row texts in order; not counted"""
+        return [self.rows[iid].get('text', '') for iid in self.order]
+
+class StringVar:
+    def __init__(self, master=None, value=''):
+        self.value = value
+        self.traces = []
+
+    def get(self) -> str:
+        return self.value
+
+    def set(self, value: str) -> None:
+        self.value = value
+        for callback in self.traces:
+            callback('', '', 'write')
+
+    def trace_add(self, mode, callback) -> str:
+        self.traces.append(callback)
+        return str(len(self.traces))
+
+class Style:
+    def lookup(self, style, option, state=None, default=None):
+        return default
+
+    def configure(self, style, **options) -> None:
+        pass
+
+def _module(name: str, **attributes) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(attributes)
+    return module
+
+fake_ttk = _module('tkinter.ttk', Frame=Frame, Entry=Entry, Scrollbar=Scrollbar,
+                   Treeview=RecordingTreeview, Style=Style)
+fake_tk = _module('tkinter', StringVar=StringVar, YES=1, NO=0, END='end', ttk=fake_ttk)
+
+def load_headless(module_name: str) -> types.ModuleType:
+    """Import a fresh copy of ``module_name`` with tkinter replaced by fakes.
+
+    The real modules are left untouched; the copy is not registered in
+    ``sys.modules``.
+    """
+    spec = importlib.util.find_spec(module_name)
+    module = importlib.util.module_from_spec(spec)
+    saved = {name: sys.modules.get(name) for name in ('tkinter', 'tkinter.ttk')}
+    sys.modules['tkinter'] = fake_tk
+    sys.modules['tkinter.ttk'] = fake_ttk
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        for name, original in saved.items():
+            if original is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = original
+    return module
@@ -0,0 +1,334 @@
+"""Headless benchmark suite with regression checks against stored baselines.
+
+Covers the JSON Storage, state (de)serialization, the legacy root
+``storage`` module, TodoItem conversions and TodoList rendering against a
+recording fake Treeview, on synthetic books of several sizes. For each case
+it reports latency percentiles, throughput, peak traced memory and, for list
+rendering, the number of Tk calls per run.
+
+    python -m benchmarks.suite                      # run and compare
+    python -m benchmarks.suite --save-baseline      # record new baselines
+    python -m benchmarks.suite --sizes 1000 --only todolist
+
+Exits with status 1 when a case is slower, uses more memory or makes more Tk
+calls than its baseline allows. Timings depend on the machine, so record
+baselines on the machine that runs the check.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Optional, Tuple
+
+import storage as legacy_storage
+from app.models import TodoItem
+from app.storage import Storage
+from .common import make_state
+from .fake_tk import ROW_HEIGHT, RecordingWidget, load_headless
+
+BASELINE_PATH = Path(__file__).with_name('baselines.json')
+DEFAULT_SIZES = [1_000, 10_000]
+
+# Allowed growth over the baseline before a case counts as a regression
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+TK_CALL_TOLERANCE = 0.0
+# Absolute slack so sub-millisecond cases do not fail on timer noise
+TIME_SLACK_MS = 0.5
+
+@dataclass
+class Result:
+    case: str
+    size: int
+    items: int           # items processed per run
+    samples: List[float]
+    peak_bytes: int
+    tk_calls: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f'{self.case}@{self.size}'
+
+    @property
+    def p50(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def p95(self) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second at the median latency"""
+        return self.items / self.p50 if self.p50 else float('inf')
+
+    def metrics(self) -> Dict[str, float]:
+        metrics = {'p50_ms': round(self.p50 * 1000, 3), 'p95_ms': round(self.p95 * 1000, 3),
+                   'peak_kb': round(self.peak_bytes / 1024, 1)}
+        if self.tk_calls is not None:
+            metrics['tk_calls'] = self.tk_calls
+        return metrics
+
+# Cases: each takes (size, stack) and returns the operation to measure and
+# the number of items one run processes. Resources that must outlive the
+# setup go on the ExitStack.
+Case = Callable[[int, contextlib.ExitStack], Tuple[Callable[[], object], int]]
+
+ADD_BATCH = 100
+BURST = 10
+# Double-clicks per run of the click cases
+CLICKS = 10
+
+def _storage(stack: contextlib.ExitStack) -> Storage:
+    return Storage(data_dir=Path(stack.enter_context(tempfile.TemporaryDirectory())))
+
+def case_storage_save(size, stack):
+    storage, state = _storage(stack), make_state(size)
+    return lambda: storage.save(state), size
+
+def case_storage_load(size, stack):
+    storage = _storage(stack)
+    storage.save(make_state(size))
+    return storage.load, size
+
+def case_serialize(size, stack):
+    storage, state = _storage(stack), make_state(size)
+    return lambda: storage._serialize_state(state), size
+
+def case_deserialize(size, stack):
+    storage = _storage(stack)
+    data = json.loads(json.dumps(storage._serialize_state(make_state(size))))
+    return lambda: storage._deserialize_state(data), size
+
+def _legacy_data_dir(stack: contextlib.ExitStack) -> None:
+    """Point the legacy storage module at a temporary directory"""
+    tmp = stack.enter_context(tempfile.TemporaryDirectory())
+    previous = os.environ.get('APPDATA')
+    os.environ['APPDATA'] = tmp
+
+    def restore():
+        if previous is None:
+            os.environ.pop('APPDATA', None)
+        else:
+            os.environ['APPDATA'] = previous
+    stack.callback(restore)
+
+def case_legacy_save_state(size, stack):
+    _legacy_data_dir(stack)
+    data = _storage(stack)._serialize_state(make_state(size))
+    return lambda: legacy_storage.save_state(data), size
+
+def case_legacy_load_state(size, stack):
+    _legacy_data_dir(stack)
+    legacy_storage.save_state(_storage(stack)._serialize_state(make_state(size)))
+    return legacy_storage.load_state, size
+
+def _all_items(size: int) -> List[TodoItem]:
+    return [item for items in make_state(size)['todos'].values() for item in items]
+
+def case_todoitem_to_dict(size, stack):
+    items = _all_items(size)
+    return lambda: [item.to_dict() for item in items], size
+
+def case_todoitem_from_dict(size, stack):
+    dicts = [item.to_dict() for item in _all_items(size)]
+    return lambda: [TodoItem.from_dict(data) for data in dicts], size
+
+_todo_list_module = None
+
+def _todo_list(virtual: bool):
+    global _todo_list_module
+    if _todo_list_module is None:
+        _todo_list_module = load_headless('app.ui.todo_list')
+    callbacks = _todo_list_module.TodoListCallbacks(
+        on_toggle_complete=lambda index: None,
+        on_copy_click=lambda index: None,
+        on_item_added=lambda text: None,
+        on_search=lambda query: None,
+    )
+    return _todo_list_module.TodoList(None, callbacks, virtual=virtual)
+
+def _rows(size: int):
+    return [(item.text, item.completed, item.created_at) for item in _all_items(size)]
+
+def _update_case(virtual: bool) -> Case:
+    def case(size, stack):
+        todo_list, rows = _todo_list(virtual), _rows(size)
+
+        def run():
+            # A chapter switch: drop the current rows and show new ones
+            todo_list.clear()
+            todo_list.update_items(rows)
+            # The end of the event-loop tick
+            todo_list.flush()
+        return run, size
+    return case
+
+def _add_case(virtual: bool) -> Case:
+    def case(size, stack):
+        todo_list = _todo_list(virtual)
+        todo_list.update_items(_rows(size))
+        todo_list.flush()
+        counter = iter(range(10 ** 9))
+
+        def run():
+            for _ in range(ADD_BATCH):
+                todo_list.add_item(f'new item {next(counter)}')
+            todo_list.flush()
+        return run, ADD_BATCH
+    return case
+
+def _burst_case(virtual: bool) -> Case:
+    def case(size, stack):
+        todo_list = _todo_list(virtual)
+        todo_list.update_items(_rows(size))
+        todo_list.flush()
+        counter = iter(range(10 ** 9))
+
+        def run():
+            # Rapid changes within one tick: toggles of the same row and
+            # appends, drawn by the single flush at the end
+            for i in range(BURST):
+                if i % 2:
+                    todo_list.set_completed(0, bool(i % 4 == 1))
+                else:
+                    todo_list.add_item(f'burst item {next(counter)}')
+            todo_list.flush()
+        return run, BURST
+    return case
+
+def _click_case(virtual: bool) -> Case:
+    def case(size, stack):
+        todo_list = _todo_list(virtual)
+        rows = _rows(size)
+        todo_list.update_items(rows, keys=[('item', i) for i in range(len(rows))])
+        todo_list.flush()
+        event = SimpleNamespace(x=0, y=0)
+
+        def run():
+            # Double-clicks down the visible rows, each mapped to its item
+            for i in range(CLICKS):
+                event.y = (i % 15) * ROW_HEIGHT
+                todo_list._on_item_double_click(event)
+            todo_list.flush()
+        return run, CLICKS
+    return case
+
+CASES: Dict[str, Case] = {
+    'storage_save': case_storage_save,
+    'storage_load': case_storage_load,
+    'serialize': case_serialize,
+    'deserialize': case_deserialize,
+    'legacy_save_state': case_legacy_save_state,
+    'legacy_load_state': case_legacy_load_state,
+    'todoitem_to_dict': case_todoitem_to_dict,
+    'todoitem_from_dict': case_todoitem_from_dict,
+    'todolist_update_full': _update_case(virtual=False),
+    'todolist_update_virtual': _update_case(virtual=True),
+    'todolist_add_full': _add_case(virtual=False),
+    'todolist_add_virtual': _add_case(virtual=True),
+    'todolist_burst_full': _burst_case(virtual=False),
+    'todolist_burst_virtual': _burst_case(virtual=True),
+    'todolist_click_full': _click_case(virtual=False),
+    'todolist_click_virtual': _click_case(virtual=True),
+}
+
+def run_case(name: str, size: int, repeat: int) -> Result:
+    with contextlib.ExitStack() as stack:
+        operation, items = CASES[name](size, stack)
+        operation()  # warm-up
+
+        samples = []
+        RecordingWidget.calls.clear()
+        # Collector pauses would land on random samples
+        gc.collect()
+        gc.disable()
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                operation()
+                samples.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+        tk_calls = RecordingWidget.calls.total / repeat if name.startswith('todolist') else None
+
+        tracemalloc.start()
+        operation()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return Result(name, size, items, samples, peak, tk_calls)
+
+def compare(result: Result, baseline: Dict[str, float]) -> List[str]:
+    """Descriptions of the metrics of ``result`` that regressed"""
+    metrics = result.metrics()
+    limits = [('p50_ms', TIME_TOLERANCE), ('peak_kb', MEMORY_TOLERANCE),
+              ('tk_calls', TK_CALL_TOLERANCE)]
+    problems = []
+    for metric, tolerance in limits:
+        if metric not in baseline or metric not in metrics:
+            continue
+        allowed = baseline[metric] * (1 + tolerance)
+        if metric == 'p50_ms':
+            allowed += TIME_SLACK_MS
+        if metrics[metric] > allowed:
+            problems.append(f'{metric} {metrics[metric]:g} > {allowed:g} (baseline {baseline[metric]:g})')
+    return problems
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='+', default=[],
+                        help="Run only cases whose name starts with one of these")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Store the results as the new baselines instead of comparing")
+    args = parser.parse_args(argv)
+
+    baselines = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    names = [name for name in CASES if not args.only or name.startswith(tuple(args.only))]
+    results, regressions = [], []
+    print(f"{'case':28} {'items':>8} {'p50 ms':>10} {'p95 ms':>10} {'items/s':>12} "
+          f"{'peak KB':>10} {'tk calls':>9}")
+    for size in args.sizes:
+        for name in names:
+            result = run_case(name, size, args.repeat)
+            results.append(result)
+            tk_calls = f'{result.tk_calls:9.0f}' if result.tk_calls is not None else f"{'-':>9}"
+            line = (f'{name:28} {size:8,} {result.p50 * 1000:10.3f} {result.p95 * 1000:10.3f} '
+                    f'{result.throughput:12,.0f} {result.peak_bytes / 1024:10.1f} {tk_calls}')
+            problems = [] if args.save_baseline else compare(result, baselines.get(result.key, {}))
+            if problems:
+                regressions.append((result.key, problems))
+                line += '  REGRESSED'
+            print(line)
+
+    if args.save_baseline:
+        baselines.update({result.key: result.metrics() for result in results})
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Saved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    for key, problems in regressions:
+        print(f"{key}: {'; '.join(problems)}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
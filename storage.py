@@ -2,6 +2,9 @@ import json
 import os
 from pathlib import Path
 from typing import Any, Dict
+
+from app import json_stream
+from app.locking import FileLock
  
 APP_DIR_NAME = "ScribbleThoughts"
 DATA_FILE_NAME = "todo_book_data.json"
@@ -32,19 +35,28 @@ def get_data_path() -> Path:
 def load_state() -> Dict[str, Any]:
     """Load JSON state from data path. Returns empty dict if file missing.
     Raises ValueError on decode errors so caller can handle.
+    Chapters are decoded one at a time instead of from the whole file text.
     """
     path = get_data_path()
     if not path.exists():
         return {}
     try:
         with path.open("r", encoding="utf-8") as f:
-            return json.load(f)
+            return json_stream.load(f)
     except json.JSONDecodeError as e:
         raise ValueError(f"Corrupt JSON at {path}: {e}") from e
 
 
 def save_state(data: Dict[str, Any]) -> None:
-    """Write JSON state to data path with indentation."""
+    """Write JSON state to data path with indentation.
+    The file is written to a temp file first and renamed into place so a
+    crash mid-write never leaves a truncated state file behind.
+    Holds the same advisory lock as the app package's saves, so two
+    instances never write at once.
+    """
     path = get_data_path()
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with FileLock(path.with_name(path.name + ".lock")):
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
@@ -0,0 +1,34 @@
+import pytest
+
+from app import cli
+from app.backends import BACKENDS, create_storage
+
+def items(backend, tmp_path, chapter='General'):
+    storage = create_storage(backend, tmp_path)
+    try:
+        return [(item.text, item.completed) for item in storage.load()['todos'][chapter]]
+    finally:
+        storage.close()
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_done_survives_reload(backend, tmp_path):
+    common = ['--backend', backend, '--data-dir', str(tmp_path), '-q']
+    cli.main(['add', 'a', 'b', 'c'] + common)
+    cli.main(['done', '2', '3'] + common)
+    cli.main(['done', '3', '--undo'] + common)
+    assert items(backend, tmp_path) == [('a', False), ('b', True), ('c', False)]
+
+@pytest.mark.parametrize('backend', sorted(BACKENDS))
+def test_done_in_other_chapter(backend, tmp_path):
+    common = ['--backend', backend, '--data-dir', str(tmp_path), '-q']
+    cli.main(['add', 'x', 'y', '--chapter', 'Work'] + common)
+    cli.main(['done', '1', '--chapter', 'Work'] + common)
+    assert items(backend, tmp_path, 'Work') == [('x', True), ('y', False)]
+
+def test_done_out_of_range(tmp_path):
+    common = ['--backend', 'json', '--data-dir', str(tmp_path), '-q']
+    cli.main(['add', 'a'] + common)
+    with pytest.raises(SystemExit) as exc:
+        cli.main(['done', '9'] + common)
+    assert exc.value.code
+    assert items('json', tmp_path) == [('a', False)]
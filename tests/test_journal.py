@@ -0,0 +1,67 @@
+import json
+
+from app import cli
+from app.backends import create_storage
+from app.models import TodoItem
+
+LEGACY = {
+    'chapters': ['General'],
+    'current_chapter': 'General',
+    'todos': {'General': [{'text': 'a', 'completed': False, 'created_at': '2020-01-01 09:00'},
+                          {'text': 'b', 'completed': False, 'created_at': '2020-01-01 09:00'}]},
+    'settings': {},
+}
+
+def write_legacy(tmp_path):
+    (tmp_path / 'todo_data.json').write_text(json.dumps(LEGACY), encoding='utf-8')
+
+def completed(tmp_path):
+    storage = create_storage('journal', tmp_path)
+    try:
+        return [item.completed for item in storage.load()['todos']['General']]
+    finally:
+        storage.close()
+
+def test_toggle_after_legacy_snapshot_survives_reload(tmp_path):
+    write_legacy(tmp_path)
+    storage = create_storage('journal', tmp_path)
+    state = storage.load()
+    item = state['todos']['General'][1]
+    item.completed = True
+    storage.toggle_item(state, 'General', item.id, True)
+    storage.close()
+    assert completed(tmp_path) == [False, True]
+
+def test_cli_done_on_legacy_snapshot(tmp_path):
+    write_legacy(tmp_path)
+    cli.main(['done', '1', '--backend', 'journal', '--data-dir', str(tmp_path), '-q'])
+    assert completed(tmp_path) == [True, False]
+
+def test_legacy_add_records_get_ids_that_stick(tmp_path):
+    write_legacy(tmp_path)
+    record = {'op': 'add', 'chapter': 'General', 'seq': 1,
+              'item': {'text': 'c', 'completed': False, 'created_at': '2020-01-02 09:00'}}
+    (tmp_path / 'todo_data.journal').write_text(json.dumps(record) + '\n', encoding='utf-8')
+    cli.main(['done', '3', '--backend', 'journal', '--data-dir', str(tmp_path), '-q'])
+    assert completed(tmp_path) == [False, False, True]
+
+def test_replay_by_id(tmp_path):
+    storage = create_storage('journal', tmp_path)
+    state = storage.load()
+    storage.save(state)
+    items = state['todos']['General']
+    for text in 'abc':
+        item = TodoItem(text, False, '2020-01-01')
+        items.append(item)
+        storage.add_item(state, 'General', item)
+    first, second, third = list(items)
+    items.remove(first)
+    storage.remove_item(state, 'General', first.id)
+    storage.toggle_item(state, 'General', third.id, True)
+    storage.close()
+    reloaded = create_storage('journal', tmp_path)
+    try:
+        got = [(item.text, item.completed) for item in reloaded.load()['todos']['General']]
+    finally:
+        reloaded.close()
+    assert got == [('b', False), ('c', True)]
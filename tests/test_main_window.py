@@ -0,0 +1,49 @@
+from app.backends import create_storage
+from app.events import BookModel
+from app.models import TodoItem
+from app.ui.main_window import MainWindow
+from app.writer import SaveWriter
+
+class MenuBar:
+    def get_state(self):
+        return {'theme': 'dark'}
+
+def window(storage, state):
+    mw = MainWindow.__new__(MainWindow)
+    mw.storage = storage
+    mw.state = state
+    mw.metrics = None
+    mw._loader = None
+    mw._snapshot_queued = False
+    mw.menu_bar = MenuBar()
+    mw.writer = SaveWriter(storage.save)
+    mw.model = BookModel(state, storage.new_items)
+    return mw
+
+def test_close_on_sqlite_writes_only_settings(tmp_path):
+    storage = create_storage('sqlite', tmp_path)
+    state = storage.load()
+    item = TodoItem('a', False, '2020-01-01 09:00', id=1)
+    state['todos']['General'].append(item)
+    storage.add_item(state, 'General', item)
+    saves = []
+    storage.save = saves.append
+    mw = window(storage, state)
+    mw.save_state()
+    mw.writer.close()
+    assert saves == []
+    reloaded = storage.load()
+    assert reloaded['settings']['theme'] == 'dark'
+    assert [item.text for item in reloaded['todos']['General']] == ['a']
+    storage.close()
+
+def test_close_on_json_saves_everything(tmp_path):
+    storage = create_storage('json', tmp_path)
+    state = storage.load()
+    state['todos']['General'].append(TodoItem('a', False, '2020-01-01 09:00'))
+    mw = window(storage, state)
+    mw.save_state()
+    mw.writer.close()
+    reloaded = create_storage('json', tmp_path).load()
+    assert reloaded['settings']['theme'] == 'dark'
+    assert [item.text for item in reloaded['todos']['General']] == ['a']
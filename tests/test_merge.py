@@ -0,0 +1,65 @@
+import pytest
+
+from app.binary_storage import BinaryStorage
+from app.models import TodoItem
+from app.storage import Storage
+from app.writer import snapshot_state
+
+def texts(state):
+    return [(item.text, item.completed) for item in state['todos']['General']]
+
+def save(storage, state, *chapters):
+    for chapter in chapters:
+        storage.mark_changed(chapter)
+    storage.save(snapshot_state(state))
+
+@pytest.fixture(params=[(Storage, False), (Storage, True), (BinaryStorage, False), (BinaryStorage, True)],
+                ids=lambda p: f"{p[0].__name__}{'-compact' if p[1] else ''}")
+def windows(request, tmp_path):
+    """Two instances on the same file, both with the same five items"""
+    cls, compact = request.param
+    a = cls(data_dir=tmp_path, compact=compact)
+    b = cls(data_dir=tmp_path, compact=compact)
+    state_a = a.load()
+    for text in ['keep', 'drop', 'done-undo', 'same', 'same']:
+        state_a['todos']['General'].append(TodoItem(text, text == 'done-undo', '2024-01-01 09:00'))
+    save(a, state_a)
+    reopen = lambda: cls(data_dir=tmp_path, compact=compact).load()
+    return a, state_a, b, b.load(), reopen
+
+def test_merge_keeps_both_sides(windows):
+    a, state_a, b, state_b, reopen = windows
+    state_a['todos']['General'] = a.new_items([i for i in state_a['todos']['General'] if i.text != 'drop'])
+    state_a['todos']['General'][1].completed = False
+    save(a, state_a, 'General')
+    state_b['todos']['General'].append(TodoItem('b-new', False, '2024-01-02 09:00'))
+    b.mark_changed('General')
+    
+    touched, merged = b.merge_from_disk(state_b)
+    want = [('keep', False), ('done-undo', False), ('same', False), ('same', False), ('b-new', False)]
+    assert merged == ['General']
+    assert texts(state_b) == want
+    save(b, state_b, 'General')
+    assert texts(reopen()) == want
+
+def test_save_merges_unseen_changes(windows):
+    a, state_a, b, state_b, reopen = windows
+    # Neither side merges first: B drops one of the duplicates, A ticks 'keep'
+    duplicate = state_b['todos']['General'][4].id
+    state_b['todos']['General'] = b.new_items([i for i in state_b['todos']['General'] if i.id != duplicate])
+    save(b, state_b, 'General')
+    state_a['todos']['General'][0].completed = True
+    save(a, state_a, 'General')
+    want = [('keep', True), ('drop', False), ('done-undo', True), ('same', False)]
+    assert texts(reopen()) == want
+    b.merge_from_disk(state_b)
+    assert texts(state_b) == want
+
+def test_clear_wins_over_old_items(windows):
+    a, state_a, b, state_b, reopen = windows
+    state_a['todos']['General'] = a.new_items()
+    save(a, state_a, 'General')
+    state_b['todos']['General'].append(TodoItem('late', False, '2024-01-02 09:00'))
+    b.mark_changed('General')
+    b.merge_from_disk(state_b)
+    assert texts(state_b) == [('late', False)]
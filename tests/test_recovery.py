@@ -0,0 +1,44 @@
+import pytest
+
+from app.backends import create_storage
+from app.models import TodoItem
+
+def make_state(storage, count):
+    state = storage.load()
+    state['todos']['General'] = [TodoItem(f'item {i}', False, '2020-01-01 09:00') for i in range(count)]
+    return state
+
+def count(state):
+    return sum(len(items) for items in state['todos'].values())
+
+@pytest.mark.parametrize('backend, name', [('json', 'todo_data.json'), ('binary', 'todo_data.bin')])
+def test_damaged_file_loads_kept_version(backend, name, tmp_path):
+    storage = create_storage(backend, tmp_path)
+    for n in (100, 101, 102):
+        storage.save(make_state(storage, n))
+    assert (tmp_path / f'{name}.1').exists() and (tmp_path / f'{name}.2').exists()
+    
+    path = tmp_path / name
+    data = bytearray(path.read_bytes())
+    data[-20] ^= 0x01
+    path.write_bytes(bytes(data))
+    
+    damaged = create_storage(backend, tmp_path)
+    state = damaged.load()
+    recovery = damaged.pop_recovery()
+    assert recovery is not None and recovery[0].name == f'{name}.1'
+    assert count(state) == 101
+    
+    # Saving again must not keep the damaged file as a generation
+    damaged.save(state)
+    again = create_storage(backend, tmp_path)
+    assert count(again.load()) == 101 and again.pop_recovery() is None
+    path.unlink()
+    assert count(create_storage(backend, tmp_path).load()) == 101
+
+@pytest.mark.parametrize('backend', ['json', 'binary'])
+def test_intact_file_reports_no_recovery(backend, tmp_path):
+    storage = create_storage(backend, tmp_path)
+    storage.save(make_state(storage, 5))
+    reopened = create_storage(backend, tmp_path)
+    assert count(reopened.load()) == 5 and reopened.pop_recovery() is None
@@ -0,0 +1,28 @@
+from app.models import TodoItem
+from app.search import SearchIndex, tokenize
+
+WORDS = ['pay', 'rent', 'review', 'buy', 'milk', 'fix', 'bug']
+
+def make_state(count):
+    todos = {'Home': [], 'Work': []}
+    for i in range(count):
+        words = [WORDS[(i * 3 + k) % len(WORDS)] for k in range(i % 3 + 1)]
+        text = f"{' '.join(words)} #{i}"
+        todos['Home' if i % 2 else 'Work'].append(TodoItem(text, i % 5 == 0, '2020-01-01 09:00'))
+    return {'chapters': list(todos), 'current_chapter': 'Home', 'todos': todos, 'settings': {}}
+
+def expected(state, query):
+    terms = query.split()
+    return [(name, position)
+            for name in state['todos']
+            for position, item in enumerate(state['todos'][name])
+            if all(any(token.startswith(term) for token in tokenize(item.text)) for term in terms)]
+
+def test_matches_linear_scan():
+    # Enough numbered items that '#1' matches hundreds of rare tokens
+    state = make_state(3000)
+    index = SearchIndex.build(state)
+    for query in ['1', '29', '1 pay', 'pay rent', 'pay rent review', 're', 'b 12', 'zzz']:
+        results, complete = index.search(query, limit=10**6)
+        assert complete
+        assert results == expected(state, query), query
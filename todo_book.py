@@ -13,12 +13,20 @@ except ImportError:
 from dataclasses import dataclass, asdict
 from typing import Dict, List
 from storage import load_state, save_state, get_data_path
+from app.models import new_item_id
+from app.stats import BookStats
+from app.writer import SaveWriter
+from app.ui.reconcile import TreeReconciler
+from app.ui.scheduler import CountingProxy, RenderScheduler
+from app.undo import ChapterAdded, ChapterCleared, ItemAdded, ItemToggled, UndoHistory
 
 @dataclass
 class TodoItem:
+    __slots__ = ('text', 'completed', 'created_at', 'id')
     text: str
     completed: bool
     created_at: str  # ISO-like timestamp
+    id: int  # stable across saves and loads
 
 class TodoBook:
     def __init__(self, root):
@@ -43,8 +51,15 @@ class TodoBook:
         self.mode_var = tk.StringVar(value=self.settings["mode"])
         self._hotkey_str = 'ctrl+space'
         self._hotkey_registered = False
+        # Item counts per chapter and for the book, shown in the sidebar
+        self.stats = BookStats()
         
         self.load_data()
+        self.history = UndoHistory(limit=self.settings.get("undo_limit", 200))
+        # Encode and write on a background thread, coalescing bursts of saves
+        self._writer = SaveWriter(self._write_snapshot)
+        # List redraws are coalesced into one per event-loop tick
+        self._render = RenderScheduler(self.root)
         # Apply theme before building widgets so styles take effect
         self.apply_theme(self.settings.get("theme", "light"))
         self.setup_ui()
@@ -54,6 +69,9 @@ class TodoBook:
         
         self.window_visible = True
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind('<Control-z>', lambda e: self.undo())
+        self.root.bind('<Control-y>', lambda e: self.redo())
+        self.root.bind('<Control-Z>', lambda e: self.redo())
     
     def _setup_hotkey(self):
         """Set up the global hotkey in a separate thread"""
@@ -76,6 +94,8 @@ class TodoBook:
         except Exception:
             pass
         keyboard.unhook_all()
+        # Make sure the last change hits the disk before exiting
+        self._writer.close()
         self.root.destroy()
     
     def toggle_window(self, event=None):
@@ -148,11 +168,13 @@ class TodoBook:
         sidebar = ttk.Frame(self.main_frame, width=120, style='Sidebar.TFrame')
         sidebar.grid(row=1, column=0, sticky="ns", padx=(0, 5), pady=5)
         
-        ttk.Label(sidebar, text="Chapters", font=('Segoe UI', 8, 'bold')).pack(pady=(0, 3), anchor='w')
+        self.book_label = ttk.Label(sidebar, text="Chapters", font=('Segoe UI', 8, 'bold'))
+        self.book_label.pack(pady=(0, 3), anchor='w')
         
         # Chapter list with smaller font
         self.chapter_list = ttk.Treeview(sidebar, show='tree', selectmode='browse', height=10)
         self.chapter_list.pack(fill=tk.X, pady=(0, 5))
+        self._chapter_rows: Dict[str, str] = {}
         self.update_chapter_list()
         
         ttk.Button(sidebar, text="+ New", command=self.add_chapter, 
@@ -190,6 +212,9 @@ class TodoBook:
         self.todo_list['show'] = 'tree headings'
         
         self.todo_list.pack(fill=tk.BOTH, expand=True)
+        # Applies only the row changes on each update instead of rebuilding
+        self._todo_rows = TreeReconciler(CountingProxy(self.todo_list, self._render.tk_calls, 'Treeview'))
+        self._todo_positions: Dict[int, int] = {}
         
         # Bind events
         self.todo_list.bind("<Button-1>", self.on_todo_click)
@@ -252,24 +277,39 @@ class TodoBook:
         self.save_data()
     
     def update_todo_list(self):
+        """Redraw the todo list at the end of this event-loop tick"""
+        self._render.mark('todos', self._draw_todo_list)
+    
+    def _draw_todo_list(self):
         """Update the todo list display based on current mode"""
-        for child in self.todo_list.get_children():
-            self.todo_list.delete(child)
-            
-        for i, todo in enumerate(self.todos.get(self.current_chapter, [])):
-            if self.mode_var.get() == "todo":
-                prefix = "✓ " if todo.completed else "  "
-                self.todo_list.insert('', 'end', iid=str(i), 
-                                    text=f"{prefix}{todo.text}",
-                                    values=("",))
-            else:  # clipboard mode
-                # Show copy icon (⧉) in the copy column
-                self.todo_list.insert('', 'end', iid=str(i),
-                                    text=todo.text,
-                                    values=("⧉",))
+        # Rows are keyed by item ID so unchanged todos cost no Tk calls
+        todos = self.todos.get(self.current_chapter, [])
+        self._todo_rows.reconcile([(todo.id, self._todo_row(todo)) for todo in todos])
+        # Clicked rows map back to items through their ID
+        self._todo_positions = {todo.id: index for index, todo in enumerate(todos)}
+    
+    def _todo_row(self, todo):
+        if self.mode_var.get() == "todo":
+            prefix = "✓ " if todo.completed else "  "
+            return (f"{prefix}{todo.text}", ("",), ())
+        # Clipboard mode: show copy icon (⧉) in the copy column
+        return (todo.text, ("⧉",), ())
+    
+    def _redraw_todo(self, todo):
+        """Redraw one item's row at the end of this tick, if it is shown"""
+        def draw():
+            if todo.id in self._todo_rows:
+                self._todo_rows.update(todo.id, self._todo_row(todo))
+        self._render.mark(('todo', todo.id), draw)
+    
+    def _todo_index(self, row_id):
+        """Position in the current chapter of the item a row shows"""
+        return self._todo_positions[self._todo_rows.key(row_id)]
     
     def on_todo_click(self, event):
         """Handle clicks in the todo list"""
+        # Rows must show the current model before a click is mapped to an item
+        self._render.flush()
         # Get the item that was clicked
         item_id = self.todo_list.identify_row(event.y)
         if not item_id:
@@ -282,7 +322,7 @@ class TodoBook:
             # Handle copy icon click in clipboard mode
             try:
                 # Get the todo item text
-                todo_text = self.todos[self.current_chapter][int(item_id)].text
+                todo_text = self.todos[self.current_chapter][self._todo_index(item_id)].text
                 # Copy to clipboard
                 self.root.clipboard_clear()
                 self.root.clipboard_append(todo_text)
@@ -294,7 +334,7 @@ class TodoBook:
                 print(f"Copy failed: {e}")
         elif self.mode_var.get() == "todo" and event.num == 3:  # Double click in todo mode
             # Toggle todo completion on double-click in todo mode
-            self.toggle_todo(int(item_id))
+            self.toggle_todo(self._todo_index(item_id))
     
     def clear_all_todos(self):
         """Clear all todos in the current chapter with confirmation"""
@@ -306,8 +346,11 @@ class TodoBook:
             f"Are you sure you want to delete all tasks in '{self.current_chapter}'?",
             icon='warning'
         ):
-            # Clear the todos for current chapter
+            # Clear the todos for current chapter; the old list is kept for undo
+            self.history.record(ChapterCleared(self.current_chapter, self.todos[self.current_chapter]))
             self.todos[self.current_chapter] = []
+            self.stats.cleared(self.current_chapter)
+            self._redraw_chapter(self.current_chapter)
             self.update_todo_list()
             self.save_data()
     
@@ -316,19 +359,40 @@ class TodoBook:
         if chapter and chapter.strip() and chapter not in self.chapters:
             self.chapters.append(chapter)
             self.todos[chapter] = []
+            self.stats.cleared(chapter)
+            self.history.record(ChapterAdded(chapter))
             self.update_chapter_list()
             self.save_data()
     
     def update_chapter_list(self):
         for child in self.chapter_list.get_children():
             self.chapter_list.delete(child)
+        self._chapter_rows = {}
         for i, chapter in enumerate(self.chapters):
-            self.chapter_list.insert('', 'end', iid=str(i), text=chapter)
+            self.chapter_list.insert('', 'end', iid=str(i), text=self._chapter_text(chapter))
+            self._chapter_rows[chapter] = str(i)
+        self._draw_book_stats()
         if self.current_chapter in self.chapters:
             idx = self.chapters.index(self.current_chapter)
             self.chapter_list.selection_set(str(idx))
             self.chapter_list.see(str(idx))
     
+    def _chapter_text(self, chapter):
+        stats = self.stats.chapter(chapter)
+        return f"{chapter} ({stats.completed}/{stats.total})"
+    
+    def _redraw_chapter(self, chapter):
+        """Redraw one chapter's counts in the sidebar at the end of this tick"""
+        def draw():
+            row = self._chapter_rows.get(chapter)
+            if row is not None:
+                self.chapter_list.item(row, text=self._chapter_text(chapter))
+        self._render.mark(('chapter', chapter), draw)
+        self._render.mark('book', self._draw_book_stats)
+    
+    def _draw_book_stats(self):
+        self.book_label.config(text=f"Chapters  {self.stats.book.describe()}")
+    
     def on_chapter_select(self, event):
         selection = self.chapter_list.selection()
         if selection:
@@ -341,9 +405,11 @@ class TodoBook:
         text = self.todo_entry.get().strip()
         if text:
             timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
-            self.todos[self.current_chapter].append(
-                TodoItem(text=text, completed=False, created_at=timestamp)
-            )
+            item = TodoItem(text=text, completed=False, created_at=timestamp, id=new_item_id())
+            self.todos[self.current_chapter].append(item)
+            self.stats.added(self.current_chapter)
+            self._redraw_chapter(self.current_chapter)
+            self.history.record(ItemAdded(self.current_chapter, item))
             self.todo_entry.delete(0, tk.END)
             self.update_todo_list()
             self.save_data()
@@ -352,22 +418,76 @@ class TodoBook:
         if 0 <= index < len(self.todos[self.current_chapter]):
             item = self.todos[self.current_chapter][index]
             item.completed = not item.completed
-            self.update_todo_list()
+            self.stats.toggled(self.current_chapter, item.completed)
+            self._redraw_chapter(self.current_chapter)
+            self.history.record(ItemToggled(self.current_chapter, index))
+            self._redraw_todo(item)
             self.save_data()
     
+    def undo(self):
+        """Reverse the last change (Ctrl+Z)"""
+        change = self.history.undo()
+        if change is not None:
+            self._apply_change(change, undo=True)
+    
+    def redo(self):
+        """Apply the last undone change again (Ctrl+Y)"""
+        change = self.history.redo()
+        if change is not None:
+            self._apply_change(change, undo=False)
+    
+    def _apply_change(self, change, undo):
+        """Apply or reverse a recorded change, then redraw and save as usual"""
+        chapter = change.chapter
+        if isinstance(change, ItemAdded):
+            if undo:
+                self.stats.removed(chapter, self.todos[chapter].pop().completed)
+            else:
+                self.todos[chapter].append(change.item)
+                self.stats.added(chapter, change.item.completed)
+        elif isinstance(change, ItemToggled):
+            item = self.todos[chapter][change.index]
+            item.completed = not item.completed
+            self.stats.toggled(chapter, item.completed)
+        elif isinstance(change, ChapterCleared):
+            self.todos[chapter] = change.items if undo else []
+            self.stats.recount(chapter, self.todos[chapter])
+        elif isinstance(change, ChapterAdded):
+            if undo:
+                self.chapters.remove(chapter)
+                self.todos.pop(chapter, None)
+                self.stats.deleted(chapter)
+                if self.current_chapter == chapter:
+                    self.current_chapter = self.chapters[0] if self.chapters else "General"
+                    self.current_chapter_label.config(text=f"{self.current_chapter}")
+            else:
+                self.chapters.append(chapter)
+                self.todos[chapter] = []
+                self.stats.cleared(chapter)
+            self.update_chapter_list()
+        self._redraw_chapter(chapter)
+        self.update_todo_list()
+        self.save_data()
+    
     def save_data(self):
+        # Only copy the containers here; encoding happens on the writer thread
+        snapshot = {
+            "chapters": list(self.chapters),
+            "current_chapter": self.current_chapter,
+            "todos": {chapter: list(items) for chapter, items in self.todos.items()},
+            "settings": dict(self.settings),
+            "stats": dict(self.stats.entries),
+        }
+        self._writer.request_save(snapshot)
+    
+    def _write_snapshot(self, snapshot):
+        """Runs on the writer thread"""
         # Convert dataclass instances to plain dicts for JSON
-        serializable_todos: Dict[str, List[dict]] = {
+        snapshot["todos"] = {
             chapter: [asdict(item) for item in items]
-            for chapter, items in self.todos.items()
-        }
-        data = {
-            "chapters": self.chapters,
-            "current_chapter": self.current_chapter,
-            "todos": serializable_todos,
-            "settings": self.settings,
+            for chapter, items in snapshot["todos"].items()
         }
-        save_state(data)
+        save_state(snapshot)
     
     def load_data(self):
         try:
@@ -385,10 +505,17 @@ class TodoBook:
                         text = it.get("text", "")
                         completed = bool(it.get("completed", False))
                         created_at = it.get("created_at", "")
-                        converted[chapter].append(TodoItem(text=text, completed=completed, created_at=created_at))
+                        # Files written before IDs existed get them here
+                        item_id = it.get("id") or new_item_id()
+                        converted[chapter].append(TodoItem(text=text, completed=completed,
+                                                           created_at=created_at, id=item_id))
                     elif isinstance(it, TodoItem):
                         converted[chapter].append(it)
             self.todos = converted or {"General": []}
+            # Saved counts keep their timestamps; the counts are checked
+            # against the items, which are all in memory here
+            self.stats = BookStats.attach({"chapters": self.chapters, "todos": self.todos,
+                                           "stats": data.get("stats")})
             
             # Load settings
             loaded_settings = data.get("settings", {})